@@ -0,0 +1,351 @@
+"""
+Links de afiliado por usuário: modelos pré-calculados a partir de AffiliateCode e Utm
+"""
+
+import asyncio
+import logging
+import re
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+
+# Campos de Utm e o parâmetro de URL correspondente
+UTM_FIELDS = (('source', 'utm_source'), ('medium', 'utm_medium'), ('campaign', 'utm_campaign'))
+
+def _bookmaker_key(value: Any) -> str:
+    """Nome de casa de apostas normalizado (mesma regra do índice de casas)"""
+    return _NON_ALNUM_RE.sub('', str(value).lower())
+
+def _field(record: Dict[str, Any], name: str) -> Any:
+    """Campo do JSON da API em camelCase ou PascalCase"""
+    value = record.get(name)
+    if value is None:
+        value = record.get(name[0].upper() + name[1:])
+    return value
+
+def utm_params(utms: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """
+    Parâmetros de URL das UTMs do usuário
+    
+    Source, Medium e Campaign viram utm_source, utm_medium e utm_campaign;
+    Name e Value viram um parâmetro próprio (`name=value`). Em parâmetros
+    repetidos vale a primeira UTM.
+    
+    Args:
+        utms: Registros de Utm do usuário
+    
+    Returns:
+        Pares (parâmetro, valor) na ordem das UTMs
+    """
+    params: List[Tuple[str, str]] = []
+    seen = set()
+    for utm in utms:
+        pairs = [(param, _field(utm, field)) for field, param in UTM_FIELDS]
+        pairs.append((_field(utm, 'name'), _field(utm, 'value')))
+        for param, value in pairs:
+            if param and value and param not in seen:
+                seen.add(param)
+                params.append((str(param), str(value)))
+    return params
+
+class AffiliateLinks:
+    """
+    Monta o link rastreado de cada usuário para as casas encontradas
+    
+    O perfil do usuário (códigos de afiliado por casa e UTMs) vem da API em
+    uma única consulta pelo id do Telegram e é transformado, uma vez, num
+    modelo por casa: a URL base, quando o código é um link completo, e a
+    query string já codificada. Montar um link custa uma consulta ao
+    dicionário e a formatação da URL. Com `link_store` e `code_generator`,
+    o destino vira um link curto (servido pelo redirect_server.py), criado
+    uma única vez por usuário e destino: o código fica no LinkStore e é
+    reaproveitado quando o perfil é recarregado.
+    
+    Os perfis ficam em cache por `profile_ttl` segundos. A cada
+    `sync_interval` segundos a API informa os perfis alterados desde a
+    última consulta (códigos ou UTMs editados) e eles saem do cache.
+    """
+    
+    def __init__(
+        self,
+        api_client,
+        profile_ttl: float = 600.0,
+        sync_interval: float = 60.0,
+        code_param: str = 'ref',
+        max_profiles: int = 10000,
+        link_store=None,
+        code_generator=None,
+        short_link_base_url: Optional[str] = None
+    ):
+        self.api_client = api_client
+        self.profile_ttl = profile_ttl
+        self.sync_interval = sync_interval
+        self.code_param = code_param
+        self.link_store = link_store
+        self.code_generator = code_generator
+        self.short_link_base_url = short_link_base_url.rstrip('/') if short_link_base_url else None
+        
+        # id do Telegram -> perfil com os modelos por casa
+        self._profiles = TTLCache(max_size=max_profiles)
+        # Consultas de perfil em andamento, agrupadas por usuário
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Muda a cada invalidação: perfis consultados antes dela não entram no cache
+        self._generation = 0
+        
+        self._watermark: Optional[str] = None
+        # Primeira consulta bem-sucedida já feita: dali em diante toda alteração invalida
+        self._synced = False
+        self._task: Optional[asyncio.Task] = None
+        self.sync_supported = True
+        
+        self.profile_fetches = 0
+        self.links_built = 0
+        self.short_links_created = 0
+        self.invalidations = 0
+        self.sync_failures = 0
+    
+    def build_templates(self, profile: Dict[str, Any]) -> Dict[str, Tuple[Optional[str], str]]:
+        """
+        Modelos de link por casa a partir do perfil da API
+        
+        Args:
+            profile: Perfil com affiliateCodes e utms
+        
+        Returns:
+            Chave da casa (id e nome normalizado) -> (URL base do código ou
+            None para usar o site da casa, query string)
+        """
+        utms = utm_params(_field(profile, 'utms') or [])
+        templates: Dict[str, Tuple[Optional[str], str]] = {}
+        
+        for affiliate in _field(profile, 'affiliateCodes') or []:
+            code = _field(affiliate, 'code')
+            if not code:
+                continue
+            if str(code).startswith(('http://', 'https://')):
+                # Código já é o link de rastreamento da casa
+                template = (str(code), urlencode(utms))
+            else:
+                template = (None, urlencode([(self.code_param, str(code))] + utms))
+            
+            bookmaker_id = _field(affiliate, 'bookmakerId')
+            if bookmaker_id:
+                templates[f'id:{bookmaker_id}'] = template
+            name = _field(affiliate, 'bookmakerName')
+            if name:
+                templates[_bookmaker_key(name)] = template
+        return templates
+    
+    async def _fetch(self, telegram_id: str) -> Optional[Dict[str, Any]]:
+        """Consulta o perfil na API e pré-calcula os modelos"""
+        generation = self._generation
+        self.profile_fetches += 1
+        result = await self.api_client.get_affiliate_profile(telegram_id)
+        if not result['success']:
+            # Falha temporária: sem links nesta resposta, nova tentativa na próxima
+            return None
+        
+        data = result['data'] or {}
+        profile = {
+            'user_id': _field(data, 'userId'),
+            'templates': self.build_templates(data),
+            # destino -> link curto já criado
+            'short_links': {}
+        }
+        if generation == self._generation:
+            # Usuários sem perfil (404) também ficam em cache, com modelos vazios
+            self._profiles.set(telegram_id, profile, ttl=self.profile_ttl)
+        return profile
+    
+    def _fetch_task(self, telegram_id: str) -> asyncio.Task:
+        """Consulta de perfil em andamento do usuário, iniciada se preciso"""
+        task = self._inflight.get(telegram_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(telegram_id))
+            self._inflight[telegram_id] = task
+            
+            def done(finished: asyncio.Task) -> None:
+                # Uma invalidação pode já ter trocado a consulta deste usuário
+                if self._inflight.get(telegram_id) is finished:
+                    del self._inflight[telegram_id]
+            task.add_done_callback(done)
+        return task
+    
+    async def _profile(self, telegram_id: str) -> Optional[Dict[str, Any]]:
+        """Perfil do cache ou da API, com consultas simultâneas agrupadas"""
+        profile = self._profiles.get(telegram_id)
+        if profile is not None:
+            return profile
+        return await asyncio.shield(self._fetch_task(telegram_id))
+    
+    def prefetch(self, telegram_id: Any) -> None:
+        """Começa a carregar o perfil enquanto as casas ainda são verificadas"""
+        telegram_id = str(telegram_id)
+        if self._profiles.get(telegram_id) is None:
+            self._fetch_task(telegram_id)
+    
+    def _store_link(self, user_id: Optional[str], target: str) -> Tuple[str, bool]:
+        """
+        Código do destino no LinkStore, criado só se o usuário ainda não o tiver
+        
+        Faz I/O no SQLite (e, ao fim de uma faixa, a reserva de ids): roda fora
+        do event loop.
+        
+        Returns:
+            (código, True se foi criado agora)
+        """
+        code = self.link_store.find(user_id, target)
+        if code is not None:
+            return code, False
+        
+        code = self.code_generator.next_code()
+        try:
+            self.link_store.add(code, target, user_id)
+        except sqlite3.IntegrityError:
+            # Mesmo destino gravado ao mesmo tempo por outra mensagem ou processo
+            existing = self.link_store.find(user_id, target)
+            if existing is None:
+                raise
+            return existing, False
+        return code, True
+    
+    async def _short_link(self, profile: Dict[str, Any], target: str) -> str:
+        """Link curto para o destino, criado na primeira vez"""
+        short_links = profile['short_links']
+        link = short_links.get(target)
+        if link is not None:
+            return link
+        
+        try:
+            code, created = await asyncio.to_thread(self._store_link, profile['user_id'], target)
+        except Exception as e:
+            logger.error(f"Erro ao criar link curto: {e}")
+            return target
+        
+        link = short_links[target] = f"{self.short_link_base_url}/{code}"
+        if created:
+            self.short_links_created += 1
+        return link
+    
+    async def links_for(self, telegram_id: Any, houses: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+        """
+        Links do usuário para as casas encontradas
+        
+        Args:
+            telegram_id: Id do Telegram do usuário
+            houses: Dados das casas (resposta da API)
+        
+        Returns:
+            Pares (nome da casa, link) das casas em que o usuário tem código
+        """
+        if not houses:
+            return []
+        profile = await self._profile(str(telegram_id))
+        if not profile or not profile['templates']:
+            return []
+        
+        templates = profile['templates']
+        links = []
+        for house in houses:
+            template = None
+            if house.get('id') is not None:
+                template = templates.get(f"id:{house['id']}")
+            if template is None:
+                template = templates.get(_bookmaker_key(house.get('name', '')))
+            if template is None:
+                continue
+            
+            base, query = template
+            if base is None:
+                base = house.get('website') or f"https://{house.get('domain', '')}"
+                if '/' not in base.split('://', 1)[-1]:
+                    base += '/'
+            target = f"{base}{'&' if '?' in base else '?'}{query}" if query else base
+            
+            if self.code_generator is not None and self.short_link_base_url:
+                target = await self._short_link(profile, target)
+            links.append((house.get('name') or house.get('domain', ''), target))
+            self.links_built += 1
+        return links
+    
+    def invalidate(self, telegram_id: Any) -> None:
+        """Descarta o perfil em cache de um usuário"""
+        telegram_id = str(telegram_id)
+        self._generation += 1
+        self._profiles.invalidate(telegram_id)
+        # Consulta iniciada antes da alteração: a próxima busca o perfil novo
+        self._inflight.pop(telegram_id, None)
+        self.invalidations += 1
+    
+    async def sync(self) -> None:
+        """Descarta do cache os perfis alterados desde a última consulta"""
+        result = await self.api_client.list_affiliate_profile_changes(self._watermark)
+        if result.get('status_code') in (404, 405, 501):
+            # API sem a lista de alterações: os perfis expiram só pelo TTL
+            logger.warning("API não informa perfis de afiliado alterados; usando apenas o TTL dos perfis")
+            self.sync_supported = False
+            return
+        if not result['success'] or not isinstance(result['data'], list):
+            self.sync_failures += 1
+            logger.warning(f"Falha ao consultar perfis de afiliado alterados: {result.get('error')}")
+            return
+        
+        changes = result['data']
+        first = not self._synced
+        for change in changes:
+            updated_at = _field(change, 'updatedAt')
+            if updated_at and (self._watermark is None or updated_at > self._watermark):
+                self._watermark = updated_at
+            # Na primeira consulta o cache ainda está vazio: só define a marca d'água
+            if not first:
+                self.invalidate(_field(change, 'telegramId'))
+        self._synced = True
+        if changes and not first:
+            logger.info(f"{len(changes)} perfis de afiliado alterados; modelos descartados")
+    
+    async def start(self) -> None:
+        """Inicia a verificação periódica de perfis alterados"""
+        if self.sync_interval <= 0 or self._task is not None:
+            return
+        await self.sync()
+        if not self.sync_supported:
+            return
+        self._task = asyncio.create_task(self._sync_loop())
+    
+    async def stop(self) -> None:
+        """Interrompe a verificação periódica"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _sync_loop(self) -> None:
+        """Consulta os perfis alterados a cada `sync_interval` segundos"""
+        while self.sync_supported:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                self.sync_failures += 1
+                logger.error(f"Erro ao sincronizar perfis de afiliado: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Perfis em cache, consultas e links montados"""
+        return {
+            'profiles': len(self._profiles),
+            'profile_fetches': self.profile_fetches,
+            'links_built': self.links_built,
+            'short_links_created': self.short_links_created,
+            'invalidations': self.invalidations,
+            'sync_failures': self.sync_failures,
+            'watermark': self._watermark
+        }
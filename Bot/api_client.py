@@ -2,37 +2,416 @@
 Módulo para integração com API de casas de apostas
 """
 
-import requests
+import asyncio
+import httpx
 import logging
-from typing import Dict, Optional, Any
+import time
+from typing import Callable, Dict, List, Optional, Any
+from cache import TTLCache
+from circuit_breaker import AdaptiveTimeout, CircuitBreaker, CircuitOpenError
+from persistent_cache import PersistentCache
+from rate_limiter import TokenBucket
+from metrics import REGISTRY, MetricsRegistry
 from config import API_ENDPOINTS
 
 logger = logging.getLogger(__name__)
 
+API_RESPONSES = REGISTRY.counter(
+    'betting_api_responses_total',
+    'Respostas da API por endpoint e status HTTP (ou timeout, error, circuit_open)',
+    ('endpoint', 'status')
+)
+API_LATENCY = REGISTRY.histogram(
+    'betting_api_request_duration_seconds',
+    'Latência das requisições à API',
+    ('endpoint',)
+)
+
+# Valor do gauge de estado do circuito
+CIRCUIT_STATE_VALUES = {
+    CircuitBreaker.CLOSED: 0,
+    CircuitBreaker.HALF_OPEN: 1,
+    CircuitBreaker.OPEN: 2
+}
+
 class BettingHouseAPI:
     """Cliente para API de casas de apostas"""
     
-    def __init__(self, base_url: str, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        base_url: str,
+        api_key: Optional[str] = None,
+        timeout: float = 10.0,
+        list_timeout: float = 15.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        cache_max_size: int = 1024,
+        cache_ttl: float = 300.0,
+        cache_negative_ttl: float = 60.0,
+        batch_size: int = 50,
+        list_page_size: int = 1000,
+        persistent_cache: Optional[PersistentCache] = None,
+        breaker_failure_threshold: int = 5,
+        breaker_reset_timeout: float = 30.0,
+        adaptive_timeout_min: float = 1.0,
+        adaptive_timeout_multiplier: float = 3.0,
+        rate_limit: float = 0.0,
+        rate_burst: float = 0.0
+    ):
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
-        self.session = requests.Session()
+        self.timeout = timeout
+        self.list_timeout = list_timeout
+        self.connect_timeout = connect_timeout
         
         # Configurar headers padrão
-        self.session.headers.update({
+        headers = {
             'Content-Type': 'application/json',
             'User-Agent': 'TelegramBot-BettingHouseChecker/1.0'
-        })
+        }
         
         if self.api_key:
             # Ajuste o header de autorização conforme sua API
-            self.session.headers.update({
-                'Authorization': f'Bearer {self.api_key}'
-                # ou 'X-API-Key': self.api_key
-            })
+            headers['Authorization'] = f'Bearer {self.api_key}'
+            # ou headers['X-API-Key'] = self.api_key
+        
+        # Cliente assíncrono com pool de conexões (keep-alive) compartilhado
+        # por todas as consultas, para não bloquear o event loop do bot
+        self.client = httpx.AsyncClient(
+            headers=headers,
+            timeout=self._timeout(self.timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            )
+        )
+    
+        # Cache de consultas: TTL separado para encontradas e para 404
+        self.cache = TTLCache(max_size=cache_max_size)
+        self.cache_ttl = cache_ttl
+        self.cache_negative_ttl = cache_negative_ttl
+        # Cópia em disco opcional, usada para aquecer o cache após reinícios
+        self.persistent_cache = persistent_cache
+        
+        # Consultas em andamento, para agrupar pedidos idênticos simultâneos
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.coalesced_lookups = 0
+        
+        # Consulta em lote: desativada automaticamente se o servidor não suportar
+        self.batch_size = max(1, batch_size)
+        self.batch_supported = True
+        
+        # Listagem paginada por cursor: desativada automaticamente se o
+        # servidor ignorar `limit` e devolver a lista completa
+        self.list_page_size = max(1, list_page_size)
+        self.pagination_supported = True
+        
+        # Circuit breaker e timeout adaptativo por endpoint
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.timeouts: Dict[str, AdaptiveTimeout] = {}
+        for endpoint, max_timeout in (
+            ('check_betting_house', self.timeout),
+            ('batch_check_betting_houses', self.timeout),
+            ('search_betting_houses', self.timeout),
+            ('list_betting_houses', self.list_timeout),
+            ('list_betting_houses_page', self.timeout),
+            ('record_clicks', self.timeout),
+            ('get_affiliate_profile', self.timeout),
+            ('list_affiliate_profile_changes', self.timeout)
+        ):
+            self.breakers[endpoint] = CircuitBreaker(
+                endpoint,
+                failure_threshold=breaker_failure_threshold,
+                reset_timeout=breaker_reset_timeout
+            )
+            self.timeouts[endpoint] = AdaptiveTimeout(
+                max_timeout=max_timeout,
+                min_timeout=adaptive_timeout_min,
+                multiplier=adaptive_timeout_multiplier
+            )
+        
+        # Limite global de requisições por segundo à API (0 desativa); acima
+        # dele as requisições esperam a vez em vez de falhar
+        self.rate_limiter = TokenBucket(rate_limit, rate_burst or rate_limit) if rate_limit > 0 else None
+    
+    def _timeout(self, total: float) -> httpx.Timeout:
+        """Timeout por requisição, com limite próprio para a conexão"""
+        return httpx.Timeout(total, connect=min(self.connect_timeout, total))
+    
+    async def _request(self, endpoint: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Executa uma requisição protegida pelo circuit breaker do endpoint
+        
+        Args:
+            endpoint: Nome do endpoint em API_ENDPOINTS
+            method: Método HTTP
+            url: URL completa
+            **kwargs: Argumentos repassados ao httpx
+            
+        Returns:
+            Resposta da API
+            
+        Raises:
+            CircuitOpenError: Se o circuito do endpoint estiver aberto
+        """
+        breaker = self.breakers[endpoint]
+        adaptive = self.timeouts[endpoint]
+        
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+        
+        try:
+            breaker.allow_request()
+        except CircuitOpenError:
+            API_RESPONSES.inc(endpoint=endpoint, status='circuit_open')
+            raise
+        
+        timeout = adaptive.timeout
+        started = time.monotonic()
+        
+        try:
+            response = await self.client.request(method, url, timeout=self._timeout(timeout), **kwargs)
+        except httpx.TimeoutException:
+            # Timeouts entram na janela para que o limite volte a crescer
+            adaptive.observe(timeout)
+            breaker.record_failure()
+            API_RESPONSES.inc(endpoint=endpoint, status='timeout')
+            raise
+        except httpx.HTTPError:
+            breaker.record_failure()
+            API_RESPONSES.inc(endpoint=endpoint, status='error')
+            raise
+        except BaseException:
+            breaker.record_cancelled()
+            raise
+        
+        elapsed = time.monotonic() - started
+        API_RESPONSES.inc(endpoint=endpoint, status=response.status_code)
+        API_LATENCY.observe(elapsed, endpoint=endpoint)
+        
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            adaptive.observe(elapsed)
+            breaker.record_success()
+        
+        return response
     
     async def check_betting_house(self, house_name: str) -> Dict[str, Any]:
         """
-        Verifica se uma casa de apostas existe na API
+        Verifica se uma casa de apostas existe, usando o cache quando possível
+        
+        Consultas idênticas feitas ao mesmo tempo compartilham uma única
+        requisição à API.
+        
+        Args:
+            house_name: Nome da casa de apostas
+            
+        Returns:
+            Dicionário com resultado da verificação
+        """
+        key = house_name.lower()
+        
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced_lookups += 1
+        else:
+            task = asyncio.ensure_future(self._fetch_and_cache(key, house_name))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # shield: o cancelamento de quem espera não derruba a consulta compartilhada
+        return await asyncio.shield(task)
+    
+    async def _fetch_and_cache(self, key: str, house_name: str) -> Dict[str, Any]:
+        """Consulta a API e guarda no cache respostas 200 e 404"""
+        result = await self._fetch_betting_house(house_name)
+        self._store(key, result)
+        return result
+    
+    def _store(self, key: str, result: Dict[str, Any]) -> None:
+        """Guarda no cache um resultado 200 ou 404"""
+        if result['status_code'] == 200:
+            ttl = self.cache_ttl
+        elif result['status_code'] == 404:
+            ttl = self.cache_negative_ttl
+        else:
+            return
+        
+        self.cache.set(key, result, ttl)
+        if self.persistent_cache is not None:
+            self.persistent_cache.stage(key, result, ttl)
+    
+    async def warm_up(self) -> int:
+        """
+        Carrega no cache em memória os resultados salvos em disco
+        
+        Returns:
+            Quantidade de itens carregados
+        """
+        if self.persistent_cache is None:
+            return 0
+        
+        entries = await asyncio.to_thread(self.persistent_cache.load)
+        
+        # Itens mais próximos de expirar primeiro, para que o LRU preserve os mais novos
+        for key, result, remaining_ttl in reversed(entries):
+            self.cache.set(key, result, remaining_ttl)
+        
+        await self.persistent_cache.compact()
+        self.persistent_cache.start()
+        
+        logger.info(f"Cache aquecido com {len(entries)} resultados salvos em disco")
+        return len(entries)
+    
+    async def check_betting_houses(
+        self,
+        house_names: List[str],
+        on_result: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Verifica várias casas de apostas com uma única requisição em lote
+        
+        Nomes em cache ou já em consulta não são reenviados. Se o servidor
+        não oferecer o endpoint de lote, cai para consultas individuais.
+        
+        Args:
+            house_names: Nomes das casas de apostas
+            on_result: Chamado com (nome em minúsculas, resultado) assim que
+                cada nome fica pronto: acertos de cache na hora, os demais
+                quando o lote ou a consulta que os contém termina
+            
+        Returns:
+            Dicionário nome -> resultado da verificação
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        waiting: Dict[str, asyncio.Task] = {}
+        pending: Dict[str, str] = {}
+        
+        for house_name in house_names:
+            key = house_name.lower()
+            if key in results or key in waiting or key in pending:
+                continue
+            
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[key] = cached
+                if on_result is not None:
+                    on_result(key, cached)
+            elif key in self._inflight:
+                self.coalesced_lookups += 1
+                waiting[key] = self._inflight[key]
+            else:
+                pending[key] = house_name
+        
+        if len(pending) == 1 or not self.batch_supported:
+            for key, house_name in pending.items():
+                waiting[key] = asyncio.ensure_future(self.check_betting_house(house_name))
+        else:
+            names = list(pending.values())
+            for offset in range(0, len(names), self.batch_size):
+                chunk = names[offset:offset + self.batch_size]
+                batch = asyncio.ensure_future(self._fetch_batch_and_cache(chunk))
+                
+                for house_name in chunk:
+                    key = house_name.lower()
+                    task = asyncio.ensure_future(self._batch_item(batch, house_name))
+                    self._inflight[key] = task
+                    task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+                    waiting[key] = task
+        
+        if waiting:
+            reporting = on_result is not None
+            
+            def report(key: str, task: asyncio.Future) -> None:
+                if reporting and not task.cancelled() and task.exception() is None:
+                    on_result(key, task.result())
+            
+            if reporting:
+                for key, task in waiting.items():
+                    task.add_done_callback(lambda task, key=key: report(key, task))
+            try:
+                # shield: o cancelamento de quem espera não derruba as consultas compartilhadas
+                done = await asyncio.shield(asyncio.gather(*waiting.values()))
+            finally:
+                # Quem desistiu de esperar não recebe mais resultados
+                reporting = False
+            results.update(zip(waiting.keys(), done))
+        
+        return {house_name: results[house_name.lower()] for house_name in house_names}
+    
+    @staticmethod
+    async def _batch_item(batch: asyncio.Task, house_name: str) -> Dict[str, Any]:
+        """Extrai de uma consulta em lote o resultado de um nome"""
+        return (await batch)[house_name]
+    
+    async def _fetch_batch_and_cache(self, house_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Consulta um lote de nomes na API, com fallback para consultas individuais
+        
+        Args:
+            house_names: Nomes das casas de apostas
+            
+        Returns:
+            Dicionário nome -> resultado da verificação
+        """
+        try:
+            url = f"{self.base_url}{API_ENDPOINTS['batch_check_betting_houses']}"
+            
+            logger.info(f"Consultando API em lote ({len(house_names)} nomes): {url}")
+            
+            response = await self._request(
+                'batch_check_betting_houses',
+                'POST',
+                url,
+                json={'names': house_names}
+            )
+            
+            if response.status_code in (404, 405, 501):
+                # Servidor sem suporte a lote: não tentar novamente
+                logger.warning(f"Endpoint de lote indisponível (status {response.status_code}); usando consultas individuais")
+                self.batch_supported = False
+                return await self._fetch_individually(house_names)
+            
+            if response.status_code != 200:
+                return {
+                    house_name: self.status_result(house_name, response.status_code, None)
+                    for house_name in house_names
+                }
+            
+            found = response.json().get('results', {})
+            results = {}
+            
+            for house_name in house_names:
+                data = found.get(house_name)
+                result = self.status_result(house_name, 200 if data else 404, data)
+                self._store(house_name.lower(), result)
+                results[house_name] = result
+            
+            return results
+            
+        except Exception as e:
+            return {house_name: self._exception_result(house_name, e) for house_name in house_names}
+    
+    async def _fetch_individually(self, house_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Consulta cada nome separadamente, em paralelo"""
+        results = await asyncio.gather(*(self._fetch_betting_house(name) for name in house_names))
+        
+        for house_name, result in zip(house_names, results):
+            self._store(house_name.lower(), result)
+        
+        return dict(zip(house_names, results))
+    
+    async def _fetch_betting_house(self, house_name: str) -> Dict[str, Any]:
+        """
+        Consulta uma casa de apostas diretamente na API
         
         Args:
             house_name: Nome da casa de apostas
@@ -46,80 +425,106 @@ class BettingHouseAPI:
             
             logger.info(f"Consultando API: {url}")
             
-            response = self.session.get(url, timeout=10)
+            response = await self._request('check_betting_house', 'GET', url)
             
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    'found': True,
-                    'data': data,
-                    'message': f"✅ Casa de apostas '{house_name}' encontrada!",
-                    'status_code': 200
-                }
-            elif response.status_code == 404:
-                return {
-                    'found': False,
-                    'data': None,
-                    'message': f"❌ Casa de apostas '{house_name}' não encontrada na base de dados.",
-                    'status_code': 404
-                }
-            else:
-                logger.warning(f"Status inesperado da API: {response.status_code}")
-                return {
-                    'found': False,
-                    'data': None,
-                    'message': f"⚠️ Erro ao consultar API para '{house_name}'. Status: {response.status_code}",
-                    'status_code': response.status_code
-                }
+            data = response.json() if response.status_code == 200 else None
+            return self.status_result(house_name, response.status_code, data)
                 
-        except requests.exceptions.Timeout:
-            logger.error(f"Timeout ao consultar API para {house_name}")
-            return {
-                'found': False,
-                'data': None,
-                'message': f"⏱️ Timeout ao consultar API para '{house_name}'",
-                'status_code': None
-            }
-        except requests.exceptions.ConnectionError:
-            logger.error(f"Erro de conexão ao consultar API para {house_name}")
+        except Exception as e:
+            return self._exception_result(house_name, e)
+    
+    @staticmethod
+    def status_result(house_name: str, status_code: int, data: Any) -> Dict[str, Any]:
+        """
+        Monta o resultado da verificação a partir do status da API
+        
+        Args:
+            house_name: Nome da casa de apostas
+            status_code: Status HTTP (200 encontrada, 404 não encontrada)
+            data: Dados da casa de apostas, quando encontrada
+            
+        Returns:
+            Dicionário com resultado da verificação
+        """
+        if status_code == 200:
             return {
-                'found': False,
-                'data': None,
-                'message': f"🚫 Erro de conexão ao consultar '{house_name}'",
-                'status_code': None
+                'found': True,
+                'data': data,
+                'message': f"✅ Casa de apostas '{house_name}' encontrada!",
+                'status_code': 200
             }
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erro na requisição para {house_name}: {e}")
+        elif status_code == 404:
             return {
                 'found': False,
                 'data': None,
-                'message': f"🚫 Erro de conexão ao consultar '{house_name}'",
-                'status_code': None
+                'message': f"❌ Casa de apostas '{house_name}' não encontrada na base de dados.",
+                'status_code': 404
             }
-        except Exception as e:
-            logger.error(f"Erro inesperado ao consultar {house_name}: {e}")
+        else:
+            logger.warning(f"Status inesperado da API: {status_code}")
             return {
                 'found': False,
                 'data': None,
-                'message': f"🚫 Erro interno ao consultar '{house_name}'",
-                'status_code': None
+                'message': f"⚠️ Erro ao consultar API para '{house_name}'. Status: {status_code}",
+                'status_code': status_code
             }
     
-    async def search_betting_houses(self, query: str) -> Dict[str, Any]:
+    @staticmethod
+    def _exception_result(house_name: str, error: Exception) -> Dict[str, Any]:
+        """
+        Monta o resultado da verificação para uma falha na requisição
+        
+        Args:
+            house_name: Nome da casa de apostas
+            error: Exceção capturada
+            
+        Returns:
+            Dicionário com resultado da verificação
+        """
+        if isinstance(error, CircuitOpenError):
+            logger.warning(f"API indisponível, consulta de {house_name} recusada: {error}")
+            message = f"⚡ API temporariamente indisponível ao consultar '{house_name}'. Tente novamente em instantes."
+        elif isinstance(error, httpx.TimeoutException):
+            logger.error(f"Timeout ao consultar API para {house_name}")
+            message = f"⏱️ Timeout ao consultar API para '{house_name}'"
+        elif isinstance(error, httpx.NetworkError):
+            logger.error(f"Erro de conexão ao consultar API para {house_name}")
+            message = f"🚫 Erro de conexão ao consultar '{house_name}'"
+        elif isinstance(error, httpx.HTTPError):
+            logger.error(f"Erro na requisição para {house_name}: {error}")
+            message = f"🚫 Erro de conexão ao consultar '{house_name}'"
+        else:
+            logger.error(f"Erro inesperado ao consultar {house_name}: {error}")
+            message = f"🚫 Erro interno ao consultar '{house_name}'"
+        
+        return {
+            'found': False,
+            'data': None,
+            'message': message,
+            'status_code': None
+        }
+    
+    async def search_betting_houses(self, query: str, limit: int = 10) -> Dict[str, Any]:
         """
         Busca casas de apostas por nome
         
         Args:
             query: Termo de busca
+            limit: Máximo de resultados, dos mais relevantes
             
         Returns:
             Dicionário com resultados da busca
         """
         try:
-            endpoint = API_ENDPOINTS['search_betting_houses'].format(query=query)
-            url = f"{self.base_url}{endpoint}"
+            url = f"{self.base_url}{API_ENDPOINTS['search_betting_houses']}"
             
-            response = self.session.get(url, timeout=10)
+            # params: o httpx codifica o termo (&, #, espaços...) na query string
+            response = await self._request(
+                'search_betting_houses',
+                'GET',
+                url,
+                params={'q': query, 'limit': limit}
+            )
             
             if response.status_code == 200:
                 data = response.json()
@@ -145,34 +550,84 @@ class BettingHouseAPI:
                 'error': str(e)
             }
     
-    async def list_all_betting_houses(self) -> Dict[str, Any]:
+    async def _list_page(
+        self,
+        cursor: Optional[str],
+        limit: int,
+        updated_since: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
-        Lista todas as casas de apostas disponíveis
+        Busca uma página da listagem de casas de apostas
         
+        Se o servidor não suporta paginação e devolve a lista completa, ela
+        é retornada como página única e as próximas listagens passam a usar
+        uma única requisição com o timeout de listagem.
+        
+        Args:
+            cursor: `next_cursor` da página anterior (None para a primeira)
+            limit: Casas por página
+            updated_since: Se informado, apenas casas alteradas após esta data (ISO 8601)
+            
         Returns:
-            Dicionário com lista de casas de apostas
+            Dicionário com a página, `next_cursor` e `total`
         """
         try:
-            endpoint = API_ENDPOINTS['list_betting_houses']
-            url = f"{self.base_url}{endpoint}"
+            params = {}
+            if updated_since:
+                params['updated_since'] = updated_since
             
-            response = self.session.get(url, timeout=15)
+            if self.pagination_supported:
+                endpoint = 'list_betting_houses_page'
+                params['limit'] = limit
+                if cursor:
+                    params['cursor'] = cursor
+            else:
+                endpoint = 'list_betting_houses'
+            url = f"{self.base_url}{API_ENDPOINTS[endpoint]}"
             
-            if response.status_code == 200:
-                data = response.json()
+            response = await self._request(endpoint, 'GET', url, params=params or None)
+            
+            if response.status_code != 200:
+                return {
+                    'success': False,
+                    'data': None,
+                    'count': 0,
+                    'error': f"Status: {response.status_code}"
+                }
+            
+            # Cada página é decodificada sozinha: memória e tempo de parsing
+            # proporcionais ao tamanho da página, não do catálogo
+            data = response.json()
+            
+            if isinstance(data, list):
+                if self.pagination_supported:
+                    logger.info("API não suporta listagem paginada; usando a lista completa")
+                    self.pagination_supported = False
                 return {
                     'success': True,
                     'data': data,
-                    'count': len(data) if isinstance(data, list) else 0
+                    'count': len(data),
+                    'next_cursor': None,
+                    'total': len(data)
                 }
-            else:
+            
+            items = data.get('items') if isinstance(data, dict) else None
+            if not isinstance(items, list):
                 return {
                     'success': False,
                     'data': None,
                     'count': 0,
-                    'error': f"Status: {response.status_code}"
+                    'error': "Resposta de listagem inválida"
                 }
-                
+            
+            return {
+                'success': True,
+                'data': items,
+                'count': len(items),
+                'next_cursor': data.get('next_cursor'),
+                'total': data.get('total', len(items))
+            }
+            
         except Exception as e:
             logger.error(f"Erro ao listar casas de apostas: {e}")
             return {
@@ -182,7 +637,262 @@ class BettingHouseAPI:
                 'error': str(e)
             }
     
-    def __del__(self):
-        """Cleanup da sessão"""
-        if hasattr(self, 'session'):
-            self.session.close()
+    async def list_betting_houses_page(self, cursor: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+        """
+        Lista uma página de casas de apostas, em ordem de nome
+        
+        Args:
+            cursor: `next_cursor` da página anterior (None para a primeira)
+            limit: Casas por página
+            
+        Returns:
+            Dicionário com a página (`data`), `next_cursor` (None na última) e `total`
+        """
+        result = await self._list_page(cursor, limit)
+        
+        if result['success'] and not self.pagination_supported:
+            # Sem paginação no servidor: o cursor é o deslocamento na lista completa
+            houses = result['data']
+            start = int(cursor) if cursor and cursor.isdigit() else 0
+            end = start + limit
+            result.update(
+                data=houses[start:end],
+                count=len(houses[start:end]),
+                next_cursor=str(end) if end < len(houses) else None
+            )
+        
+        return result
+    
+    async def list_all_betting_houses(self, updated_since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Lista todas as casas de apostas disponíveis
+        
+        A lista é buscada em páginas de `list_page_size` casas, cada uma com
+        o timeout normal de consulta.
+        
+        Args:
+            updated_since: Se informado, apenas casas alteradas após esta data (ISO 8601)
+            
+        Returns:
+            Dicionário com lista de casas de apostas
+        """
+        houses: List[Dict[str, Any]] = []
+        cursor = None
+        
+        while True:
+            result = await self._list_page(cursor, self.list_page_size, updated_since)
+            if not result['success']:
+                return result
+            
+            houses.extend(result['data'])
+            cursor = result['next_cursor']
+            if not cursor:
+                break
+        
+        return {
+            'success': True,
+            'data': houses,
+            'count': len(houses)
+        }
+    
+    async def record_clicks(self, counts: Dict[str, int]) -> bool:
+        """
+        Soma cliques aos links gerados (GeneratedLink.Clicks), em lote
+        
+        Args:
+            counts: Código curto -> cliques a somar
+            
+        Returns:
+            True se a API aceitou as contagens
+        """
+        try:
+            url = f"{self.base_url}{API_ENDPOINTS['record_clicks']}"
+            response = await self._request('record_clicks', 'POST', url, json={'clicks': counts})
+            
+            if response.status_code in (200, 204):
+                return True
+            
+            logger.warning(f"API recusou {len(counts)} contagens de cliques (status {response.status_code})")
+            return False
+            
+        except Exception as e:
+            logger.error(f"Erro ao enviar cliques: {e}")
+            return False
+    
+    async def get_affiliate_profile(self, telegram_id: str) -> Dict[str, Any]:
+        """
+        Códigos de afiliado (por casa) e UTMs do usuário vinculado ao Telegram
+        
+        Args:
+            telegram_id: Id do usuário no Telegram
+            
+        Returns:
+            Dicionário com o perfil em `data` (None se o usuário não tem perfil)
+        """
+        try:
+            endpoint = API_ENDPOINTS['get_affiliate_profile'].format(telegram_id=telegram_id)
+            url = f"{self.base_url}{endpoint}"
+            
+            response = await self._request('get_affiliate_profile', 'GET', url)
+            
+            if response.status_code == 200:
+                return {'success': True, 'data': response.json()}
+            if response.status_code == 404:
+                return {'success': True, 'data': None}
+            return {
+                'success': False,
+                'data': None,
+                'error': f"Status: {response.status_code}"
+            }
+            
+        except Exception as e:
+            logger.error(f"Erro ao consultar perfil de afiliado: {e}")
+            return {
+                'success': False,
+                'data': None,
+                'error': str(e)
+            }
+    
+    async def list_affiliate_profile_changes(self, updated_since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Perfis de afiliado alterados (códigos ou UTMs) desde uma data
+        
+        Args:
+            updated_since: Data ISO da última alteração já vista (None: todos)
+            
+        Returns:
+            Dicionário com a lista de {telegramId, updatedAt} em `data`
+        """
+        try:
+            url = f"{self.base_url}{API_ENDPOINTS['list_affiliate_profile_changes']}"
+            params = {'updated_since': updated_since} if updated_since else None
+            
+            response = await self._request('list_affiliate_profile_changes', 'GET', url, params=params)
+            
+            if response.status_code == 200:
+                return {'success': True, 'data': response.json()}
+            return {
+                'success': False,
+                'data': None,
+                'status_code': response.status_code,
+                'error': f"Status: {response.status_code}"
+            }
+            
+        except Exception as e:
+            logger.error(f"Erro ao listar perfis de afiliado alterados: {e}")
+            return {
+                'success': False,
+                'data': None,
+                'error': str(e)
+            }
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Estatísticas do cache de consultas
+        
+        Returns:
+            Contadores de acertos, falhas, despejos e consultas agrupadas
+        """
+        stats = self.cache.stats()
+        stats['coalesced'] = self.coalesced_lookups
+        stats['inflight'] = len(self._inflight)
+        if self.persistent_cache is not None:
+            stats['persistent'] = self.persistent_cache.stats()
+        return stats
+    
+    def breaker_stats(self) -> Dict[str, Any]:
+        """
+        Estado dos circuit breakers e timeouts adaptativos
+        
+        Returns:
+            Dicionário endpoint -> métricas do circuito e de latência
+        """
+        return {
+            endpoint: {
+                **breaker.stats(),
+                'latency': self.timeouts[endpoint].stats()
+            }
+            for endpoint, breaker in self.breakers.items()
+        }
+    
+    def register_metrics(self, registry: MetricsRegistry = REGISTRY) -> None:
+        """
+        Expõe o estado dos circuit breakers e dos timeouts adaptativos
+        
+        As métricas são lidas de `breaker_stats()` a cada coleta, com o
+        endpoint como label.
+        
+        Args:
+            registry: Registro de métricas
+        """
+        registry.callback(
+            'betting_api_circuit_state',
+            'Estado do circuito por endpoint (0 fechado, 1 meio-aberto, 2 aberto)',
+            lambda: {
+                (endpoint,): CIRCUIT_STATE_VALUES[stats['state']]
+                for endpoint, stats in self.breaker_stats().items()
+            },
+            labelnames=('endpoint',)
+        )
+        registry.callback(
+            'betting_api_circuit_consecutive_failures',
+            'Falhas seguidas por endpoint (o circuito abre no limite configurado)',
+            lambda: {
+                (endpoint,): stats['consecutive_failures']
+                for endpoint, stats in self.breaker_stats().items()
+            },
+            labelnames=('endpoint',)
+        )
+        registry.callback(
+            'betting_api_circuit_events_total',
+            'Falhas, chamadas recusadas e aberturas do circuito por endpoint',
+            lambda: {
+                (endpoint, event): stats[key]
+                for endpoint, stats in self.breaker_stats().items()
+                for event, key in (
+                    ('failure', 'failures'),
+                    ('rejected', 'rejected'),
+                    ('opened', 'times_opened')
+                )
+            },
+            labelnames=('endpoint', 'event'),
+            type_name='counter'
+        )
+        registry.callback(
+            'betting_api_timeout_seconds',
+            'Timeout adaptativo em uso por endpoint',
+            lambda: {
+                (endpoint,): timeout.timeout
+                for endpoint, timeout in self.timeouts.items()
+            },
+            labelnames=('endpoint',)
+        )
+        registry.callback(
+            'betting_api_latency_quantile_seconds',
+            'Percentis de latência da janela usada no timeout adaptativo',
+            lambda: {
+                (endpoint, quantile): stats['latency'][key]
+                for endpoint, stats in self.breaker_stats().items()
+                for quantile, key in (('0.5', 'p50'), ('0.9', 'p90'), ('0.99', 'p99'))
+            },
+            labelnames=('endpoint', 'quantile')
+        )
+    
+    def rate_limit_stats(self) -> Optional[Dict[str, Any]]:
+        """Contadores do limite global de requisições, ou None se desativado"""
+        return self.rate_limiter.stats() if self.rate_limiter is not None else None
+    
+    async def close(self) -> None:
+        """Fecha o pool de conexões do cliente HTTP e grava o cache em disco"""
+        if not self.client.is_closed:
+            await self.client.aclose()
+        
+        if self.persistent_cache is not None:
+            await self.persistent_cache.close()
+            self.persistent_cache = None
+    
+    async def __aenter__(self) -> 'BettingHouseAPI':
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
@@ -0,0 +1,346 @@
+"""
+Benchmark da extração de domínios e do processamento completo de mensagens
+
+Uso:
+    python benchmark.py                          # extração + pipeline contra a API do .env
+    python benchmark.py --skip-pipeline          # apenas DomainExtractor
+    python benchmark.py --output atual.json      # grava os resultados
+    python benchmark.py --compare base.json      # compara com uma execução anterior
+
+O pipeline usa `handle_message` de verdade contra a API configurada
+(normalmente `mock_api.py`), com o envio ao Telegram substituído por um stub.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import string
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from domain_extractor import DomainExtractor
+
+CORPUS_KINDS = ('short', 'forwarded', 'url_dump', 'noise')
+
+# Casas conhecidas pelo extrator e pela API de teste, mais nomes inexistentes
+KNOWN_NAMES = sorted(DomainExtractor.known_betting_houses)
+UNKNOWN_NAMES = ['megabet', 'apostafacil', 'sortebet', 'golbet', 'vaidebet', 'lucrobet', 'betmais']
+TLDS = ['.com', '.com.br', '.net', '.bet.br', '.co.uk', '.io', '.bet']
+
+FILLER_WORDS = (
+    'hoje tem jogo do time odd boa para apostar no primeiro tempo quem vai '
+    'ganhar olha essa promoção bônus de boas vindas cadastro rápido saque '
+    'via pix confiável vale a pena alguém já usou grupo tips ao vivo'
+).split()
+
+NOISE_TOKENS = [
+    '🔥', '⚽', '💰', '🚀', '✅', '👉', 'ação', 'coração', 'último', 'Ωmega',
+    'b\u0435t365',  # "е" cirílico
+    'zero\u200bwidth', '1.5', '2,75', 'R$50', 'user@mail.com', '#tips', '@canal',
+    '...', '-->', '((odd))', 'ñandú', '中文', 'عربي'
+]
+
+def _domain(rng: random.Random) -> str:
+    """Um domínio de casa conhecida (70%) ou desconhecida"""
+    names = KNOWN_NAMES if rng.random() < 0.7 else UNKNOWN_NAMES
+    return rng.choice(names) + rng.choice(TLDS)
+
+def _url(rng: random.Random) -> str:
+    """Uma URL completa com caminho e parâmetros"""
+    scheme = rng.choice(['https://', 'http://', 'https://www.', 'www.'])
+    path = '/'.join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(0, 3)))
+    query = f"?ref={''.join(rng.choices(string.ascii_lowercase, k=6))}" if rng.random() < 0.5 else ''
+    return f"{scheme}{_domain(rng)}/{path}{query}"
+
+def _words(rng: random.Random, count: int) -> List[str]:
+    """Palavras comuns de mensagens de grupos de apostas"""
+    return [rng.choice(FILLER_WORDS) for _ in range(count)]
+
+def generate_message(kind: str, rng: random.Random) -> str:
+    """
+    Gera uma mensagem sintética
+    
+    Args:
+        kind: Tipo de mensagem (short, forwarded, url_dump ou noise)
+        rng: Gerador aleatório
+    
+    Returns:
+        Texto da mensagem
+    """
+    if kind == 'short':
+        parts = _words(rng, rng.randint(0, 4))
+        parts.insert(rng.randint(0, len(parts)), rng.choice([_domain(rng), _url(rng), rng.choice(KNOWN_NAMES)]))
+        return ' '.join(parts)
+    
+    if kind == 'forwarded':
+        # Post longo encaminhado de canal, com poucos links no meio do texto
+        lines = []
+        for _ in range(rng.randint(10, 30)):
+            words = _words(rng, rng.randint(6, 16))
+            if rng.random() < 0.2:
+                words.insert(rng.randint(0, len(words)), _url(rng))
+            lines.append(' '.join(words))
+        return '\n'.join(lines)
+    
+    if kind == 'url_dump':
+        links = [rng.choice([_url(rng), _domain(rng)]) for _ in range(rng.randint(15, 60))]
+        return rng.choice(['\n', ' ', ', ']).join(links)
+    
+    if kind == 'noise':
+        tokens = [rng.choice(NOISE_TOKENS + FILLER_WORDS) for _ in range(rng.randint(10, 40))]
+        if rng.random() < 0.5:
+            tokens.insert(rng.randint(0, len(tokens)), _domain(rng))
+        return ' '.join(tokens)
+    
+    raise ValueError(f"Tipo de mensagem desconhecido: {kind}")
+
+def generate_corpus(count: int, seed: int = 42) -> Dict[str, List[str]]:
+    """
+    Gera o corpus de cada tipo de mensagem, reprodutível pela semente
+    
+    Args:
+        count: Mensagens por tipo
+        seed: Semente do gerador
+    
+    Returns:
+        Dicionário tipo -> mensagens
+    """
+    rng = random.Random(seed)
+    return {kind: [generate_message(kind, rng) for _ in range(count)] for kind in CORPUS_KINDS}
+
+def percentile(samples: List[float], q: float) -> float:
+    """Percentil q (0 a 1) das amostras"""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, Any]:
+    """
+    Resume as latências de uma rodada
+    
+    Args:
+        latencies: Latência de cada mensagem, em segundos
+        elapsed: Tempo total da rodada, em segundos
+    
+    Returns:
+        Vazão e percentis em milissegundos
+    """
+    return {
+        'messages': len(latencies),
+        'seconds': round(elapsed, 4),
+        'msgs_per_sec': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'max_ms': round(max(latencies) * 1000, 4)
+    }
+
+def bench_extractor(extractor: DomainExtractor, messages: List[str], repeat: int) -> Dict[str, Any]:
+    """Mede DomainExtractor.find_domains_in_message"""
+    # Aquecimento: caches de TLD e de bytecode fora da medição
+    for message in messages:
+        extractor.find_domains_in_message(message)
+    
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for message in messages:
+            t0 = time.perf_counter()
+            extractor.find_domains_in_message(message)
+            latencies.append(time.perf_counter() - t0)
+    return summarize(latencies, time.perf_counter() - started)
+
+class _StubMessage:
+    """Mensagem do Telegram com envio substituído por um stub sem rede"""
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.replies = 0
+    
+    async def reply_text(self, text: str, **kwargs) -> SimpleNamespace:
+        self.replies += 1
+        return SimpleNamespace(text=text, edit_text=self._edit_text, delete=self._delete)
+    
+    async def _edit_text(self, text: str, **kwargs) -> bool:
+        return True
+    
+    async def _delete(self) -> bool:
+        return True
+
+def _stub_update(text: str, chat_id: int) -> SimpleNamespace:
+    """Update mínimo aceito por handle_message"""
+    return SimpleNamespace(
+        message=_StubMessage(text),
+        effective_user=SimpleNamespace(id=chat_id, username=f'bench{chat_id}'),
+        effective_chat=SimpleNamespace(id=chat_id)
+    )
+
+async def bench_pipeline(messages: List[str], repeat: int, concurrency: int, cold: bool = False) -> Dict[str, Any]:
+    """
+    Mede TelegramBetBot.handle_message contra a API configurada
+    
+    Args:
+        messages: Corpus de mensagens
+        repeat: Repetições do corpus
+        concurrency: Mensagens processadas ao mesmo tempo
+        cold: Se True, esvazia o cache de consultas antes de cada repetição
+    
+    Returns:
+        Resumo da rodada com os contadores do cache
+    """
+    # Sem limites de taxa nem servidor de métricas durante a medição
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', '0:benchmark')
+    os.environ['CHAT_RATE_LIMIT'] = '0'
+    os.environ['API_RATE_LIMIT'] = '0'
+    os.environ['METRICS_PORT'] = '0'
+    # Repetições do corpus mediriam a deduplicação, não o pipeline
+    os.environ['DEDUP_WINDOW'] = '0'
+    
+    from bot import TelegramBetBot
+    
+    logging.getLogger().setLevel(logging.WARNING)
+    bot = TelegramBetBot()
+    await bot.api_client.warm_up()
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def handle(index: int, text: str) -> None:
+        async with semaphore:
+            t0 = time.perf_counter()
+            await bot.handle_message(_stub_update(text, index % 1000), None)
+            latencies.append(time.perf_counter() - t0)
+    
+    try:
+        # Primeira passada aquece conexões e cache, como em produção
+        await asyncio.gather(*(handle(i, text) for i, text in enumerate(messages)))
+        latencies.clear()
+        
+        started = time.perf_counter()
+        for _ in range(repeat):
+            if cold:
+                bot.api_client.cache.clear()
+            await asyncio.gather(*(handle(i, text) for i, text in enumerate(messages)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await bot.api_client.close()
+    
+    result = summarize(latencies, elapsed)
+    result['cache'] = {key: bot.api_client.cache_stats()[key] for key in ('hits', 'misses', 'hit_ratio')}
+    return result
+
+def _git_revision() -> Optional[str]:
+    """Commit atual, para identificar a execução"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> bool:
+    """
+    Imprime a comparação com uma execução anterior
+    
+    Args:
+        current: Resultados atuais
+        baseline: Resultados de referência
+        threshold: Piora relativa tolerada (0.1 = 10%)
+    
+    Returns:
+        True se nenhuma medida piorou além do limite
+    """
+    ok = True
+    print(f"\n📊 Comparação com {baseline['meta'].get('revision') or 'referência'} (limite {threshold:.0%})")
+    print(f"{'caso':<22}{'métrica':<14}{'antes':>12}{'agora':>12}{'variação':>11}")
+    
+    for name, result in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        for metric, higher_is_better in (('msgs_per_sec', True), ('p50_ms', False), ('p99_ms', False)):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = ' ⚠️'
+                ok = False
+            print(f"{name:<22}{metric:<14}{old:>12}{new:>12}{change:>+10.1%}{flag}")
+    return ok
+
+def main() -> int:
+    """Executa o benchmark e devolve o código de saída (1 se houve piora)"""
+    parser = argparse.ArgumentParser(description='Benchmark do DomainExtractor e do pipeline de mensagens')
+    parser.add_argument('--count', type=int, default=200, help='mensagens por tipo de corpus')
+    parser.add_argument('--repeat', type=int, default=5, help='repetições de cada corpus')
+    parser.add_argument('--seed', type=int, default=42, help='semente do corpus')
+    parser.add_argument('--concurrency', type=int, default=20, help='mensagens simultâneas no pipeline')
+    parser.add_argument('--cold', action='store_true', help='esvaziar o cache de consultas a cada repetição')
+    parser.add_argument('--skip-pipeline', action='store_true', help='medir apenas a extração')
+    parser.add_argument('--output', help='arquivo JSON para gravar os resultados')
+    parser.add_argument('--compare', help='arquivo JSON de uma execução anterior')
+    parser.add_argument('--threshold', type=float, default=0.10, help='piora tolerada na comparação')
+    args = parser.parse_args()
+    
+    load_dotenv()
+    
+    corpus = generate_corpus(args.count, args.seed)
+    results: Dict[str, Any] = {}
+    
+    extractor = DomainExtractor()
+    for kind, messages in corpus.items():
+        results[f'extractor/{kind}'] = bench_extractor(extractor, messages, args.repeat)
+        print(f"🎯 extractor/{kind:<10} {results[f'extractor/{kind}']}")
+    
+    if not args.skip_pipeline:
+        if not os.getenv('API_BASE_URL'):
+            os.environ['API_BASE_URL'] = 'http://localhost:5000'
+        print(f"🌐 Pipeline contra {os.environ['API_BASE_URL']}")
+        for kind, messages in corpus.items():
+            result = asyncio.run(bench_pipeline(messages, args.repeat, args.concurrency, args.cold))
+            results[f'pipeline/{kind}'] = result
+            print(f"🤖 pipeline/{kind:<11} {result}")
+    
+    report = {
+        'meta': {
+            'revision': _git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'count': args.count,
+            'repeat': args.repeat,
+            'seed': args.seed,
+            'concurrency': args.concurrency,
+            'cold': args.cold
+        },
+        'results': results
+    }
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados gravados em {args.output}")
+    
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.threshold):
+            print("\n❌ Desempenho piorou além do limite")
+            return 1
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
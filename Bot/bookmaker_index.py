@@ -0,0 +1,334 @@
+"""
+Índice local de casas de apostas replicado da API, com sincronização em segundo plano
+"""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from search_index import SearchIndex
+
+logger = logging.getLogger(__name__)
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+
+def normalize_key(value: str) -> str:
+    """
+    Normaliza um nome, domínio ou alias para chave do índice
+    
+    Args:
+        value: Texto a normalizar
+    
+    Returns:
+        Texto em minúsculas, apenas com letras e números
+    """
+    return _NON_ALNUM_RE.sub('', str(value).lower())
+
+class BookmakerIndex:
+    """Cópia em memória da lista de casas de apostas, indexada por nome, domínio e alias"""
+    
+    def __init__(
+        self,
+        api_client,
+        domain_extractor=None,
+        sync_interval: float = 300.0,
+        full_sync_every: int = 12,
+        stale_after: float = 900.0
+    ):
+        self.api_client = api_client
+        self.domain_extractor = domain_extractor
+        self.sync_interval = sync_interval
+        self.full_sync_every = max(1, full_sync_every)
+        self.stale_after = stale_after
+        
+        # id -> registro da casa de apostas
+        self._records: Dict[str, Dict[str, Any]] = {}
+        # chave normalizada -> ids que a usam (o primeiro responde às buscas)
+        self._keys: Dict[str, List[str]] = {}
+        # id -> chaves do registro, para atualizar o mapa acima por registro
+        self._record_key_lists: Dict[str, List[str]] = {}
+        # busca por prefixo/substring de nome, domínio e país (/search)
+        self._search = SearchIndex()
+        
+        self._watermark: Optional[str] = None
+        self._syncs_since_full = 0
+        self._task: Optional[asyncio.Task] = None
+        
+        self.loaded = False
+        # Se o aviso de índice desatualizado já foi registrado
+        self._stale_reported = False
+        self.last_sync: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.sync_count = 0
+        self.sync_failures = 0
+    
+    @staticmethod
+    def _record_id(record: Dict[str, Any]) -> str:
+        """Identificador estável do registro (id da API ou nome normalizado)"""
+        record_id = record.get('id') or record.get('Id')
+        return str(record_id) if record_id else normalize_key(record.get('name', ''))
+    
+    @staticmethod
+    def _updated_at(record: Dict[str, Any]) -> Optional[str]:
+        """Data de atualização do registro (UpdatedAt da API)"""
+        return record.get('updatedAt') or record.get('UpdatedAt')
+    
+    def _record_keys(self, record: Dict[str, Any]) -> List[str]:
+        """
+        Chaves pelas quais um registro pode ser encontrado
+        
+        Args:
+            record: Registro da casa de apostas
+        
+        Returns:
+            Lista de chaves normalizadas
+        """
+        keys = [record.get('name', '')]
+        keys.extend(record.get('aliases') or [])
+        
+        domain = record.get('domain') or record.get('website')
+        if domain:
+            keys.append(domain)
+            if self.domain_extractor:
+                keys.append(self.domain_extractor.extract_domain_name(domain) or '')
+        
+        return [key for key in (normalize_key(k) for k in keys) if key]
+    
+    def _index_keys(self, record_id: str, record: Dict[str, Any]) -> None:
+        """
+        Atualiza as chaves de um registro no mapa de chaves
+        
+        Chaves que o registro já tinha mantêm sua posição; com outro
+        registro usando a mesma chave, vale o que a cadastrou primeiro.
+        
+        Args:
+            record_id: Identificador do registro
+            record: Registro novo ou alterado
+        """
+        old_keys = self._record_key_lists.pop(record_id, [])
+        new_keys = list(dict.fromkeys(self._record_keys(record)))
+        
+        kept = set(new_keys)
+        for key in old_keys:
+            if key not in kept:
+                owners = self._keys[key]
+                owners.remove(record_id)
+                if not owners:
+                    del self._keys[key]
+        
+        previous = set(old_keys)
+        for key in new_keys:
+            if key not in previous:
+                self._keys.setdefault(key, []).append(record_id)
+        
+        if new_keys:
+            self._record_key_lists[record_id] = new_keys
+    
+    def _apply(self, records: Iterable[Dict[str, Any]], full: bool) -> int:
+        """
+        Aplica registros recebidos da API ao índice
+        
+        Args:
+            records: Registros de casas de apostas
+            full: Se True, substitui todo o conteúdo do índice
+        
+        Returns:
+            Quantidade de registros aplicados
+        """
+        incoming = {
+            self._record_id(record): record
+            for record in records
+            if isinstance(record, dict)
+        }
+        
+        dates = [date for date in map(self._updated_at, incoming.values()) if date]
+        
+        if full:
+            self._records = incoming
+            self._search.build(incoming.items())
+            self._keys = {}
+            self._record_key_lists = {}
+            for record_id, record in incoming.items():
+                self._index_keys(record_id, record)
+            # Casas excluídas só somem numa carga completa: recalcular tudo
+            self._watermark = max(dates) if dates else None
+            
+            if self.domain_extractor:
+                self.domain_extractor.update_known_houses(
+                    (record.get('name', '') for record in incoming.values()),
+                    replace=True
+                )
+        else:
+            for record_id, record in incoming.items():
+                self._records[record_id] = record
+                self._search.upsert(record_id, record)
+                self._index_keys(record_id, record)
+            # Marca d'água como máximo corrente: só os registros recebidos contam
+            if self._watermark:
+                dates.append(self._watermark)
+            if dates:
+                self._watermark = max(dates)
+            
+            # Só reconstrói o autômato se algum nome for novo
+            if incoming and self.domain_extractor:
+                self.domain_extractor.update_known_houses(
+                    record.get('name', '') for record in incoming.values()
+                )
+        
+        return len(incoming)
+    
+    async def sync(self, full: bool = False) -> bool:
+        """
+        Sincroniza o índice com a API
+        
+        Sem watermark ou a cada `full_sync_every` sincronizações é feita uma
+        carga completa (que também remove casas excluídas); nas demais, apenas
+        as casas alteradas desde o último UpdatedAt conhecido.
+        
+        Args:
+            full: Força uma carga completa
+        
+        Returns:
+            True se a sincronização foi bem-sucedida
+        """
+        full = full or not self.loaded or not self._watermark or self._syncs_since_full >= self.full_sync_every
+        updated_since = None if full else self._watermark
+        
+        result = await self.api_client.list_all_betting_houses(updated_since=updated_since)
+        
+        if not result['success'] or not isinstance(result['data'], list):
+            self.sync_failures += 1
+            self.last_error = result.get('error')
+            
+            if self.loaded:
+                age = time.monotonic() - self.last_sync
+                logger.warning(
+                    f"Falha ao sincronizar índice de casas de apostas ({self.last_error}); "
+                    f"servindo dados de {age:.0f}s atrás"
+                )
+                self._check_stale()
+            else:
+                logger.warning(f"Falha ao carregar índice de casas de apostas: {self.last_error}")
+            return False
+        
+        applied = self._apply(result['data'], full)
+        
+        self._syncs_since_full = 0 if full else self._syncs_since_full + 1
+        self.loaded = True
+        self.last_sync = time.monotonic()
+        self.last_error = None
+        self.sync_count += 1
+        if self._stale_reported:
+            self._stale_reported = False
+            logger.info("Índice de casas de apostas atualizado novamente")
+        
+        logger.info(
+            f"Índice de casas de apostas sincronizado ({'completo' if full else 'incremental'}): "
+            f"{applied} registros aplicados, {len(self._records)} no total"
+        )
+        return True
+    
+    async def start(self) -> None:
+        """Carrega o índice e inicia a sincronização periódica"""
+        await self.sync(full=True)
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+    
+    async def stop(self) -> None:
+        """Interrompe a sincronização periódica"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _sync_loop(self) -> None:
+        """Sincroniza o índice a cada `sync_interval` segundos"""
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as e:
+                self.sync_failures += 1
+                logger.error(f"Erro na sincronização do índice de casas de apostas: {e}")
+    
+    def _check_stale(self) -> bool:
+        """Calcula se o índice está desatualizado, avisando uma vez por período"""
+        stale = self.last_sync is None or time.monotonic() - self.last_sync > self.stale_after
+        if stale and self.loaded and not self._stale_reported:
+            self._stale_reported = True
+            logger.warning(
+                f"Índice de casas de apostas desatualizado (última sincronização há "
+                f"{time.monotonic() - self.last_sync:.0f}s); respondendo com dados locais"
+            )
+        return stale
+    
+    @property
+    def is_stale(self) -> bool:
+        """Se a última sincronização bem-sucedida é mais antiga que `stale_after`"""
+        return self._check_stale()
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Busca uma casa de apostas por nome, domínio ou alias
+        
+        Args:
+            name: Nome, domínio ou alias
+        
+        Returns:
+            Registro da casa de apostas ou None
+        """
+        owners = self._keys.get(normalize_key(name))
+        return self._records.get(owners[0]) if owners else None
+    
+    def check_betting_house(self, house_name: str) -> Dict[str, Any]:
+        """
+        Verifica uma casa de apostas usando apenas a memória
+        
+        Args:
+            house_name: Nome da casa de apostas
+        
+        Returns:
+            Dicionário no mesmo formato de BettingHouseAPI.check_betting_house
+        """
+        record = self.get(house_name)
+        return self.api_client.status_result(house_name, 200 if record else 404, record)
+    
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Busca casas de apostas por termo usando apenas a memória
+        
+        Args:
+            query: Termo de busca (prefixo ou parte do nome, domínio ou país)
+            limit: Máximo de resultados
+        
+        Returns:
+            Registros ordenados por relevância
+        """
+        return self._search.search(query, limit)
+    
+    def names(self) -> List[str]:
+        """Nomes de todas as casas de apostas do índice"""
+        return [record.get('name', '') for record in self._records.values()]
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Estado da réplica local"""
+        return {
+            'loaded': self.loaded,
+            'records': len(self._records),
+            'keys': len(self._keys),
+            'search': self._search.stats(),
+            'stale': self.is_stale,
+            'last_sync_age': time.monotonic() - self.last_sync if self.last_sync else None,
+            'watermark': self._watermark,
+            'syncs': self.sync_count,
+            'sync_failures': self.sync_failures,
+            'last_error': self.last_error
+        }
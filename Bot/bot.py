@@ -4,15 +4,31 @@ Bot do Telegram para verificar casas de apostas - Versão Modular
 
 import asyncio
 import logging
+import math
 import os
-from typing import List, Dict, Any
+import secrets
+import signal
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, ContextTypes, filters
+from telegram.request import BaseRequest
 
 from config import BotConfig, BOT_MESSAGES
 from api_client import BettingHouseAPI
+from persistent_cache import PersistentCache
+from webhook_server import WebhookServer
+from update_processor import ChatOrderedUpdateProcessor
+from rate_limiter import KeyedRateLimiter, TelegramRateLimiter
+from cache import TTLCache
+from message_dedup import MessageDeduplicator
+from affiliate_links import AffiliateLinks
+from link_store import LinkStore
+from short_code import create_generator
+from metrics import REGISTRY, MetricsServer
+from progressive_message import ProgressiveMessage
 from domain_extractor import DomainExtractor
+from bookmaker_index import BookmakerIndex
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -24,6 +40,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+STAGE_LATENCY = REGISTRY.histogram(
+    'bot_stage_duration_seconds',
+    'Duração de cada etapa do processamento de mensagens',
+    ('stage',)
+)
+MESSAGES = REGISTRY.counter(
+    'bot_messages_total',
+    'Mensagens de texto processadas, por desfecho',
+    ('outcome',)
+)
+PROGRESS_EDITS = REGISTRY.counter(
+    'bot_progress_edits_total',
+    'Edições de mensagens provisórias com resultados parciais e finais'
+)
+DOMAINS_PER_MESSAGE = REGISTRY.histogram(
+    'bot_domains_per_message',
+    'Domínios encontrados por mensagem',
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50)
+)
+
+# Tempo (s) em que os botões de navegação do /list continuam válidos
+LIST_PAGE_TTL = 3600
+
+# Chats com resposta adiada pelo limite de consultas ao mesmo tempo
+MAX_DEFERRED_CHATS = 4096
+
 class TelegramBetBot:
     """Bot do Telegram para verificação de casas de apostas"""
     
@@ -32,11 +74,126 @@ class TelegramBetBot:
         self.config = BotConfig.from_env()
         
         # Inicializar componentes
+        persistent_cache = None
+        if self.config.persistent_cache_path:
+            persistent_cache = PersistentCache(
+                path=self.config.persistent_cache_path,
+                max_entries=self.config.persistent_cache_max_entries,
+                flush_interval=self.config.persistent_cache_flush_interval
+            )
+        
         self.api_client = BettingHouseAPI(
             base_url=self.config.api_base_url,
-            api_key=self.config.api_key
+            api_key=self.config.api_key,
+            timeout=self.config.api_timeout,
+            list_timeout=self.config.api_list_timeout,
+            connect_timeout=self.config.api_connect_timeout,
+            max_connections=self.config.api_max_connections,
+            max_keepalive_connections=self.config.api_max_keepalive_connections,
+            keepalive_expiry=self.config.api_keepalive_expiry,
+            cache_max_size=self.config.cache_max_size,
+            cache_ttl=self.config.cache_ttl,
+            cache_negative_ttl=self.config.cache_negative_ttl,
+            batch_size=self.config.api_batch_size,
+            list_page_size=self.config.api_list_page_size,
+            persistent_cache=persistent_cache,
+            breaker_failure_threshold=self.config.breaker_failure_threshold,
+            breaker_reset_timeout=self.config.breaker_reset_timeout,
+            adaptive_timeout_min=self.config.adaptive_timeout_min,
+            adaptive_timeout_multiplier=self.config.adaptive_timeout_multiplier,
+            rate_limit=self.config.api_rate_limit,
+            rate_burst=self.config.api_rate_burst
+        )
+        self.domain_extractor = DomainExtractor(
+            suffix_list_file=self.config.tld_suffix_list_file,
+            tld_cache_size=self.config.tld_cache_size,
+            fuzzy_max_distance=self.config.fuzzy_max_distance
+        )
+        
+        # Réplica local opcional da lista de casas de apostas
+        self.bookmaker_index = None
+        if self.config.bookmaker_index_enabled:
+            self.bookmaker_index = BookmakerIndex(
+                api_client=self.api_client,
+                domain_extractor=self.domain_extractor,
+                sync_interval=self.config.bookmaker_sync_interval,
+                full_sync_every=self.config.bookmaker_full_sync_every,
+                stale_after=self.config.bookmaker_stale_after
+            )
+        
+        # Limite global de consultas simultâneas à API
+        self._lookup_semaphore = asyncio.Semaphore(self.config.max_concurrent_lookups)
+        
+        # Updates de chats diferentes em paralelo, do mesmo chat em ordem
+        self.update_processor = ChatOrderedUpdateProcessor(
+            workers=self.config.update_workers,
+            max_pending=self.config.max_pending_updates,
+            # No polling nada limita as tarefas criadas por update: descartar o excesso
+            shed=self.config.bot_mode != 'webhook'
         )
-        self.domain_extractor = DomainExtractor()
+        
+        # Limite de consultas por chat e por usuário (0 desativa)
+        self.lookup_limiter = None
+        if self.config.chat_rate_limit > 0:
+            self.lookup_limiter = KeyedRateLimiter(
+                rate=self.config.chat_rate_limit / 60,
+                capacity=self.config.chat_rate_burst
+            )
+        # Respostas adiadas por chat acima do limite: update da primeira
+        # mensagem recusada, domínios juntados e a tarefa que responde
+        self._deferred_lookups: Dict[int, Dict[str, Any]] = {}
+        
+        # Respostas reaproveitadas para mensagens repetidas (0 desativa)
+        self.dedup = None
+        if self.config.dedup_window > 0:
+            self.dedup = MessageDeduplicator(
+                window=self.config.dedup_window,
+                max_entries=self.config.dedup_max_entries,
+                suppress=self.config.dedup_suppress
+            )
+        
+        # Links de afiliado de cada usuário nas respostas, encurtados quando
+        # há um servidor de redirecionamento configurado
+        self.affiliate_links = None
+        if self.config.affiliate_links_enabled:
+            link_store = None
+            code_generator = None
+            if self.config.short_link_base_url:
+                link_store = LinkStore(self.config.links_db)
+                code_generator = create_generator(
+                    self.config.short_code_strategy,
+                    path=self.config.links_db,
+                    block_size=self.config.short_code_block_size,
+                    length=self.config.short_code_length,
+                    node_id=self.config.short_code_node_id
+                )
+            self.affiliate_links = AffiliateLinks(
+                api_client=self.api_client,
+                profile_ttl=self.config.affiliate_profile_ttl,
+                sync_interval=self.config.affiliate_sync_interval,
+                code_param=self.config.affiliate_code_param,
+                link_store=link_store,
+                code_generator=code_generator,
+                short_link_base_url=self.config.short_link_base_url
+            )
+        
+        # Páginas do /list navegáveis pelos botões: token -> cursor da página
+        self._list_pages = TTLCache(max_size=4096)
+        
+        # Limites de envio do Telegram
+        self.send_limiter = TelegramRateLimiter(
+            global_rate=self.config.telegram_global_send_rate,
+            chat_rate=self.config.telegram_chat_send_rate,
+            group_rate=self.config.telegram_group_send_rate / 60
+        )
+        
+        self.metrics_server = None
+        if self.config.metrics_port:
+            self.metrics_server = MetricsServer(
+                listen=self.config.metrics_listen,
+                port=self.config.metrics_port
+            )
+        self._register_metrics()
         
         logger.info("Bot inicializado com sucesso")
     
@@ -115,37 +272,88 @@ class TelegramBetBot:
             await update.message.reply_text("🚫 Erro ao obter informações da conta.")
     
     async def list_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Comando /list - lista casas de apostas disponíveis"""
+        """Comando /list - lista casas de apostas disponíveis, uma página por vez"""
         try:
-            processing_msg = await update.message.reply_text("🔍 Buscando casas de apostas disponíveis...")
+            page = {'cursor': None, 'number': 1, 'previous': None}
+            # Só a primeira página é buscada; as demais, sob demanda pelos botões
+            result = await self.api_client.list_betting_houses_page(limit=self.config.list_page_size)
             
-            result = await self.api_client.list_all_betting_houses()
+            response, keyboard = self._render_list_page(result, page)
+            await update.message.reply_text(response, parse_mode='Markdown', reply_markup=keyboard)
             
-            await processing_msg.delete()
+        except Exception as e:
+            logger.error(f"Erro no comando /list: {e}")
+            await update.message.reply_text("🚫 Erro ao buscar lista de casas de apostas.")
+    
+    async def list_page_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Botões de navegação do /list - troca a página na própria mensagem"""
+        query = update.callback_query
+        try:
+            page = self._list_pages.get(query.data.split(':', 1)[1])
+            if page is None:
+                await query.answer("⌛ Esta lista expirou. Use /list novamente.", show_alert=True)
+                return
+            await query.answer()
             
-            if result['success'] and result['data']:
-                houses = result['data']
-                if isinstance(houses, list) and len(houses) > 0:
-                    # Limitar a 20 primeiras para não sobrecarregar
-                    limited_houses = houses[:20]
-                    house_names = [house.get('name', 'N/A') if isinstance(house, dict) else str(house) 
-                                 for house in limited_houses]
-                    
-                    response = f"📋 *Casas de Apostas Disponíveis* ({len(houses)} total):\n\n"
-                    response += "\n".join([f"• {name}" for name in house_names])
-                    
-                    if len(houses) > 20:
-                        response += f"\n\n... e mais {len(houses) - 20} casas de apostas."
-                else:
-                    response = "📋 Nenhuma casa de apostas encontrada na base de dados."
-            else:
-                response = "❌ Erro ao buscar lista de casas de apostas."
+            result = await self.api_client.list_betting_houses_page(
+                cursor=page['cursor'],
+                limit=self.config.list_page_size
+            )
             
-            await update.message.reply_text(response, parse_mode='Markdown')
+            response, keyboard = self._render_list_page(result, page)
+            await query.edit_message_text(response, parse_mode='Markdown', reply_markup=keyboard)
             
         except Exception as e:
-            logger.error(f"Erro no comando /list: {e}")
-            await update.message.reply_text("🚫 Erro ao buscar lista de casas de apostas.")
+            logger.error(f"Erro na navegação do /list: {e}")
+    
+    def _render_list_page(
+        self,
+        result: Dict[str, Any],
+        page: Dict[str, Any]
+    ) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+        """
+        Monta o texto e os botões de uma página do /list
+        
+        Args:
+            result: Resultado de list_betting_houses_page
+            page: Página exibida (cursor, número, token próprio e da página anterior)
+            
+        Returns:
+            Tupla (texto, teclado com "anterior"/"próxima" ou None)
+        """
+        if not result['success']:
+            return "❌ Erro ao buscar lista de casas de apostas.", None
+        
+        houses = result['data']
+        if not houses:
+            return "📋 Nenhuma casa de apostas encontrada na base de dados.", None
+        
+        house_names = [house.get('name', 'N/A') if isinstance(house, dict) else str(house) for house in houses]
+        total = result.get('total') or len(houses)
+        pages = max(1, math.ceil(total / self.config.list_page_size))
+        
+        response = f"📋 *Casas de Apostas Disponíveis* ({total} total) - página {page['number']}/{pages}:\n\n"
+        response += "\n".join([f"• {name}" for name in house_names])
+        
+        # Cada página navegável ganha um token curto (callback_data tem até 64 bytes)
+        buttons = []
+        if page['previous']:
+            buttons.append(InlineKeyboardButton("◀️ Anterior", callback_data=f"list:{page['previous']}"))
+        if result.get('next_cursor'):
+            current = page.setdefault('token', secrets.token_urlsafe(6))
+            self._list_pages.set(current, page, ttl=LIST_PAGE_TTL)
+            
+            following = secrets.token_urlsafe(6)
+            next_page = {
+                'cursor': result['next_cursor'],
+                'number': page['number'] + 1,
+                'previous': current,
+                'token': following
+            }
+            self._list_pages.set(following, next_page, ttl=LIST_PAGE_TTL)
+            buttons.append(InlineKeyboardButton("Próxima ▶️", callback_data=f"list:{following}"))
+        
+        return response, InlineKeyboardMarkup([buttons]) if buttons else None
     
     async def search_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Comando /search - busca casas de apostas por termo"""
@@ -160,11 +368,14 @@ class TelegramBetBot:
                 )
                 return
             
-            processing_msg = await update.message.reply_text(f"🔍 Buscando por '{query}'...")
-            
-            result = await self.api_client.search_betting_houses(query)
-            
-            await processing_msg.delete()
+            processing_msg = None
+            if self._answers_from_memory():
+                # Índice local: sem ida à API nem mensagem de progresso
+                houses = self.bookmaker_index.search(query, limit=10)
+                result = {'success': True, 'data': houses, 'count': len(houses)}
+            else:
+                processing_msg = await update.message.reply_text(f"🔍 Buscando por '{query}'...")
+                result = await self.api_client.search_betting_houses(query, limit=10)
             
             if result['success'] and result['data']:
                 houses = result['data']
@@ -184,8 +395,12 @@ class TelegramBetBot:
             else:
                 response = f"❌ Erro ao buscar por '{query}'."
             
-            await update.message.reply_text(response, parse_mode='Markdown')
-            
+            # A mensagem provisória vira a resposta, sem apagar e reenviar
+            if processing_msg is not None:
+                await processing_msg.edit_text(response, parse_mode='Markdown')
+            else:
+                await update.message.reply_text(response, parse_mode='Markdown')
+        
         except Exception as e:
             logger.error(f"Erro no comando /search: {e}")
             await update.message.reply_text("🚫 Erro ao realizar busca.")
@@ -198,72 +413,465 @@ class TelegramBetBot:
             
             logger.info(f"Mensagem recebida de {user.username or 'Unknown'} (ID: {user.id}): {message_text}")
             
+            # Cópia de uma mensagem respondida há pouco: nem extrai os domínios
+            text_key = None
+            if self.dedup is not None:
+                text_key = self.dedup.text_key(message_text)
+                cached = self.dedup.cached(text_key)
+                if cached is not None:
+                    await self._reply_duplicate(update, *cached)
+                    return
+            
             # Extrair domínios da mensagem
-            domains = self.domain_extractor.find_domains_in_message(message_text)
+            with STAGE_LATENCY.time(stage='find_domains'):
+                domains = self.domain_extractor.find_domains_in_message(message_text)
+                # Nomes escritos em palavras separadas ("bet 365") substituem
+                # as palavras soltas que os formam
+                joined = self.domain_extractor.find_joined_names(message_text)
+                if joined:
+                    replaced = {word: name for name, words in joined.items() for word in words}
+                    merged = dict.fromkeys(replaced.get(domain, domain) for domain in domains)
+                    merged.update(dict.fromkeys(joined))
+                    domains = list(merged)
+            DOMAINS_PER_MESSAGE.observe(len(domains))
             
             if not domains:
-                await update.message.reply_text(BOT_MESSAGES['no_domain_found'])
+                with STAGE_LATENCY.time(stage='reply'):
+                    await update.message.reply_text(BOT_MESSAGES['no_domain_found'])
+                MESSAGES.inc(outcome='no_domain')
+                return
+            
+            # Mesmas casas de uma resposta recente: reaproveitar o texto formatado
+            if self.dedup is not None:
+                cached = self.dedup.cached(self.dedup.domains_key(domains))
+                if cached is not None:
+                    self.dedup.remember(text_key, *cached)
+                    await self._reply_duplicate(update, *cached)
+                    return
+            
+            if not await self._wait_lookup_turn(update, len(domains)):
+                await self._defer_lookups(update, domains)
+                return
+        
+        except Exception as e:
+            MESSAGES.inc(outcome='error')
+            logger.error(f"Erro ao processar mensagem: {e}")
+            await update.message.reply_text(BOT_MESSAGES['error_general'])
+            return
+        
+        await self._answer_domains(update, text_key, domains)
+    
+    async def _answer_domains(
+        self,
+        update: Update,
+        text_key: Optional[Tuple[str, str]],
+        domains: List[str]
+    ) -> None:
+        """
+        Verifica os domínios e responde à mensagem
+        
+        Args:
+            update: Update da mensagem respondida
+            text_key: Chave do texto para as próximas cópias, ou None
+            domains: Nomes a verificar
+        """
+        user = update.effective_user
+        progress = None
+        try:
+            # Perfil de afiliado carregado em paralelo com as verificações
+            if self.affiliate_links is not None:
+                self.affiliate_links.prefetch(user.id)
+            
+            # Respostas da memória saem de uma vez, sem mensagem provisória
+            if self._answers_from_memory():
+                with STAGE_LATENCY.time(stage='check_domains'):
+                    results = await self._check_multiple_domains(domains)
+                with STAGE_LATENCY.time(stage='suggest'):
+                    await self._add_suggestions(results)
+                with STAGE_LATENCY.time(stage='format_results'):
+                    response = self._format_results(results)
+                houses = self._found_houses(results)
+                with STAGE_LATENCY.time(stage='affiliate_links'):
+                    links = await self._format_affiliate_links(user.id, houses)
+                with STAGE_LATENCY.time(stage='reply'):
+                    await update.message.reply_text(response + links, parse_mode='Markdown')
+                self._remember_response(update, text_key, domains, results, response, houses)
+                MESSAGES.inc(outcome='answered')
                 return
             
-            # Enviar mensagem de processamento
-            processing_msg = await update.message.reply_text(
-                BOT_MESSAGES['processing'].format(count=len(domains))
+            # Mensagem provisória editada no lugar conforme os resultados chegam
+            with STAGE_LATENCY.time(stage='reply_processing'):
+                processing_msg = await update.message.reply_text(
+                    BOT_MESSAGES['processing'].format(count=len(domains))
+                )
+            progress = ProgressiveMessage(
+                processing_msg,
+                min_interval=self.config.progress_edit_interval,
+                parse_mode='Markdown'
             )
             
-            # Verificar cada domínio
-            results = await self._check_multiple_domains(domains)
+            ready: List[Optional[Dict[str, Any]]] = [None] * len(domains)
             
-            # Deletar mensagem de processamento
-            await processing_msg.delete()
+            def on_result(index: int, item: Dict[str, Any]) -> None:
+                ready[index] = item
+                done = [entry for entry in ready if entry is not None]
+                progress.update(self._format_results(done, pending=len(domains) - len(done)))
             
-            # Enviar resposta
-            response = self._format_results(results)
-            await update.message.reply_text(response, parse_mode='Markdown')
+            with STAGE_LATENCY.time(stage='check_domains'):
+                results = await self._check_multiple_domains(domains, on_result=on_result)
             
+            # Sugerir a casa mais parecida para nomes não encontrados
+            with STAGE_LATENCY.time(stage='suggest'):
+                await self._add_suggestions(results)
+            
+            with STAGE_LATENCY.time(stage='format_results'):
+                response = self._format_results(results)
+            
+            houses = self._found_houses(results)
+            with STAGE_LATENCY.time(stage='affiliate_links'):
+                links = await self._format_affiliate_links(user.id, houses)
+            
+            with STAGE_LATENCY.time(stage='edit'):
+                await progress.finish(response + links)
+            PROGRESS_EDITS.inc(progress.edits)
+            self._remember_response(update, text_key, domains, results, response, houses)
+            MESSAGES.inc(outcome='answered')
+        
         except Exception as e:
+            MESSAGES.inc(outcome='error')
             logger.error(f"Erro ao processar mensagem: {e}")
-            await update.message.reply_text(BOT_MESSAGES['error_general'])
+            if progress is not None:
+                # Trocar a mensagem provisória pelo aviso, sem enviar outra
+                await progress.finish(BOT_MESSAGES['error_general'])
+            else:
+                await update.message.reply_text(BOT_MESSAGES['error_general'])
     
-    async def _check_multiple_domains(self, domains: List[str]) -> List[Dict[str, Any]]:
+    async def _reply_duplicate(
+        self,
+        update: Update,
+        domains_key: Tuple[str, ...],
+        response: str,
+        houses: List[Dict[str, Any]]
+    ) -> None:
         """
-        Verifica múltiplos domínios na API
+        Responde uma mensagem repetida com a resposta já formatada
         
         Args:
-            domains: Lista de nomes de domínios
+            update: Update da mensagem
+            domains_key: Chave dos domínios da resposta
+            response: Resposta formatada guardada
+            houses: Casas encontradas, para os links de quem enviou esta cópia
+        """
+        chat = update.effective_chat
+        is_group = getattr(chat, 'type', None) in ('group', 'supergroup')
+        
+        if self.dedup.should_suppress(chat.id, is_group, domains_key):
+            logger.info(f"Repetição no chat {chat.id} sem resposta (já respondida há menos de {self.dedup.window:.0f}s)")
+            MESSAGES.inc(outcome='suppressed')
+            return
+        
+        with STAGE_LATENCY.time(stage='affiliate_links'):
+            links = await self._format_affiliate_links(update.effective_user.id, houses)
+        with STAGE_LATENCY.time(stage='reply'):
+            await update.message.reply_text(response + links, parse_mode='Markdown')
+        MESSAGES.inc(outcome='deduplicated')
+    
+    def _remember_response(
+        self,
+        update: Update,
+        text_key: Optional[Tuple[str, str]],
+        domains: List[str],
+        results: List[Dict[str, Any]],
+        response: str,
+        houses: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Guarda a resposta enviada para as próximas cópias da mensagem
+        
+        Args:
+            update: Update da mensagem
+            text_key: Chave do texto da mensagem
+            domains: Domínios verificados
+            results: Resultados das verificações
+            response: Resposta enviada, sem os links do usuário
+            houses: Casas encontradas
+        """
+        if self.dedup is None:
+            return
+        
+        domains_key = self.dedup.domains_key(domains)
+        self.dedup.mark_sent(update.effective_chat.id, domains_key)
+        
+        # Falhas temporárias (timeout, 5xx) não são repetidas para as próximas cópias
+        if all(item['result'].get('status_code') in (200, 404) for item in results):
+            self.dedup.remember(text_key, domains_key, response, houses)
+    
+    @staticmethod
+    def _found_houses(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Dados das casas encontradas nos resultados"""
+        return [
+            item['result']['data'] for item in results
+            if item['result'].get('found') and isinstance(item['result'].get('data'), dict)
+        ]
+    
+    async def _format_affiliate_links(self, telegram_id: int, houses: List[Dict[str, Any]]) -> str:
+        """
+        Links de afiliado do usuário para as casas encontradas
+        
+        Args:
+            telegram_id: Id do usuário no Telegram
+            houses: Dados das casas encontradas
+        
+        Returns:
+            Trecho a acrescentar à resposta (vazio se o usuário não tem links)
+        """
+        if self.affiliate_links is None or not houses:
+            return ""
+        
+        try:
+            links = await self.affiliate_links.links_for(telegram_id, houses)
+        except Exception as e:
+            # Sem links, mas a resposta com os resultados ainda sai
+            logger.error(f"Erro ao montar links de afiliado: {e}")
+            return ""
+        
+        if not links:
+            return ""
+        lines = [BOT_MESSAGES['affiliate_link'].format(name=name, url=url) for name, url in links]
+        return "\n" + "\n".join([BOT_MESSAGES['affiliate_links_header']] + lines)
+    
+    def _answers_from_memory(self) -> bool:
+        """Se as verificações são respondidas pelo índice local, sem ir à API"""
+        return self.bookmaker_index is not None and self.bookmaker_index.loaded
+    
+    def _lookup_keys(self, update: Update) -> Tuple[Tuple[str, Any], ...]:
+        """Chaves do limite de consultas: o chat e o usuário da mensagem"""
+        return (('chat', update.effective_chat.id), ('user', update.effective_user.id))
+    
+    async def _wait_lookup_turn(self, update: Update, lookups: int) -> bool:
+        """
+        Aplica o limite de consultas do chat e do usuário
+        
+        Dentro do limite a mensagem segue na hora; um pouco acima dele espera
+        a vez (até RATE_LIMIT_MAX_WAIT). Além disso a mensagem não segue e
+        suas consultas ficam para uma resposta adiada (_defer_lookups).
+        
+        Args:
+            update: Update da mensagem
+            lookups: Quantidade de domínios a consultar
             
+        Returns:
+            True se a mensagem pode ser processada
+        """
+        if self.lookup_limiter is None:
+            return True
+        
+        tokens = min(lookups, self.config.chat_rate_burst)
+        wait = self.lookup_limiter.reserve(self._lookup_keys(update), tokens, self.config.rate_limit_max_wait)
+        if wait is None:
+            return False
+        
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+    
+    async def _defer_lookups(self, update: Update, domains: List[str]) -> None:
+        """
+        Junta as consultas de uma mensagem acima do limite numa resposta adiada
+        
+        A primeira mensagem recusada no chat recebe o aviso com o tempo de
+        espera e vira a resposta adiada. As seguintes, até ela sair, só somam
+        seus domínios a ela, até CHAT_RATE_BURST domínios; o que passar disso
+        é descartado e contado como `rate_limited`.
+        
+        Args:
+            update: Update da mensagem recusada
+            domains: Nomes que ela pedia
+        """
+        chat_id = update.effective_chat.id
+        capacity = max(1, int(self.config.chat_rate_burst))
+        
+        deferred = self._deferred_lookups.get(chat_id)
+        if deferred is not None:
+            pending = deferred['domains']
+            new = [domain for domain in domains if domain not in pending]
+            accepted = new[:max(0, capacity - len(pending))]
+            pending.update(dict.fromkeys(accepted))
+            if len(accepted) < len(new):
+                logger.info(f"Resposta adiada do chat {chat_id} cheia; {len(new) - len(accepted)} domínios descartados")
+            MESSAGES.inc(outcome='coalesced' if accepted or not new else 'rate_limited')
+            return
+        
+        if len(self._deferred_lookups) >= MAX_DEFERRED_CHATS:
+            logger.warning(f"Limite de consultas atingido no chat {chat_id}; respostas adiadas esgotadas")
+            MESSAGES.inc(outcome='rate_limited')
+            return
+        
+        domains = domains[:capacity]
+        retry_in = math.ceil(max(
+            self.lookup_limiter.retry_in(key, len(domains)) for key in self._lookup_keys(update)
+        ))
+        logger.info(f"Limite de consultas atingido no chat {chat_id}; resposta adiada em {retry_in}s")
+        
+        deferred = self._deferred_lookups[chat_id] = {'update': update, 'domains': dict.fromkeys(domains)}
+        deferred['task'] = asyncio.create_task(self._answer_deferred(chat_id, retry_in))
+        MESSAGES.inc(outcome='deferred')
+        await update.message.reply_text(BOT_MESSAGES['rate_limited'].format(seconds=retry_in))
+    
+    async def _answer_deferred(self, chat_id: int, delay: float) -> None:
+        """Responde, passado o tempo de espera, os domínios juntados do chat"""
+        await asyncio.sleep(delay)
+        deferred = self._deferred_lookups.pop(chat_id)
+        update = deferred['update']
+        domains = list(deferred['domains'])
+        
+        # Sem espera máxima: a resposta já foi prometida ao chat
+        wait = self.lookup_limiter.reserve(self._lookup_keys(update), len(domains))
+        if wait:
+            await asyncio.sleep(wait)
+        await self._answer_domains(update, None, domains)
+    
+    async def _check_multiple_domains(
+        self,
+        domains: List[str],
+        on_result: Optional[Callable[[int, Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Verifica múltiplos domínios na API em paralelo
+        
+        Args:
+            domains: Lista de nomes de domínios
+            on_result: Chamado com (posição, resultado) assim que cada
+                verificação termina, para exibir resultados parciais
+        
         Returns:
             Lista com resultados das verificações
         """
-        results = []
+        def notify_all(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            if on_result is not None:
+                for index, item in enumerate(results):
+                    on_result(index, item)
+            return results
         
-        for domain in domains:
+        # Índice local carregado: responder direto da memória
+        if self.bookmaker_index is not None and self.bookmaker_index.loaded:
+            return notify_all([
+                {'domain': domain, 'result': self.bookmaker_index.check_betting_house(domain)}
+                for domain in domains
+            ])
+        
+        # Vários domínios: requisições em lote, quando a API suporta; cada
+        # resultado é repassado assim que o cache ou o lote que o contém responde
+        if len(domains) > 1 and self.api_client.batch_supported:
+            positions: Dict[str, List[int]] = {}
+            for index, domain in enumerate(domains):
+                positions.setdefault(domain.lower(), []).append(index)
+            
+            def on_batch_result(key: str, result: Dict[str, Any]) -> None:
+                for index in positions.get(key, ()):
+                    on_result(index, {'domain': domains[index], 'result': result})
+            
             try:
-                result = await self.api_client.check_betting_house(domain)
-                results.append({
-                    'domain': domain,
-                    'result': result
-                })
+                async with self._lookup_semaphore:
+                    batch = await self.api_client.check_betting_houses(
+                        domains,
+                        on_result=on_batch_result if on_result is not None else None
+                    )
+                # Todos os resultados já foram repassados por on_batch_result
+                return [{'domain': domain, 'result': batch[domain]} for domain in domains]
             except Exception as e:
-                logger.error(f"Erro ao verificar domínio {domain}: {e}")
-                results.append({
-                    'domain': domain,
-                    'result': {
+                logger.error(f"Erro na verificação em lote: {e}")
+        
+        # Limite por mensagem somado ao limite global do processo
+        message_semaphore = asyncio.Semaphore(self.config.max_concurrent_per_message)
+        
+        async def check(index: int, domain: str) -> Dict[str, Any]:
+            async with message_semaphore, self._lookup_semaphore:
+                try:
+                    result = await self.api_client.check_betting_house(domain)
+                except Exception as e:
+                    logger.error(f"Erro ao verificar domínio {domain}: {e}")
+                    result = {
                         'found': False,
                         'data': None,
                         'message': f"🚫 Erro ao verificar '{domain}'",
                         'status_code': None
                     }
-                })
+            item = {
+                'domain': domain,
+                'result': result
+            }
+            if on_result is not None:
+                on_result(index, item)
+            return item
+        
+        # gather preserva a ordem original dos domínios
+        return list(await asyncio.gather(*(check(index, domain) for index, domain in enumerate(domains))))
+    
+    async def _add_suggestions(self, results: List[Dict[str, Any]]) -> None:
+        """
+        Acrescenta aos resultados não encontrados a casa registrada mais parecida
+        
+        A sugestão vem do índice aproximado do extrator (em memória) e só é
+        mostrada se a casa sugerida for encontrada na verificação.
+        
+        Args:
+            results: Resultados de _check_multiple_domains, alterados no lugar
+        """
+        suggestions = {}
+        for item in results:
+            if item['result'].get('status_code') != 404:
+                continue
+            suggestion = self.domain_extractor.suggest_house(item['domain'])
+            if suggestion:
+                suggestions[item['domain']] = suggestion
+        
+        if not suggestions:
+            return
+        
+        checked = await self._check_multiple_domains(list(dict.fromkeys(suggestions.values())))
+        found = {item['domain']: item['result'] for item in checked if item['result']['found']}
+        
+        for item in results:
+            suggestion = suggestions.get(item['domain'])
+            if suggestion in found:
+                item['suggestion'] = {'domain': suggestion, 'result': found[suggestion]}
+    
+    @staticmethod
+    def _format_details(data: Any) -> List[str]:
+        """
+        Linhas com as informações extras de uma casa encontrada
         
-        return results
+        Args:
+            data: Dados da casa de apostas retornados pela API
+            
+        Returns:
+            Lista de linhas formatadas
+        """
+        if not isinstance(data, dict):
+            return []
+        
+        extra_info = []
+        if 'license' in data:
+            extra_info.append(f"📜 Licença: {data['license']}")
+        if 'country' in data:
+            extra_info.append(f"🌍 País: {data['country']}")
+        if 'status' in data:
+            extra_info.append(f"📊 Status: {data['status']}")
+        if 'website' in data:
+            extra_info.append(f"🌐 Site: {data['website']}")
+        if 'founded' in data:
+            extra_info.append(f"📅 Fundado: {data['founded']}")
+        return extra_info
     
-    def _format_results(self, results: List[Dict[str, Any]]) -> str:
+    def _format_results(self, results: List[Dict[str, Any]], pending: int = 0) -> str:
         """
         Formata os resultados das verificações
         
         Args:
             results: Lista com resultados das verificações
-            
+            pending: Verificações ainda em andamento (resultado parcial)
+        
         Returns:
             String formatada com os resultados
         """
@@ -278,64 +886,263 @@ class TelegramBetBot:
             
             # Adicionar informações extras se disponíveis
             if result['found'] and result.get('data'):
-                data = result['data']
-                if isinstance(data, dict):
-                    extra_info = []
-                    
-                    if 'license' in data:
-                        extra_info.append(f"📜 Licença: {data['license']}")
-                    if 'country' in data:
-                        extra_info.append(f"🌍 País: {data['country']}")
-                    if 'status' in data:
-                        extra_info.append(f"📊 Status: {data['status']}")
-                    if 'website' in data:
-                        extra_info.append(f"🌐 Site: {data['website']}")
-                    if 'founded' in data:
-                        extra_info.append(f"📅 Fundado: {data['founded']}")
-                    
-                    if extra_info:
-                        response_parts.extend(extra_info)
+                response_parts.extend(self._format_details(result['data']))
+            
+            # Casa parecida encontrada para um nome não encontrado
+            suggestion = item.get('suggestion')
+            if suggestion:
+                data = suggestion['result'].get('data')
+                name = data.get('name') if isinstance(data, dict) and data.get('name') else suggestion['domain'].title()
+                response_parts.append(BOT_MESSAGES['suggestion'].format(name=name))
+                response_parts.append(suggestion['result']['message'])
+                response_parts.extend(self._format_details(data))
             
             response_parts.append("")  # Linha em branco
         
+        if pending:
+            response_parts.append(BOT_MESSAGES['pending_results'].format(count=pending))
+        
         return "\n".join(response_parts)
     
+    def _register_metrics(self) -> None:
+        """Expõe como métricas os contadores que os componentes já mantêm"""
+        REGISTRY.callback(
+            'bot_lookup_cache_events_total',
+            'Eventos do cache de consultas (acertos, falhas, despejos, expirações, agrupadas)',
+            lambda: {
+                (event,): self.api_client.cache_stats()[key]
+                for event, key in (
+                    ('hit', 'hits'),
+                    ('miss', 'misses'),
+                    ('eviction', 'evictions'),
+                    ('expiration', 'expirations'),
+                    ('coalesced', 'coalesced')
+                )
+            },
+            labelnames=('event',),
+            type_name='counter'
+        )
+        REGISTRY.callback(
+            'bot_lookup_cache_size',
+            'Itens no cache de consultas',
+            lambda: len(self.api_client.cache)
+        )
+        self.api_client.register_metrics()
+        REGISTRY.callback(
+            'bot_updates_in_progress',
+            'Updates admitidos e em execução no processador',
+            lambda: {
+                ('admitted',): self.update_processor.admitted,
+                ('running',): self.update_processor.running
+            },
+            labelnames=('state',)
+        )
+        REGISTRY.callback(
+            'bot_updates_dropped_total',
+            'Updates descartados por exceder MAX_PENDING_UPDATES (modo polling)',
+            lambda: self.update_processor.dropped,
+            type_name='counter'
+        )
+        REGISTRY.callback(
+            'bot_rate_limited_total',
+            'Operações recusadas ou atrasadas pelos limites de taxa',
+            lambda: {
+                (limiter, result): stats[result]
+                for limiter, stats in (
+                    ('lookups', self.lookup_limiter.stats() if self.lookup_limiter is not None else None),
+                    ('send_chats', self.send_limiter.chats.stats()),
+                    ('send_groups', self.send_limiter.groups.stats())
+                )
+                if stats is not None
+                for result in ('delayed', 'rejected')
+            },
+            labelnames=('limiter', 'result'),
+            type_name='counter'
+        )
+        if self.affiliate_links is not None:
+            REGISTRY.callback(
+                'bot_affiliate_links_events_total',
+                'Perfis de afiliado consultados e invalidados, links montados e links curtos criados',
+                lambda: {
+                    (event,): self.affiliate_links.stats()[key]
+                    for event, key in (
+                        ('profile_fetch', 'profile_fetches'),
+                        ('invalidation', 'invalidations'),
+                        ('link_built', 'links_built'),
+                        ('short_link_created', 'short_links_created')
+                    )
+                },
+                labelnames=('event',),
+                type_name='counter'
+            )
+        if self.dedup is not None:
+            REGISTRY.callback(
+                'bot_dedup_events_total',
+                'Mensagens repetidas respondidas com resposta guardada ou silenciadas',
+                lambda: {
+                    (event,): self.dedup.stats()[key]
+                    for event, key in (
+                        ('text_hit', 'text_hits'),
+                        ('domains_hit', 'domain_hits'),
+                        ('suppressed', 'suppressed')
+                    )
+                },
+                labelnames=('event',),
+                type_name='counter'
+            )
+    
+    async def post_init(self, application: Application) -> None:
+        """Inicializa recursos assíncronos antes de receber mensagens"""
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        
+        await self.api_client.warm_up()
+        
+        if self.bookmaker_index is not None:
+            await self.bookmaker_index.start()
+        if self.affiliate_links is not None:
+            await self.affiliate_links.start()
+    
+    async def post_shutdown(self, application: Application) -> None:
+        """Libera recursos assíncronos ao encerrar o bot"""
+        if self._deferred_lookups:
+            logger.warning(f"{len(self._deferred_lookups)} respostas adiadas pelo limite de consultas não enviadas")
+            for deferred in list(self._deferred_lookups.values()):
+                deferred['task'].cancel()
+        
+        if self.bookmaker_index is not None:
+            await self.bookmaker_index.stop()
+        if self.affiliate_links is not None:
+            await self.affiliate_links.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await self.api_client.close()
+        logger.info("Conexões com a API encerradas")
+        
+        if self.lookup_limiter is not None:
+            logger.info(f"Limite de consultas: {self.lookup_limiter.stats()}")
+        logger.info(f"Limite de envios: {self.send_limiter.stats()}")
+    
     async def error_handler(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handler para erros do bot"""
         logger.error(f"Exception while handling an update: {context.error}")
     
+    def build_application(self, request: Optional[BaseRequest] = None) -> Application:
+        """
+        Cria a aplicação do Telegram com todos os handlers registrados
+        
+        Args:
+            request: Camada HTTP alternativa para a API do Telegram (ex.: stub
+                do teste de carga); por padrão, a do python-telegram-bot
+        
+        Returns:
+            Aplicação configurada
+        """
+        builder = (
+            Application.builder()
+            .token(self.config.telegram_token)
+            .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
+            .concurrent_updates(self.update_processor)
+            .rate_limiter(self.send_limiter)
+        )
+        
+        if request is not None:
+            builder = builder.request(request)
+        
+        if self.config.bot_mode == 'webhook':
+            # Updates chegam pelo servidor próprio, em fila limitada
+            builder = builder.updater(None).update_queue(
+                asyncio.Queue(maxsize=self.config.update_queue_size)
+            )
+        
+        application = builder.build()
+        
+        # Adicionar handlers de comandos
+        application.add_handler(CommandHandler("start", self.start_command))
+        application.add_handler(CommandHandler("help", self.help_command))
+        application.add_handler(CommandHandler("info", self.info_command))
+        application.add_handler(CommandHandler("myinfo", self.myinfo_command))
+        application.add_handler(CommandHandler("list", self.list_command))
+        application.add_handler(CommandHandler("search", self.search_command))
+        application.add_handler(CallbackQueryHandler(self.list_page_callback, pattern=r'^list:'))
+        
+        # Handler para mensagens de texto
+        application.add_handler(
+            MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message)
+        )
+        
+        # Handler de erro
+        application.add_error_handler(self.error_handler)
+        
+        return application
+    
+    async def run_webhook(self, application: Application) -> None:
+        """
+        Executa o bot em modo webhook até receber SIGINT/SIGTERM
+        
+        Args:
+            application: Aplicação configurada sem updater
+        """
+        server = WebhookServer(
+            application,
+            listen=self.config.webhook_listen,
+            port=self.config.webhook_port,
+            path=self.config.webhook_path,
+            secret_token=self.config.webhook_secret_token,
+            update_processor=self.update_processor
+        )
+        
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:
+                # Windows: Ctrl+C cai no KeyboardInterrupt
+                pass
+        
+        await application.initialize()
+        await self.post_init(application)
+        await application.start()
+        await server.start()
+        
+        try:
+            if self.config.webhook_url:
+                await application.bot.set_webhook(
+                    url=self.config.webhook_url,
+                    secret_token=self.config.webhook_secret_token,
+                    allowed_updates=Update.ALL_TYPES
+                )
+                logger.info(f"Webhook registrado no Telegram: {self.config.webhook_url}")
+            
+            await stop_event.wait()
+        finally:
+            await server.stop()
+            await application.stop()
+            await application.shutdown()
+            await self.post_shutdown(application)
+    
     def run(self):
         """Iniciar o bot"""
         try:
             # Criar aplicação do Telegram
-            application = Application.builder().token(self.config.telegram_token).build()
-            
-            # Adicionar handlers de comandos
-            application.add_handler(CommandHandler("start", self.start_command))
-            application.add_handler(CommandHandler("help", self.help_command))
-            application.add_handler(CommandHandler("info", self.info_command))
-            application.add_handler(CommandHandler("myinfo", self.myinfo_command))
-            application.add_handler(CommandHandler("list", self.list_command))
-            application.add_handler(CommandHandler("search", self.search_command))
-            
-            # Handler para mensagens de texto
-            application.add_handler(
-                MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message)
-            )
-            
-            # Handler de erro
-            application.add_error_handler(self.error_handler)
+            application = self.build_application()
             
             logger.info("🤖 Bot iniciado com sucesso!")
             print("🤖 Bot do Telegram iniciado. Pressione Ctrl+C para parar.")
             print(f"🔧 Debug mode: {'ON' if self.config.debug else 'OFF'}")
             print(f"🌐 API URL: {self.config.api_base_url}")
+            print(f"📡 Modo: {self.config.bot_mode}")
             
             # Iniciar o bot
-            application.run_polling(
-                allowed_updates=Update.ALL_TYPES,
-                drop_pending_updates=True
-            )
+            if self.config.bot_mode == 'webhook':
+                asyncio.run(self.run_webhook(application))
+            else:
+                application.run_polling(
+                    allowed_updates=Update.ALL_TYPES,
+                    drop_pending_updates=True
+                )
             
         except Exception as e:
             logger.error(f"Erro ao iniciar bot: {e}")
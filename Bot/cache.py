@@ -0,0 +1,90 @@
+"""
+Cache em memória com TTL e despejo LRU
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class TTLCache:
+    """Cache limitado com expiração por item e despejo do menos usado (LRU)"""
+    
+    def __init__(self, max_size: int = 1024, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self._clock = clock
+        # chave -> (expira_em, valor), em ordem de uso (mais recente no fim)
+        self._data: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Obtém um valor do cache
+        
+        Args:
+            key: Chave do item
+        
+        Returns:
+            Valor armazenado ou None se ausente/expirado
+        """
+        entry = self._data.get(key)
+        
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+    
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """
+        Armazena um valor no cache
+        
+        Args:
+            key: Chave do item
+            value: Valor a armazenar
+            ttl: Tempo de vida em segundos
+        """
+        if self.max_size <= 0 or ttl <= 0:
+            return
+        
+        self._data[key] = (self._clock() + ttl, value)
+        self._data.move_to_end(key)
+        
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key: Hashable) -> None:
+        """Remove um item do cache, se existir"""
+        self._data.pop(key, None)
+    
+    def clear(self) -> None:
+        """Remove todos os itens do cache"""
+        self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': self.hits / lookups if lookups else 0.0
+        }
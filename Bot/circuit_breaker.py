@@ -0,0 +1,183 @@
+"""
+Circuit breaker e timeout adaptativo para chamadas à API
+"""
+
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito do endpoint está aberto"""
+    
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuito '{name}' aberto; nova tentativa em {retry_in:.1f}s")
+        self.name = name
+        self.retry_in = retry_in
+
+class CircuitBreaker:
+    """
+    Circuit breaker por endpoint
+    
+    Após `failure_threshold` falhas seguidas o circuito abre e as chamadas
+    falham imediatamente. Passado `reset_timeout`, até `half_open_max_calls`
+    chamadas de teste são liberadas: sucesso fecha o circuito, falha o reabre.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        self._clock = clock
+        
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._probes_in_flight = 0
+        
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+    
+    @property
+    def state(self) -> str:
+        """Estado atual, passando de aberto para meio-aberto quando o prazo expira"""
+        if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+            self._probes_in_flight = 0
+        return self._state
+    
+    def allow_request(self) -> None:
+        """
+        Reserva uma chamada no circuito
+        
+        Raises:
+            CircuitOpenError: Se o circuito estiver aberto ou sem vagas de teste
+        """
+        state = self.state
+        
+        if state == self.CLOSED:
+            return
+        
+        if state == self.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+            self._probes_in_flight += 1
+            return
+        
+        self.rejected += 1
+        retry_in = max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+        raise CircuitOpenError(self.name, retry_in)
+    
+    def record_success(self) -> None:
+        """Registra uma chamada bem-sucedida"""
+        self.successes += 1
+        self._consecutive_failures = 0
+        if self._state == self.HALF_OPEN:
+            self._state = self.CLOSED
+            self._probes_in_flight = 0
+    
+    def record_cancelled(self) -> None:
+        """Libera a vaga de uma chamada interrompida sem resultado"""
+        if self._state == self.HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+    
+    def record_failure(self) -> None:
+        """Registra uma chamada com falha"""
+        self.failures += 1
+        self._consecutive_failures += 1
+        
+        if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                self.times_opened += 1
+            self._state = self.OPEN
+            self._opened_at = self._clock()
+            self._probes_in_flight = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do circuito"""
+        return {
+            'state': self.state,
+            'consecutive_failures': self._consecutive_failures,
+            'successes': self.successes,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'times_opened': self.times_opened
+        }
+
+class AdaptiveTimeout:
+    """
+    Timeout calculado a partir dos percentis de latência observados
+    
+    O timeout é `multiplier` vezes o percentil `percentile` da janela de
+    latências recentes, limitado entre `min_timeout` e `max_timeout`.
+    Enquanto não há amostras suficientes, vale `max_timeout`.
+    """
+    
+    def __init__(
+        self,
+        max_timeout: float,
+        min_timeout: float = 1.0,
+        multiplier: float = 3.0,
+        percentile: float = 0.99,
+        window: int = 200,
+        min_samples: int = 20
+    ):
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.multiplier = multiplier
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._current: Optional[float] = None
+    
+    def observe(self, latency: float) -> None:
+        """Registra a latência de uma chamada bem-sucedida, em segundos"""
+        self._samples.append(latency)
+        self._current = None
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Percentil das latências da janela
+        
+        Args:
+            q: Percentil entre 0 e 1
+        
+        Returns:
+            Latência em segundos ou None sem amostras
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    @property
+    def timeout(self) -> float:
+        """Timeout atual em segundos"""
+        if len(self._samples) < self.min_samples:
+            return self.max_timeout
+        
+        if self._current is None:
+            adaptive = self.quantile(self.percentile) * self.multiplier
+            self._current = min(self.max_timeout, max(self.min_timeout, adaptive))
+        return self._current
+    
+    def stats(self) -> Dict[str, Any]:
+        """Percentis de latência e timeout em uso"""
+        return {
+            'samples': len(self._samples),
+            'p50': self.quantile(0.50),
+            'p90': self.quantile(0.90),
+            'p99': self.quantile(0.99),
+            'timeout': self.timeout
+        }
@@ -13,6 +13,67 @@ class BotConfig:
     api_base_url: str
     api_key: Optional[str] = None
     debug: bool = False
+    api_timeout: float = 10.0
+    api_list_timeout: float = 15.0
+    api_connect_timeout: float = 5.0
+    api_max_connections: int = 20
+    api_max_keepalive_connections: int = 10
+    api_keepalive_expiry: float = 30.0
+    max_concurrent_lookups: int = 20
+    max_concurrent_per_message: int = 5
+    progress_edit_interval: float = 1.0
+    dedup_window: float = 60.0
+    dedup_max_entries: int = 4096
+    dedup_suppress: str = 'never'
+    affiliate_links_enabled: bool = False
+    affiliate_profile_ttl: float = 600.0
+    affiliate_sync_interval: float = 60.0
+    affiliate_code_param: str = 'ref'
+    short_link_base_url: Optional[str] = None
+    links_db: str = 'links.db'
+    short_code_strategy: str = 'block'
+    short_code_block_size: int = 1000
+    short_code_length: int = 6
+    short_code_node_id: Optional[int] = None
+    cache_max_size: int = 1024
+    cache_ttl: float = 300.0
+    cache_negative_ttl: float = 60.0
+    tld_suffix_list_file: Optional[str] = None
+    tld_cache_size: int = 4096
+    fuzzy_max_distance: int = 2
+    api_batch_size: int = 50
+    api_list_page_size: int = 1000
+    list_page_size: int = 20
+    bookmaker_index_enabled: bool = False
+    bookmaker_sync_interval: float = 300.0
+    bookmaker_full_sync_every: int = 12
+    bookmaker_stale_after: float = 900.0
+    persistent_cache_path: Optional[str] = None
+    persistent_cache_max_entries: int = 50000
+    persistent_cache_flush_interval: float = 2.0
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    adaptive_timeout_min: float = 1.0
+    adaptive_timeout_multiplier: float = 3.0
+    bot_mode: str = 'polling'
+    webhook_listen: str = '0.0.0.0'
+    webhook_port: int = 8443
+    webhook_path: str = '/telegram/webhook'
+    webhook_url: Optional[str] = None
+    webhook_secret_token: Optional[str] = None
+    update_queue_size: int = 1000
+    update_workers: int = 8
+    max_pending_updates: int = 256
+    chat_rate_limit: float = 0.0
+    chat_rate_burst: float = 5.0
+    rate_limit_max_wait: float = 10.0
+    api_rate_limit: float = 50.0
+    api_rate_burst: float = 100.0
+    telegram_global_send_rate: float = 30.0
+    telegram_chat_send_rate: float = 1.0
+    telegram_group_send_rate: float = 20.0
+    metrics_listen: str = '127.0.0.1'
+    metrics_port: int = 0
     
     @classmethod
     def from_env(cls) -> 'BotConfig':
@@ -21,6 +82,67 @@ class BotConfig:
         api_base_url = os.getenv('API_BASE_URL')
         api_key = os.getenv('API_KEY')
         debug = os.getenv('DEBUG', 'False').lower() == 'true'
+        api_timeout = float(os.getenv('API_TIMEOUT', '10'))
+        api_list_timeout = float(os.getenv('API_LIST_TIMEOUT', '15'))
+        api_connect_timeout = float(os.getenv('API_CONNECT_TIMEOUT', '5'))
+        api_max_connections = int(os.getenv('API_MAX_CONNECTIONS', '20'))
+        api_max_keepalive_connections = int(os.getenv('API_MAX_KEEPALIVE_CONNECTIONS', '10'))
+        api_keepalive_expiry = float(os.getenv('API_KEEPALIVE_EXPIRY', '30'))
+        max_concurrent_lookups = int(os.getenv('MAX_CONCURRENT_LOOKUPS', '20'))
+        max_concurrent_per_message = int(os.getenv('MAX_CONCURRENT_PER_MESSAGE', '5'))
+        progress_edit_interval = float(os.getenv('PROGRESS_EDIT_INTERVAL', '1.0'))
+        dedup_window = float(os.getenv('DEDUP_WINDOW', '60'))
+        dedup_max_entries = int(os.getenv('DEDUP_MAX_ENTRIES', '4096'))
+        dedup_suppress = os.getenv('DEDUP_SUPPRESS', 'never').lower()
+        affiliate_links_enabled = os.getenv('AFFILIATE_LINKS_ENABLED', 'False').lower() == 'true'
+        affiliate_profile_ttl = float(os.getenv('AFFILIATE_PROFILE_TTL', '600'))
+        affiliate_sync_interval = float(os.getenv('AFFILIATE_SYNC_INTERVAL', '60'))
+        affiliate_code_param = os.getenv('AFFILIATE_CODE_PARAM', 'ref')
+        short_link_base_url = os.getenv('SHORT_LINK_BASE_URL') or None
+        links_db = os.getenv('LINKS_DB', 'links.db')
+        short_code_strategy = os.getenv('SHORT_CODE_STRATEGY', 'block').lower()
+        short_code_block_size = int(os.getenv('SHORT_CODE_BLOCK_SIZE', '1000'))
+        short_code_length = int(os.getenv('SHORT_CODE_LENGTH', '6'))
+        short_code_node_id = int(os.getenv('SHORT_CODE_NODE_ID')) if os.getenv('SHORT_CODE_NODE_ID') else None
+        cache_max_size = int(os.getenv('CACHE_MAX_SIZE', '1024'))
+        cache_ttl = float(os.getenv('CACHE_TTL', '300'))
+        cache_negative_ttl = float(os.getenv('CACHE_NEGATIVE_TTL', '60'))
+        tld_suffix_list_file = os.getenv('TLD_SUFFIX_LIST_FILE') or None
+        tld_cache_size = int(os.getenv('TLD_CACHE_SIZE', '4096'))
+        fuzzy_max_distance = int(os.getenv('FUZZY_MAX_DISTANCE', '2'))
+        api_batch_size = int(os.getenv('API_BATCH_SIZE', '50'))
+        api_list_page_size = int(os.getenv('API_LIST_PAGE_SIZE', '1000'))
+        list_page_size = int(os.getenv('LIST_PAGE_SIZE', '20'))
+        bookmaker_index_enabled = os.getenv('BOOKMAKER_INDEX_ENABLED', 'False').lower() == 'true'
+        bookmaker_sync_interval = float(os.getenv('BOOKMAKER_SYNC_INTERVAL', '300'))
+        bookmaker_full_sync_every = int(os.getenv('BOOKMAKER_FULL_SYNC_EVERY', '12'))
+        bookmaker_stale_after = float(os.getenv('BOOKMAKER_STALE_AFTER', '900'))
+        persistent_cache_path = os.getenv('PERSISTENT_CACHE_PATH') or None
+        persistent_cache_max_entries = int(os.getenv('PERSISTENT_CACHE_MAX_ENTRIES', '50000'))
+        persistent_cache_flush_interval = float(os.getenv('PERSISTENT_CACHE_FLUSH_INTERVAL', '2'))
+        breaker_failure_threshold = int(os.getenv('BREAKER_FAILURE_THRESHOLD', '5'))
+        breaker_reset_timeout = float(os.getenv('BREAKER_RESET_TIMEOUT', '30'))
+        adaptive_timeout_min = float(os.getenv('ADAPTIVE_TIMEOUT_MIN', '1'))
+        adaptive_timeout_multiplier = float(os.getenv('ADAPTIVE_TIMEOUT_MULTIPLIER', '3'))
+        bot_mode = os.getenv('BOT_MODE', 'polling').lower()
+        webhook_listen = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+        webhook_port = int(os.getenv('WEBHOOK_PORT', '8443'))
+        webhook_path = os.getenv('WEBHOOK_PATH', '/telegram/webhook')
+        webhook_url = os.getenv('WEBHOOK_URL') or None
+        webhook_secret_token = os.getenv('WEBHOOK_SECRET_TOKEN') or None
+        update_queue_size = int(os.getenv('UPDATE_QUEUE_SIZE', '1000'))
+        update_workers = int(os.getenv('UPDATE_WORKERS', '8'))
+        max_pending_updates = int(os.getenv('MAX_PENDING_UPDATES', '256'))
+        chat_rate_limit = float(os.getenv('CHAT_RATE_LIMIT', '0'))
+        chat_rate_burst = float(os.getenv('CHAT_RATE_BURST', '5'))
+        rate_limit_max_wait = float(os.getenv('RATE_LIMIT_MAX_WAIT', '10'))
+        api_rate_limit = float(os.getenv('API_RATE_LIMIT', '50'))
+        api_rate_burst = float(os.getenv('API_RATE_BURST', '100'))
+        telegram_global_send_rate = float(os.getenv('TELEGRAM_GLOBAL_SEND_RATE', '30'))
+        telegram_chat_send_rate = float(os.getenv('TELEGRAM_CHAT_SEND_RATE', '1'))
+        telegram_group_send_rate = float(os.getenv('TELEGRAM_GROUP_SEND_RATE', '20'))
+        metrics_listen = os.getenv('METRICS_LISTEN', '127.0.0.1')
+        metrics_port = int(os.getenv('METRICS_PORT', '0'))
         
         if not telegram_token:
             raise ValueError("TELEGRAM_BOT_TOKEN é obrigatório")
@@ -28,18 +150,87 @@ class BotConfig:
         if not api_base_url:
             raise ValueError("API_BASE_URL é obrigatório")
         
+        if bot_mode not in ('polling', 'webhook'):
+            raise ValueError("BOT_MODE deve ser 'polling' ou 'webhook'")
+        
         return cls(
             telegram_token=telegram_token,
             api_base_url=api_base_url,
             api_key=api_key,
-            debug=debug
+            debug=debug,
+            api_timeout=api_timeout,
+            api_list_timeout=api_list_timeout,
+            api_connect_timeout=api_connect_timeout,
+            api_max_connections=api_max_connections,
+            api_max_keepalive_connections=api_max_keepalive_connections,
+            api_keepalive_expiry=api_keepalive_expiry,
+            max_concurrent_lookups=max_concurrent_lookups,
+            max_concurrent_per_message=max_concurrent_per_message,
+            progress_edit_interval=progress_edit_interval,
+            dedup_window=dedup_window,
+            dedup_max_entries=dedup_max_entries,
+            dedup_suppress=dedup_suppress,
+            affiliate_links_enabled=affiliate_links_enabled,
+            affiliate_profile_ttl=affiliate_profile_ttl,
+            affiliate_sync_interval=affiliate_sync_interval,
+            affiliate_code_param=affiliate_code_param,
+            short_link_base_url=short_link_base_url,
+            links_db=links_db,
+            short_code_strategy=short_code_strategy,
+            short_code_block_size=short_code_block_size,
+            short_code_length=short_code_length,
+            short_code_node_id=short_code_node_id,
+            cache_max_size=cache_max_size,
+            cache_ttl=cache_ttl,
+            cache_negative_ttl=cache_negative_ttl,
+            tld_suffix_list_file=tld_suffix_list_file,
+            tld_cache_size=tld_cache_size,
+            fuzzy_max_distance=fuzzy_max_distance,
+            api_batch_size=api_batch_size,
+            api_list_page_size=api_list_page_size,
+            list_page_size=list_page_size,
+            bookmaker_index_enabled=bookmaker_index_enabled,
+            bookmaker_sync_interval=bookmaker_sync_interval,
+            bookmaker_full_sync_every=bookmaker_full_sync_every,
+            bookmaker_stale_after=bookmaker_stale_after,
+            persistent_cache_path=persistent_cache_path,
+            persistent_cache_max_entries=persistent_cache_max_entries,
+            persistent_cache_flush_interval=persistent_cache_flush_interval,
+            breaker_failure_threshold=breaker_failure_threshold,
+            breaker_reset_timeout=breaker_reset_timeout,
+            adaptive_timeout_min=adaptive_timeout_min,
+            adaptive_timeout_multiplier=adaptive_timeout_multiplier,
+            bot_mode=bot_mode,
+            webhook_listen=webhook_listen,
+            webhook_port=webhook_port,
+            webhook_path=webhook_path,
+            webhook_url=webhook_url,
+            webhook_secret_token=webhook_secret_token,
+            update_queue_size=update_queue_size,
+            update_workers=update_workers,
+            max_pending_updates=max_pending_updates,
+            chat_rate_limit=chat_rate_limit,
+            chat_rate_burst=chat_rate_burst,
+            rate_limit_max_wait=rate_limit_max_wait,
+            api_rate_limit=api_rate_limit,
+            api_rate_burst=api_rate_burst,
+            telegram_global_send_rate=telegram_global_send_rate,
+            telegram_chat_send_rate=telegram_chat_send_rate,
+            telegram_group_send_rate=telegram_group_send_rate,
+            metrics_listen=metrics_listen,
+            metrics_port=metrics_port
         )
 
 # Endpoints da API
 API_ENDPOINTS = {
     'check_betting_house': '/betting-houses/{house_name}',
     'list_betting_houses': '/betting-houses',
-    'search_betting_houses': '/betting-houses/search?q={query}'
+    'list_betting_houses_page': '/betting-houses',
+    'search_betting_houses': '/betting-houses/search',
+    'batch_check_betting_houses': '/betting-houses/batch',
+    'record_clicks': '/generated-links/clicks',
+    'get_affiliate_profile': '/affiliate-profiles/{telegram_id}',
+    'list_affiliate_profile_changes': '/affiliate-profiles'
 }
 
 # Mensagens do bot
@@ -103,7 +294,12 @@ Envie um domínio como:
 • sportingbet
     """,
     
+    'rate_limited': "⏳ Muitas consultas em pouco tempo. Respondo em {seconds} segundos, junto com as casas enviadas até lá.",
     'processing': "🔍 Verificando {count} casa(s) de apostas...",
+    'pending_results': "⏳ Verificando mais {count} casa(s)...",
+    'suggestion': "🔎 Você quis dizer *{name}*?",
     'results_header': "📊 *Resultados da Verificação:*\n",
+    'affiliate_links_header': "🔗 *Seus links:*",
+    'affiliate_link': "• [{name}]({url})",
     'error_general': "🚫 Ocorreu um erro ao processar sua mensagem. Tente novamente."
 }
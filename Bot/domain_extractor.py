@@ -5,24 +5,66 @@ Módulo para extração e processamento de domínios
 import re
 import logging
 import tldextract
-from typing import List, Optional, Set
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
 from urllib.parse import urlparse
+from keyword_matcher import KeywordMatcher
+from fuzzy_matcher import FuzzyMatcher
 
 logger = logging.getLogger(__name__)
 
+# Rótulo de domínio (até 63 caracteres, sem hífen nas pontas)
+_LABEL = r'[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'
+
+# URLs completas (http/https)
+_URL_RE = re.compile(rf'https?://(?:www\.)?({_LABEL}(?:\.{_LABEL})*)', re.IGNORECASE)
+# Domínios com www
+_WWW_RE = re.compile(rf'www\.({_LABEL}(?:\.{_LABEL})*)', re.IGNORECASE)
+# Domínios simples (pelo menos 2 partes separadas por ponto)
+_BARE_RE = re.compile(rf'(?<!\w)({_LABEL}(?:\.{_LABEL})+)(?!\w)', re.IGNORECASE)
+
+# Sequências de caracteres de palavra: única varredura sobre a mensagem
+_RUN_RE = re.compile(r'\w+')
+# Palavras ASCII dentro de uma sequência não-ASCII (após lower())
+_WORD_RE = re.compile(r'\b[a-z0-9]+\b')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+_VALID_NAME_RE = re.compile(r'^[a-z0-9][a-z0-9-]*[a-z0-9]$|^[a-z0-9]$')
+
+# Palavras vizinhas juntadas ao procurar nomes escritos separados ("bet 365")
+MAX_JOINED_WORDS = 3
+
 class DomainExtractor:
     """Classe para extrair e processar domínios de mensagens"""
     
-    def __init__(self):
-        # Regex para encontrar URLs e domínios
-        self.url_patterns = [
-            # URLs completas (http/https)
-            r'https?://(?:www\.)?([a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*)',
-            # Domínios com www
-            r'www\.([a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)*)',
-            # Domínios simples (pelo menos 2 partes separadas por ponto)
-            r'(?<!\w)([a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?(?:\.[a-zA-Z0-9](?:[a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?)+)(?!\w)',
-        ]
+    # Lista de casas de apostas conhecidas
+    known_betting_houses = frozenset({
+        'bet365', 'betfair', 'betano', 'sportingbet', 'rivalo',
+        'betway', 'betwinner', 'parimatch', 'pinnacle', 'william',
+        'ladbrokes', 'coral', 'paddy', 'sky', 'bwin', 'unibet',
+        'poker', 'pokerstars', 'partypoker', 'betsson', 'netbet'
+    })
+    
+    def __init__(
+        self,
+        suffix_list_file: Optional[str] = None,
+        tld_cache_size: int = 4096,
+        fuzzy_max_distance: int = 2
+    ):
+        # Lista de sufixos públicos carregada sem acesso à rede: um arquivo
+        # local, se informado, ou o snapshot que acompanha o tldextract
+        suffix_list_urls = (Path(suffix_list_file).resolve().as_uri(),) if suffix_list_file else ()
+        self._tld_extractor = tldextract.TLDExtract(
+            cache_dir=None,
+            suffix_list_urls=suffix_list_urls,
+            fallback_to_snapshot=True
+        )
+        
+        # Memoização host -> (subdomínio, domínio, sufixo)
+        self._split_host = lru_cache(maxsize=tld_cache_size)(self._tld_extractor)
+        
+        # Carregar a lista de sufixos já na inicialização
+        self._tld_extractor('example.com')
         
         # Lista de TLDs comuns para validação
         self.common_tlds = {
@@ -36,6 +78,47 @@ class DomainExtractor:
             'bet', 'betting', 'casino', 'poker', 'sport', 'sports',
             'game', 'games', 'win', 'lucky', 'fortune', 'play'
         }
+        
+        # Autômato construído uma vez com nomes conhecidos e palavras-chave
+        self._matcher = KeywordMatcher(self.known_betting_houses, self.betting_keywords)
+        
+        # Índice de deleções para sugerir a casa mais parecida (0 desativa)
+        self._fuzzy = None
+        if fuzzy_max_distance > 0:
+            self._fuzzy = FuzzyMatcher(self.known_betting_houses, max_distance=fuzzy_max_distance)
+    
+    def update_known_houses(self, names: Iterable[str], replace: bool = False) -> None:
+        """
+        Acrescenta nomes de casas de apostas (ex.: lista vinda da API) e
+        reconstrói o autômato de busca, se algum nome mudou
+        
+        Args:
+            names: Nomes das casas de apostas
+            replace: Se True, `names` é a lista completa: nomes que saíram
+                dela deixam de ser conhecidos (os nomes embutidos ficam)
+        """
+        normalized = {_NON_ALNUM_RE.sub('', name.lower()) for name in names if name}
+        normalized.discard('')
+        
+        base = type(self).known_betting_houses if replace else self.known_betting_houses
+        houses = frozenset(base | normalized)
+        if houses == self.known_betting_houses:
+            return
+        
+        removed = self.known_betting_houses - houses
+        self.known_betting_houses = houses
+        self._matcher = KeywordMatcher(houses, self.betting_keywords)
+        if self._fuzzy is not None:
+            if removed:
+                self._fuzzy = FuzzyMatcher(
+                    houses,
+                    max_distance=self._fuzzy.max_distance,
+                    prefix_length=self._fuzzy.prefix_length
+                )
+            else:
+                self._fuzzy.add(normalized)
+        
+        logger.info(f"Autômato de nomes reconstruído com {len(houses)} casas de apostas")
     
     def extract_domain_name(self, url_or_domain: str) -> Optional[str]:
         """
@@ -55,7 +138,7 @@ class DomainExtractor:
                 return None
             
             # Usar tldextract para obter as partes do domínio
-            extracted = tldextract.extract(clean_input)
+            extracted = self._split_host(clean_input)
             
             # Retornar o domínio principal
             if extracted.domain:
@@ -75,29 +158,139 @@ class DomainExtractor:
         """
         Encontra todos os domínios válidos em uma mensagem
         
+        A mensagem é percorrida uma única vez, sequência de palavra a
+        sequência de palavra. URLs, hosts com www, domínios simples e nomes
+        de casas de apostas são reconhecidos no mesmo passo, com a mesma
+        semântica das buscas independentes de cada padrão.
+        
         Args:
             message: Texto da mensagem
             
         Returns:
-            Lista de nomes de domínios encontrados
+            Lista de nomes de domínios encontrados, na ordem de aparição
         """
-        domains = set()
+        domains = {}
+        seen_runs = set()
+        seen_candidates = set()
         
-        # Aplicar cada padrão regex
-        for pattern in self.url_patterns:
-            matches = re.findall(pattern, message, re.IGNORECASE)
-            
-            for match in matches:
-                domain_name = self.extract_domain_name(match)
-                if domain_name:
-                    domains.add(domain_name)
+        # Fim da última ocorrência de cada padrão (ocorrências não se sobrepõem)
+        url_end = www_end = bare_end = 0
         
-        # Buscar também por palavras que podem ser nomes de casas de apostas
-        betting_domains = self._find_betting_names(message)
-        domains.update(betting_domains)
+        for run in _RUN_RE.finditer(message):
+            start, end = run.span()
+            # Todo host começa ou continua com '.', '-' ou ':' logo após a sequência
+            following = message[end:end + 1]
+            
+            if following and following in '.-:':
+                candidates = []
+                
+                # URLs completas: a sequência termina em "http"/"https" antes de "://"
+                if following == ':' and message.startswith('://', end):
+                    for pos in (end - 5, end - 4):
+                        if pos >= start and pos >= url_end:
+                            match = _URL_RE.match(message, pos)
+                            if match:
+                                candidates.append(match.group(1))
+                                url_end = match.end()
+                                break
+                
+                # Domínios com www: a sequência termina em "www" antes de "."
+                if following == '.' and end - 3 >= max(start, www_end):
+                    match = _WWW_RE.match(message, end - 3)
+                    if match:
+                        candidates.append(match.group(1))
+                        www_end = match.end()
+                
+                # Domínios simples só podem começar no início de uma sequência
+                if following != ':' and start >= bare_end:
+                    match = _BARE_RE.match(message, start)
+                    if match:
+                        candidates.append(match.group(1))
+                        bare_end = match.end()
+                
+                for candidate in candidates:
+                    if candidate in seen_candidates:
+                        continue
+                    seen_candidates.add(candidate)
+                    
+                    domain_name = self.extract_domain_name(candidate)
+                    if domain_name:
+                        domains[domain_name] = None
+            
+            # Buscar também por palavras que podem ser nomes de casas de apostas
+            token = run.group()
+            if token in seen_runs:
+                continue
+            seen_runs.add(token)
+            
+            for word in self._words_in_run(token):
+                if word not in domains and self._is_betting_name(word):
+                    domains[word] = None
         
         return list(domains)
     
+    def find_joined_names(self, message: str) -> Dict[str, List[str]]:
+        """
+        Encontra nomes de casas conhecidas escritos em palavras separadas
+        
+        Junta até MAX_JOINED_WORDS palavras vizinhas ("bet 365", "sporting
+        bet") e mantém as junções que são exatamente um nome conhecido.
+        
+        Args:
+            message: Texto da mensagem
+        
+        Returns:
+            Nome encontrado -> palavras que o formaram, na ordem de aparição
+        """
+        words = [word for run in _RUN_RE.finditer(message) for word in self._words_in_run(run.group())]
+        names: Dict[str, List[str]] = {}
+        
+        for start in range(len(words) - 1):
+            joined = words[start]
+            for end in range(start + 1, min(start + MAX_JOINED_WORDS, len(words))):
+                joined += words[end]
+                if joined in self.known_betting_houses and joined not in names:
+                    names[joined] = words[start:end + 1]
+        
+        return names
+    
+    def suggest_house(self, name: str) -> Optional[str]:
+        """
+        Casa conhecida com nome mais parecido, para um nome não encontrado
+        
+        Args:
+            name: Nome ou domínio digitado
+        
+        Returns:
+            Nome normalizado da casa sugerida ou None
+        """
+        if self._fuzzy is None:
+            return None
+        
+        term = _NON_ALNUM_RE.sub('', name.lower())
+        match = self._fuzzy.lookup(term)
+        if match is None or match[1] == 0:
+            return None
+        return match[0]
+    
+    @staticmethod
+    def _words_in_run(run: str) -> List[str]:
+        """
+        Palavras ASCII em minúsculas de uma sequência de caracteres de palavra
+        
+        Args:
+            run: Sequência de caracteres de palavra
+            
+        Returns:
+            Lista de palavras
+        """
+        if run.isascii():
+            word = run.lower()
+            # '_' é caractere de palavra, mas não entra em nomes válidos
+            return [word] if word.isalnum() else []
+        
+        return _WORD_RE.findall(run.lower())
+    
     def _clean_input(self, input_str: str) -> str:
         """
         Limpa e normaliza a entrada
@@ -141,7 +334,7 @@ class DomainExtractor:
             return False
         
         # Verificar caracteres válidos
-        if not re.match(r'^[a-z0-9][a-z0-9-]*[a-z0-9]$|^[a-z0-9]$', domain_name):
+        if not _VALID_NAME_RE.match(domain_name):
             return False
         
         # Não pode começar ou terminar com hífen
@@ -150,40 +343,38 @@ class DomainExtractor:
         
         return True
     
-    def _find_betting_names(self, message: str) -> Set[str]:
+    def _is_betting_name(self, word: str) -> bool:
         """
-        Busca por nomes de casas de apostas conhecidas na mensagem
+        Verifica se uma palavra pode ser nome de casa de apostas
         
         Args:
-            message: Texto da mensagem
+            word: Palavra em minúsculas
             
         Returns:
-            Set de nomes encontrados
+            True se for uma casa conhecida ou contiver palavra-chave de apostas
         """
-        betting_names = set()
+        known, has_keyword = self._matcher.match_word(word)
         
-        # Lista de casas de apostas conhecidas
-        known_betting_houses = {
-            'bet365', 'betfair', 'betano', 'sportingbet', 'rivalo',
-            'betway', 'betwinner', 'parimatch', 'pinnacle', 'william',
-            'ladbrokes', 'coral', 'paddy', 'sky', 'bwin', 'unibet',
-            'poker', 'pokerstars', 'partypoker', 'betsson', 'netbet'
-        }
-        
-        # Buscar nomes conhecidos na mensagem
-        words = re.findall(r'\b[a-zA-Z0-9]+\b', message.lower())
+        if known:
+            return True
         
-        for word in words:
-            if word in known_betting_houses:
-                betting_names.add(word)
-            
-            # Verificar se contém palavras-chave de apostas
-            for keyword in self.betting_keywords:
-                if keyword in word and len(word) > len(keyword):
-                    if self._is_valid_domain_name(word):
-                        betting_names.add(word)
+        # Contém palavra-chave de apostas (menor que a própria palavra)
+        return has_keyword and self._is_valid_domain_name(word)
+    
+    def tld_cache_stats(self) -> dict:
+        """
+        Estatísticas do cache de resolução de hosts
         
-        return betting_names
+        Returns:
+            Dicionário com acertos, falhas e ocupação do cache
+        """
+        info = self._split_host.cache_info()
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'max_size': info.maxsize
+        }
     
     def get_domain_info(self, url_or_domain: str) -> dict:
         """
@@ -197,7 +388,7 @@ class DomainExtractor:
         """
         try:
             clean_input = self._clean_input(url_or_domain)
-            extracted = tldextract.extract(clean_input)
+            extracted = self._split_host(clean_input)
             
             return {
                 'original': url_or_domain,
@@ -0,0 +1,165 @@
+"""
+Correspondência aproximada de nomes de casas de apostas (índice de deleções no estilo SymSpell)
+"""
+
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+def edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Distância de edição com transposição de vizinhos (Damerau–Levenshtein restrita)
+    
+    Args:
+        a: Primeiro texto
+        b: Segundo texto
+        max_distance: Distância máxima de interesse
+    
+    Returns:
+        Distância, ou None se for maior que `max_distance`
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    
+    # Só as células a até `max_distance` da diagonal podem ficar dentro do limite
+    outside = max_distance + 1
+    previous2: List[int] = []
+    previous = [j if j <= max_distance else outside for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [outside] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        row_min = current[0]
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        # Nenhuma célula da linha dentro do limite: o resultado também não estará
+        if row_min > max_distance:
+            return None
+        previous2, previous = previous, current
+    
+    distance = previous[len(b)]
+    return distance if distance <= max_distance else None
+
+class FuzzyMatcher:
+    """
+    Encontra o nome conhecido mais próximo de um termo digitado com erro
+    
+    Na construção, cada nome gera as variantes obtidas apagando até
+    `max_distance` caracteres dos seus `prefix_length` primeiros caracteres;
+    a consulta gera as mesmas variantes do termo e só calcula a distância de
+    edição para os nomes que compartilham alguma variante. O custo de uma
+    consulta depende do tamanho do termo, não da quantidade de nomes.
+    
+    A distância aceita cresce com o tamanho do termo (`_allowed_distance`),
+    para que termos curtos não virem sugestões aleatórias.
+    """
+    
+    def __init__(self, names: Iterable[str] = (), max_distance: int = 2, prefix_length: int = 7):
+        self.max_distance = max_distance
+        self.prefix_length = max(prefix_length, max_distance + 1)
+        
+        self._names: Set[str] = set()
+        # variante do prefixo -> nomes que a geram
+        self._deletes: Dict[str, List[str]] = {}
+        
+        self.add(names)
+    
+    def _variants(self, term: str, distance: int) -> Set[str]:
+        """Variantes do termo com até `distance` caracteres apagados"""
+        variants = {term}
+        frontier = {term}
+        for _ in range(distance):
+            frontier = {
+                variant[:i] + variant[i + 1:]
+                for variant in frontier if len(variant) > 1
+                for i in range(len(variant))
+            }
+            variants |= frontier
+        return variants
+    
+    def add(self, names: Iterable[str]) -> None:
+        """
+        Acrescenta nomes ao índice
+        
+        Args:
+            names: Nomes normalizados (minúsculas, sem espaços)
+        """
+        for name in names:
+            if not name or name in self._names:
+                continue
+            self._names.add(name)
+            for variant in self._variants(name[:self.prefix_length], self.max_distance):
+                self._deletes.setdefault(variant, []).append(name)
+    
+    def _allowed_distance(self, length: int) -> int:
+        """Distância máxima aceita para um termo deste tamanho"""
+        if length <= 3:
+            return 0
+        if length <= 5:
+            return min(1, self.max_distance)
+        return self.max_distance
+    
+    def lookup(self, term: str) -> Optional[Tuple[str, int]]:
+        """
+        Nome conhecido mais próximo do termo
+        
+        Empates de distância ficam com o nome que começa pela mesma letra,
+        depois com o de tamanho mais parecido e por fim com a ordem alfabética.
+        
+        Args:
+            term: Termo normalizado
+        
+        Returns:
+            Tupla (nome, distância) ou None se nenhum estiver perto o bastante
+        """
+        if not term:
+            return None
+        if term in self._names:
+            return term, 0
+        
+        allowed = self._allowed_distance(len(term))
+        if allowed == 0:
+            return None
+        
+        candidates = set()
+        for variant in self._variants(term[:self.prefix_length], allowed):
+            candidates.update(self._deletes.get(variant, ()))
+        
+        # Candidatos mais prováveis primeiro: o limite aperta mais cedo
+        length = len(term)
+        ordered = sorted(
+            (abs(len(name) - length), name[0] != term[0], name)
+            for name in candidates
+            if abs(len(name) - length) <= allowed
+        )
+        
+        best = None
+        best_key = None
+        for _, _, name in ordered:
+            distance = edit_distance(term, name, allowed)
+            if distance is None:
+                continue
+            key = (distance, name[0] != term[0], abs(len(name) - length), name)
+            if best_key is None or key < best_key:
+                best, best_key = name, key
+                # Limite mais justo para os candidatos restantes
+                allowed = distance
+        
+        return (best, best_key[0]) if best is not None else None
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._names
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def stats(self) -> Dict[str, int]:
+        """Tamanho do índice"""
+        return {
+            'names': len(self._names),
+            'variants': len(self._deletes)
+        }
@@ -0,0 +1,113 @@
+"""
+Busca de múltiplos padrões (nomes de casas e palavras-chave) com Aho–Corasick
+"""
+
+from typing import Dict, Iterable, List, Tuple
+
+class KeywordMatcher:
+    """
+    Autômato de Aho–Corasick construído uma única vez a partir de nomes
+    conhecidos e palavras-chave.
+    
+    A verificação de uma palavra percorre seus caracteres uma vez,
+    independentemente da quantidade de padrões cadastrados.
+    """
+    
+    def __init__(self, names: Iterable[str] = (), keywords: Iterable[str] = ()):
+        # Trie: transições, ligação de falha e profundidade de cada nó
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        # Nó termina um nome conhecido
+        self._is_name: List[bool] = [False]
+        # Menor palavra-chave que termina neste nó (incluindo a cadeia de falhas)
+        self._min_keyword: List[float] = [float('inf')]
+        
+        self.names = frozenset(name.lower() for name in names if name)
+        self.keywords = frozenset(keyword.lower() for keyword in keywords if keyword)
+        
+        for name in self.names:
+            self._is_name[self._insert(name)] = True
+        
+        for keyword in self.keywords:
+            node = self._insert(keyword)
+            self._min_keyword[node] = min(self._min_keyword[node], len(keyword))
+        
+        self._build_failure_links()
+    
+    def _insert(self, pattern: str) -> int:
+        """
+        Insere um padrão na trie
+        
+        Args:
+            pattern: Padrão em minúsculas
+        
+        Returns:
+            Índice do nó final do padrão
+        """
+        node = 0
+        for char in pattern:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[node] + 1)
+                self._is_name.append(False)
+                self._min_keyword.append(float('inf'))
+                self._goto[node][char] = next_node
+            node = next_node
+        return node
+    
+    def _build_failure_links(self) -> None:
+        """Calcula as ligações de falha em largura (BFS)"""
+        queue = list(self._goto[0].values())
+        
+        for node in queue:
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                
+                target = self._goto[fail].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._min_keyword[child] = min(
+                    self._min_keyword[child],
+                    self._min_keyword[self._fail[child]]
+                )
+                queue.append(child)
+    
+    def match_word(self, word: str) -> Tuple[bool, bool]:
+        """
+        Classifica uma palavra contra os padrões cadastrados
+        
+        Args:
+            word: Palavra em minúsculas
+        
+        Returns:
+            Tupla (known, has_keyword): se a palavra é um nome conhecido e se
+            contém uma palavra-chave menor que ela própria
+        """
+        goto = self._goto
+        fail = self._fail
+        min_keyword = self._min_keyword
+        length = len(word)
+        
+        node = 0
+        has_keyword = False
+        
+        for char in word:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            
+            if min_keyword[node] < length:
+                has_keyword = True
+        
+        # Sem nenhuma falha no caminho, o nó final corresponde à palavra inteira
+        known = self._depth[node] == length and self._is_name[node]
+        
+        return known, has_keyword
+    
+    def __len__(self) -> int:
+        return len(self.names) + len(self.keywords)
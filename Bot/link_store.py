@@ -0,0 +1,104 @@
+"""
+Links rastreados e totais de cliques em SQLite (substituto local da API para GeneratedLink)
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+class LinkStore:
+    """
+    Tabela código curto -> URL de destino e contagem de cliques por código
+    
+    O bot grava os links que gera e o servidor de redirecionamento os lê;
+    os dois podem ser processos diferentes usando o mesmo arquivo (WAL).
+    """
+    
+    def __init__(self, path: str, timeout: float = 30.0):
+        self.path = path
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS links ('
+            ' code TEXT PRIMARY KEY,'
+            ' target TEXT NOT NULL,'
+            ' user_id TEXT,'
+            ' created_at REAL NOT NULL)'
+        )
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS clicks ('
+            ' code TEXT PRIMARY KEY,'
+            ' count INTEGER NOT NULL)'
+        )
+        # Um código por usuário e destino: perfis recarregados reaproveitam o link
+        self._conn.execute(
+            'CREATE UNIQUE INDEX IF NOT EXISTS links_user_target ON links (user_id, target)'
+        )
+        self._conn.commit()
+    
+    def add(self, code: str, target: str, user_id: Optional[str] = None) -> None:
+        """
+        Registra um link
+        
+        Raises:
+            sqlite3.IntegrityError: Se o código, ou o destino para o usuário, já existir
+        """
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO links (code, target, user_id, created_at) VALUES (?, ?, ?, ?)',
+                (code, target, user_id, time.time())
+            )
+            self._conn.commit()
+    
+    def get(self, code: str) -> Optional[str]:
+        """URL de destino do código, ou None"""
+        with self._lock:
+            row = self._conn.execute('SELECT target FROM links WHERE code = ?', (code,)).fetchone()
+        return row[0] if row else None
+    
+    def find(self, user_id: Optional[str], target: str) -> Optional[str]:
+        """Código já criado para o usuário e destino, ou None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT code FROM links WHERE user_id IS ? AND target = ?', (user_id, target)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def items(self) -> Iterator[Tuple[str, str]]:
+        """Todos os pares (código, destino)"""
+        with self._lock:
+            rows = self._conn.execute('SELECT code, target FROM links').fetchall()
+        return iter(rows)
+    
+    def add_clicks(self, counts: Dict[str, int]) -> None:
+        """
+        Soma cliques aos totais, numa única transação
+        
+        Args:
+            counts: Código -> cliques a somar
+        """
+        with self._lock:
+            self._conn.executemany(
+                'INSERT INTO clicks (code, count) VALUES (?, ?)'
+                ' ON CONFLICT(code) DO UPDATE SET count = count + excluded.count',
+                counts.items()
+            )
+            self._conn.commit()
+    
+    def clicks(self, code: str) -> int:
+        """Total de cliques gravados para o código"""
+        with self._lock:
+            row = self._conn.execute('SELECT count FROM clicks WHERE code = ?', (code,)).fetchone()
+        return row[0] if row else 0
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM links').fetchone()[0]
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,397 @@
+"""
+Gerador de carga: reproduz updates sintéticos do Telegram contra o bot
+
+Modo aplicação (padrão): o bot roda neste processo com todos os handlers,
+o processador de updates e os limites de envio, mas a API do Telegram é
+substituída por um stub local que registra cada resposta. Os updates são
+injetados em taxa aberta (não esperam as respostas) em degraus crescentes,
+para encontrar o ponto de saturação: o primeiro degrau que termina com
+updates sem resposta ou com p99 acima de --latency-slo.
+
+Modo webhook (--webhook-url): envia o JSON dos updates por HTTP a um bot em
+modo webhook e mede status e latência das respostas do servidor.
+
+Uso:
+    MOCK_LATENCY_MS=40 MOCK_ERROR_RATE=0.02 python mock_api.py &
+    python load_test.py --rates 20,50,100,200 --duration 10 --workers 8
+    python load_test.py --webhook-url http://localhost:8443/telegram/webhook --secret troque_este_token
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from telegram import Update
+from telegram.request import BaseRequest, RequestData
+
+from benchmark import generate_message, percentile
+
+# Mistura de mensagens de um grupo típico
+MESSAGE_MIX = (('short', 0.70), ('forwarded', 0.15), ('noise', 0.10), ('url_dump', 0.05))
+
+class StubTelegramRequest(BaseRequest):
+    """
+    Camada HTTP da API do Telegram simulada
+    
+    Responde localmente a getMe, sendMessage e editMessageText (e `True`
+    aos demais métodos), com latência configurável, e avisa `on_send` a
+    cada mensagem enviada ou editada.
+    """
+    
+    def __init__(self, latency: float = 0.0, on_send: Optional[Callable[[int, str], None]] = None):
+        self.latency = latency
+        self.on_send = on_send
+        self._message_id = 0
+        self.calls: Dict[str, int] = defaultdict(int)
+    
+    @property
+    def read_timeout(self) -> Optional[float]:
+        """Sem timeout de leitura padrão"""
+        return None
+    
+    async def initialize(self) -> None:
+        """Nada a alocar"""
+    
+    async def shutdown(self) -> None:
+        """Nada a liberar"""
+    
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data: Optional[RequestData] = None,
+        read_timeout=None,
+        write_timeout=None,
+        connect_timeout=None,
+        pool_timeout=None
+    ) -> Tuple[int, bytes]:
+        """Responde à chamada da API do Telegram sem acessar a rede"""
+        endpoint = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        self.calls[endpoint] += 1
+        
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        
+        if endpoint == 'getMe':
+            result: Any = {'id': 1, 'is_bot': True, 'first_name': 'LoadTest', 'username': 'loadtest_bot'}
+        elif endpoint in ('sendMessage', 'editMessageText'):
+            chat_id = int(params['chat_id'])
+            if endpoint == 'sendMessage':
+                self._message_id += 1
+            result = {
+                'message_id': params.get('message_id', self._message_id),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'},
+                'text': params.get('text', '')
+            }
+            if self.on_send is not None:
+                self.on_send(chat_id, params.get('text', ''))
+        else:
+            result = True
+        
+        return 200, json.dumps({'ok': True, 'result': result}).encode('utf-8')
+
+class ReplyTracker:
+    """
+    Casa cada update injetado com a resposta final do bot no mesmo chat
+    
+    Como o bot responde às mensagens de um chat em ordem, a resposta final
+    de um chat corresponde ao update mais antigo ainda sem resposta. A
+    mensagem provisória "Verificando..." e as edições com resultados
+    parciais não contam como resposta final.
+    """
+    
+    def __init__(self, processing_prefix: str, pending_marker: Optional[str] = None):
+        self.processing_prefix = processing_prefix
+        self.pending_marker = pending_marker
+        self._pending: Dict[int, Deque[float]] = defaultdict(deque)
+        self.latencies: List[float] = []
+        self.first_sent: Optional[float] = None
+        self.last_sent: Optional[float] = None
+        self.sent = 0
+        self.unmatched = 0
+    
+    def injected(self, chat_id: int) -> None:
+        """Registra um update injetado no chat"""
+        self._pending[chat_id].append(time.perf_counter())
+    
+    def on_send(self, chat_id: int, text: str) -> None:
+        """Registra uma mensagem enviada pelo bot"""
+        self.sent += 1
+        if text.startswith(self.processing_prefix):
+            return
+        if self.pending_marker and self.pending_marker in text:
+            return
+        
+        queue = self._pending.get(chat_id)
+        if not queue:
+            self.unmatched += 1
+            return
+        
+        now = time.perf_counter()
+        self.latencies.append(now - queue.popleft())
+        self.first_sent = self.first_sent or now
+        self.last_sent = now
+    
+    @property
+    def outstanding(self) -> int:
+        """Updates injetados ainda sem resposta"""
+        return sum(len(queue) for queue in self._pending.values())
+    
+    def reset(self) -> None:
+        """Zera as medições para um novo degrau"""
+        self.latencies = []
+        self.first_sent = self.last_sent = None
+
+class UpdateFactory:
+    """Gera updates sintéticos de mensagens de texto"""
+    
+    def __init__(self, chats: int, group_ratio: float, seed: int):
+        self.rng = random.Random(seed)
+        self.chats = chats
+        self.group_ratio = group_ratio
+        self._update_id = 0
+        self._kinds = [kind for kind, _ in MESSAGE_MIX]
+        self._weights = [weight for _, weight in MESSAGE_MIX]
+    
+    def next(self) -> Dict[str, Any]:
+        """JSON de um update com uma mensagem de texto"""
+        self._update_id += 1
+        chat = self.rng.randrange(1, self.chats + 1)
+        is_group = self.rng.random() < self.group_ratio
+        kind = self.rng.choices(self._kinds, self._weights)[0]
+        return {
+            'update_id': self._update_id,
+            'message': {
+                'message_id': self._update_id,
+                'date': int(time.time()),
+                'chat': {'id': -chat if is_group else chat, 'type': 'group' if is_group else 'private'},
+                'from': {'id': chat, 'is_bot': False, 'first_name': f'Load{chat}'},
+                'text': generate_message(kind, self.rng)
+            }
+        }
+
+async def _paced(rate: float, duration: float, action: Callable[[], Any]) -> int:
+    """
+    Executa `action` em taxa aberta por `duration` segundos
+    
+    Returns:
+        Quantidade de execuções
+    """
+    total = int(rate * duration)
+    started = time.perf_counter()
+    for i in range(total):
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await action()
+    return total
+
+def _latency_summary(latencies: List[float]) -> Dict[str, Any]:
+    """Percentis de latência em milissegundos"""
+    if not latencies:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    return {
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'max_ms': round(max(latencies) * 1000, 1)
+    }
+
+async def run_application(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Degraus de carga contra o bot em processo, com a API do Telegram simulada"""
+    os.environ.setdefault('TELEGRAM_BOT_TOKEN', '0:loadtest')
+    os.environ['BOT_MODE'] = 'polling'
+    os.environ['METRICS_PORT'] = '0'
+    if args.workers:
+        os.environ['UPDATE_WORKERS'] = str(args.workers)
+    # Cópias continuam respondidas (da resposta guardada): toda mensagem tem resposta
+    os.environ['DEDUP_SUPPRESS'] = 'never'
+    if not args.keep_rate_limits:
+        # Sem limite por chat; envios ao Telegram com folga para medir o bot em si
+        os.environ['CHAT_RATE_LIMIT'] = '0'
+        os.environ['TELEGRAM_GLOBAL_SEND_RATE'] = '100000'
+        os.environ['TELEGRAM_CHAT_SEND_RATE'] = '100000'
+        os.environ['TELEGRAM_GROUP_SEND_RATE'] = '6000000'
+    
+    from bot import TelegramBetBot
+    from config import BOT_MESSAGES
+    
+    # Erros injetados na API gerariam um aviso por consulta
+    logging.getLogger().setLevel(logging.ERROR)
+    
+    tracker = ReplyTracker(
+        BOT_MESSAGES['processing'].split('{')[0],
+        BOT_MESSAGES['pending_results'].split('{')[0]
+    )
+    stub = StubTelegramRequest(latency=args.send_latency / 1000, on_send=tracker.on_send)
+    bot = TelegramBetBot()
+    application = bot.build_application(request=stub)
+    factory = UpdateFactory(args.chats, args.group_ratio, args.seed)
+    processor = bot.update_processor
+    
+    await application.initialize()
+    await bot.post_init(application)
+    await application.start()
+    
+    async def inject() -> None:
+        update = Update.de_json(factory.next(), application.bot)
+        tracker.injected(update.effective_chat.id)
+        await application.update_queue.put(update)
+    
+    steps = []
+    try:
+        for rate in args.rates:
+            tracker.reset()
+            failed_before = processor.failed
+            dropped_before = processor.dropped
+            started = time.perf_counter()
+            
+            offered = await _paced(rate, args.duration, inject)
+            injected_for = time.perf_counter() - started
+            
+            # Aguarda o bot esvaziar o que foi injetado
+            deadline = time.perf_counter() + args.drain
+            while tracker.outstanding and time.perf_counter() < deadline:
+                await asyncio.sleep(0.05)
+            
+            elapsed = (tracker.last_sent or time.perf_counter()) - started
+            completed = len(tracker.latencies)
+            achieved = completed / elapsed if elapsed > 0 else 0.0
+            step = {
+                'offered_rate': rate,
+                'offered': offered,
+                'injection_seconds': round(injected_for, 2),
+                'completed': completed,
+                'achieved_rate': round(achieved, 1),
+                'outstanding': tracker.outstanding,
+                'handler_errors': processor.failed - failed_before,
+                'dropped': processor.dropped - dropped_before,
+                **_latency_summary(tracker.latencies),
+                'saturated': tracker.outstanding > 0 or percentile(tracker.latencies or [0], 0.99) * 1000 > args.latency_slo
+            }
+            steps.append(step)
+            print(f"📈 {rate:>7.1f} upd/s -> {step}")
+            
+            if step['saturated'] and args.stop_on_saturation:
+                break
+    finally:
+        await application.stop()
+        await application.shutdown()
+        await bot.post_shutdown(application)
+    
+    print(f"📨 Chamadas à API do Telegram (stub): {dict(stub.calls)}")
+    return steps
+
+async def run_webhook(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Degraus de carga contra um bot em modo webhook já em execução"""
+    import httpx
+    
+    factory = UpdateFactory(args.chats, args.group_ratio, args.seed)
+    headers = {'X-Telegram-Bot-Api-Secret-Token': args.secret} if args.secret else {}
+    steps = []
+    
+    async with httpx.AsyncClient(timeout=10, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        for rate in args.rates:
+            statuses: Dict[str, int] = defaultdict(int)
+            latencies: List[float] = []
+            tasks = set()
+            
+            async def post(payload: Dict[str, Any]) -> None:
+                t0 = time.perf_counter()
+                try:
+                    response = await client.post(args.webhook_url, json=payload, headers=headers)
+                    statuses[str(response.status_code)] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - t0)
+            
+            async def inject() -> None:
+                task = asyncio.create_task(post(factory.next()))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            
+            offered = await _paced(rate, args.duration, inject)
+            if tasks:
+                await asyncio.gather(*tasks)
+            
+            accepted = statuses.get('200', 0)
+            step = {
+                'offered_rate': rate,
+                'offered': offered,
+                'statuses': dict(statuses),
+                'accepted_ratio': round(accepted / offered, 3) if offered else None,
+                **_latency_summary(latencies),
+                'saturated': accepted < offered
+            }
+            steps.append(step)
+            print(f"📈 {rate:>7.1f} upd/s -> {step}")
+            
+            if step['saturated'] and args.stop_on_saturation:
+                break
+    
+    return steps
+
+def main() -> int:
+    """Executa os degraus de carga e grava o relatório"""
+    parser = argparse.ArgumentParser(description='Teste de carga do bot com updates sintéticos')
+    parser.add_argument('--rates', default='10,25,50,100,200',
+                        type=lambda value: [float(rate) for rate in value.split(',')],
+                        help='taxas de updates por segundo, um degrau por taxa')
+    parser.add_argument('--duration', type=float, default=10, help='segundos de injeção por degrau')
+    parser.add_argument('--drain', type=float, default=30, help='segundos máximos para esvaziar cada degrau')
+    parser.add_argument('--chats', type=int, default=500, help='chats distintos')
+    parser.add_argument('--group-ratio', type=float, default=0.3, help='fração de mensagens vindas de grupos')
+    parser.add_argument('--workers', type=int, help='UPDATE_WORKERS do bot (modo aplicação)')
+    parser.add_argument('--send-latency', type=float, default=30, help='latência simulada da API do Telegram, em ms')
+    parser.add_argument('--keep-rate-limits', action='store_true',
+                        help='manter os limites de taxa do .env (updates recusados ficam sem resposta)')
+    parser.add_argument('--webhook-url', help='enviar os updates a um bot em modo webhook')
+    parser.add_argument('--secret', help='secret token do webhook')
+    parser.add_argument('--concurrency', type=int, default=100, help='conexões simultâneas no modo webhook')
+    parser.add_argument('--latency-slo', type=float, default=2000,
+                        help='p99 de latência (ms) acima do qual o degrau é considerado saturado')
+    parser.add_argument('--stop-on-saturation', action='store_true', help='parar no primeiro degrau saturado')
+    parser.add_argument('--seed', type=int, default=42, help='semente dos updates')
+    parser.add_argument('--output', help='arquivo JSON para gravar os resultados')
+    args = parser.parse_args()
+    
+    load_dotenv()
+    if not os.getenv('API_BASE_URL'):
+        os.environ['API_BASE_URL'] = 'http://localhost:5000'
+    
+    if args.webhook_url:
+        print(f"🌐 Modo webhook: {args.webhook_url}")
+        steps = asyncio.run(run_webhook(args))
+    else:
+        print(f"🤖 Modo aplicação contra a API {os.environ['API_BASE_URL']}")
+        steps = asyncio.run(run_application(args))
+    
+    saturated = [step['offered_rate'] for step in steps if step['saturated']]
+    if saturated:
+        print(f"\n🚧 Saturação a partir de {saturated[0]:.1f} updates/s")
+    else:
+        print("\n✅ Nenhum degrau saturou")
+    
+    if args.output:
+        report = {
+            'meta': {key: value for key, value in vars(args).items() if key != 'secret'},
+            'steps': steps
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados gravados em {args.output}")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Deduplicação de mensagens repetidas (encaminhamentos e repostagens em grupos)
+"""
+
+import hashlib
+import re
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from cache import TTLCache
+
+# Quando repetições no mesmo chat ficam sem resposta
+SUPPRESS_POLICIES = ('never', 'groups', 'always')
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+class MessageDeduplicator:
+    """
+    Reaproveita respostas já formatadas para mensagens repetidas
+    
+    Por `window` segundos, duas chaves levam à mesma resposta: o hash do
+    texto normalizado (cópias exatas nem passam pela extração de domínios)
+    e o conjunto de domínios encontrados (textos diferentes que citam as
+    mesmas casas). Repetições no mesmo chat podem ficar sem resposta conforme
+    `suppress`: 'never', 'groups' (só em grupos) ou 'always'.
+    """
+    
+    def __init__(
+        self,
+        window: float = 60.0,
+        max_entries: int = 4096,
+        suppress: str = 'groups',
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if suppress not in SUPPRESS_POLICIES:
+            raise ValueError(f"Política de repetição deve ser uma de {SUPPRESS_POLICIES}")
+        self.window = window
+        self.suppress = suppress
+        
+        # chave do texto ou dos domínios -> (chave dos domínios, resposta, casas encontradas)
+        self._responses = TTLCache(max_size=max_entries, clock=clock)
+        # (chat, chave dos domínios) respondidos dentro da janela
+        self._sent = TTLCache(max_size=max_entries, clock=clock)
+        
+        self.text_hits = 0
+        self.domain_hits = 0
+        self.suppressed = 0
+    
+    @staticmethod
+    def text_key(text: str) -> Tuple[str, str]:
+        """Chave do texto: hash sem diferenças de caixa e espaçamento"""
+        normalized = _WHITESPACE_RE.sub(' ', text.lower()).strip()
+        return 'text', hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def domains_key(domains: Iterable[str]) -> Tuple[str, ...]:
+        """Chave do conjunto de domínios, independente da ordem e de repetições"""
+        return ('domains',) + tuple(sorted(set(domains)))
+    
+    def cached(self, key: Hashable) -> Optional[Tuple[Tuple[str, ...], str, List[Dict[str, Any]]]]:
+        """
+        Resposta já formatada para a chave
+        
+        Args:
+            key: Chave de text_key ou domains_key
+        
+        Returns:
+            Tupla (chave dos domínios, resposta, casas encontradas) ou None
+        """
+        entry = self._responses.get(key)
+        if entry is not None:
+            if key[0] == 'text':
+                self.text_hits += 1
+            else:
+                self.domain_hits += 1
+        return entry
+    
+    def remember(
+        self,
+        text_key: Optional[Hashable],
+        domains_key: Tuple[str, ...],
+        response: str,
+        houses: List[Dict[str, Any]] = ()
+    ) -> None:
+        """
+        Guarda a resposta formatada sob as duas chaves
+        
+        Args:
+            text_key: Chave do texto (None para guardar só a dos domínios)
+            domains_key: Chave dos domínios
+            response: Resposta enviada, sem a parte própria de cada usuário
+            houses: Dados das casas encontradas, para montar essa parte
+        """
+        entry = (domains_key, response, list(houses))
+        self._responses.set(domains_key, entry, ttl=self.window)
+        if text_key is not None:
+            self._responses.set(text_key, entry, ttl=self.window)
+    
+    def mark_sent(self, chat_id: Any, domains_key: Tuple[str, ...]) -> None:
+        """Registra que o chat recebeu a resposta para esses domínios"""
+        self._sent.set((chat_id, domains_key), True, ttl=self.window)
+    
+    def should_suppress(self, chat_id: Any, is_group: bool, domains_key: Tuple[str, ...]) -> bool:
+        """
+        Se a resposta repetida deve ficar sem envio neste chat
+        
+        Args:
+            chat_id: Chat da mensagem
+            is_group: Se o chat é um grupo
+            domains_key: Chave dos domínios da resposta
+        
+        Returns:
+            True se o chat já recebeu a mesma resposta dentro da janela e a
+            política silencia repetições nele; caso contrário registra o envio
+        """
+        applies = self.suppress == 'always' or (self.suppress == 'groups' and is_group)
+        if applies and self._sent.get((chat_id, domains_key)) is not None:
+            self.suppressed += 1
+            return True
+        
+        self.mark_sent(chat_id, domains_key)
+        return False
+    
+    def stats(self) -> Dict[str, Any]:
+        """Respostas reaproveitadas e repetições silenciadas"""
+        return {
+            'responses': len(self._responses),
+            'text_hits': self.text_hits,
+            'domain_hits': self.domain_hits,
+            'suppressed': self.suppressed
+        }
@@ -0,0 +1,278 @@
+"""
+Métricas de latência e contadores no formato de exposição de texto do Prometheus
+"""
+
+import abc
+import bisect
+import logging
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Limites padrão dos histogramas de latência, em segundos
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+def _escape(value: Any) -> str:
+    """Escapa um valor de label"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: Optional[Tuple[str, str]] = None) -> str:
+    """Monta o trecho {a="1",b="2"} de uma amostra"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value: float) -> str:
+    """Formata um valor numérico"""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric(abc.ABC):
+    """Base das métricas: nome, ajuda e labels"""
+    
+    type_name = 'untyped'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+    
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        """Valores dos labels na ordem declarada"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Labels de {self.name} devem ser {self.labelnames}, recebido {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+    
+    @abc.abstractmethod
+    def samples(self) -> List[str]:
+        """Linhas de amostra da métrica"""
+    
+    def render(self) -> str:
+        """Bloco HELP/TYPE seguido das amostras"""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}'
+        ]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+class Counter(Metric):
+    """Contador monotônico"""
+    
+    type_name = 'counter'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        """Incrementa o contador"""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels) -> float:
+        """Valor atual do contador"""
+        return self._values.get(self._key(labels), 0)
+    
+    def samples(self) -> List[str]:
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(self._values.items())
+        ]
+
+class Histogram(Metric):
+    """Histograma com buckets cumulativos, soma e contagem"""
+    
+    type_name = 'histogram'
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket (não cumulativa, +Inf no fim), soma]
+        self._values: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, **labels) -> None:
+        """Registra uma observação"""
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+    
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Mede a duração do bloco, em segundos"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+    
+    def count(self, **labels) -> int:
+        """Quantidade de observações"""
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+class CallbackMetric(Metric):
+    """
+    Métrica lida de outro componente no momento da coleta
+    
+    A função devolve um número, ou um dicionário de tuplas de valores de
+    labels para números. Serve para expor contadores que os componentes já
+    mantêm (cache, processador de updates, limitadores) sem duplicá-los.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        function: Callable[[], Union[float, Dict[Tuple[str, ...], float]]],
+        labelnames: Sequence[str] = (),
+        type_name: str = 'gauge'
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.function = function
+        self.type_name = type_name
+    
+    def samples(self) -> List[str]:
+        values = self.function()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in sorted(values.items())
+            if value is not None
+        ]
+
+class MetricsRegistry:
+    """Conjunto de métricas exportadas juntas"""
+    
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        """
+        Registra uma métrica
+        
+        Args:
+            metric: Métrica a registrar
+        
+        Returns:
+            A própria métrica
+        
+        Raises:
+            ValueError: Se já houver outra métrica com o mesmo nome
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica já registrada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def unregister(self, name: str) -> None:
+        """Remove uma métrica pelo nome"""
+        self._metrics.pop(name, None)
+    
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Cria e registra um contador"""
+        return self.register(Counter(name, documentation, labelnames))
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Cria e registra um histograma"""
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+    
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        function: Callable[[], Union[float, Dict[Tuple[str, ...], float]]],
+        labelnames: Sequence[str] = (),
+        type_name: str = 'gauge'
+    ) -> CallbackMetric:
+        """
+        Cria e registra uma métrica lida por função
+        
+        Uma métrica de mesmo nome é substituída, para que uma nova instância do
+        componente passe a ser a exportada.
+        """
+        self.unregister(name)
+        return self.register(CallbackMetric(name, documentation, function, labelnames, type_name))
+    
+    def render(self) -> str:
+        """Todas as métricas no formato de exposição de texto"""
+        blocks = []
+        for metric in self._metrics.values():
+            try:
+                blocks.append(metric.render())
+            except Exception as e:
+                logger.error(f"Erro ao coletar métrica {metric.name}: {e}")
+        return '\n'.join(blocks) + '\n'
+
+# Registro padrão do processo
+REGISTRY = MetricsRegistry()
+
+class MetricsServer:
+    """Servidor HTTP local que expõe `GET /metrics`"""
+    
+    def __init__(self, registry: MetricsRegistry = REGISTRY, listen: str = '127.0.0.1', port: int = 9100):
+        self.registry = registry
+        self.listen = listen
+        self.port = port
+        
+        self.app = web.Application()
+        self.app.router.add_get('/metrics', self.handle_metrics)
+        self._runner: Optional[web.AppRunner] = None
+    
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Responde com as métricas atuais"""
+        return web.Response(body=self.registry.render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+    
+    async def start(self) -> None:
+        """Inicia o servidor HTTP"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.listen, self.port)
+        await site.start()
+        logger.info(f"Métricas disponíveis em http://{self.listen}:{self.port}/metrics")
+    
+    async def stop(self) -> None:
+        """Encerra o servidor HTTP"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
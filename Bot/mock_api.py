@@ -1,17 +1,57 @@
 """
 API Mock para testes do bot
 Execute este script para simular uma API de casas de apostas
+
+Servidor assíncrono (aiohttp) com índices em memória, capaz de servir
+dezenas de milhares de casas sintéticas, e injeção de latência, erros e
+timeouts por rota para testes de carga do cliente, do cache e do circuit
+breaker do bot.
+
+Uso:
+    python mock_api.py                              # 7 casas reais de exemplo
+    python mock_api.py --synthetic 50000            # + 50 mil casas sintéticas
+    MOCK_LATENCY_MS=40 MOCK_ERROR_RATE=0.02 python mock_api.py
+    MOCK_ROUTE_FAULTS='{"check": {"latency_ms": 80, "timeout_rate": 0.01}}' python mock_api.py
+
+As falhas também podem ser alteradas com o servidor rodando:
+    curl -X PUT localhost:5000/admin/faults -d '{"batch": {"error_rate": 1}}'
 """
 
-from flask import Flask, jsonify, request
+import argparse
+import asyncio
+import bisect
+import json
 import logging
+import math
+import os
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
 
-app = Flask(__name__)
+from aiohttp import web
+
+from search_index import SearchIndex
 
 # Configurar logging
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=os.getenv('MOCK_LOG_LEVEL', 'INFO').upper())
 logger = logging.getLogger(__name__)
 
+# Limite de nomes por consulta em lote
+MAX_BATCH_SIZE = 100
+
+# Casas por página da listagem paginada (máximo aceito em `limit`)
+MAX_LIST_PAGE_SIZE = 5000
+
+# Resultados por busca (padrão e máximo aceito em `limit`)
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 500
+
+ROUTES = ('check', 'batch', 'list', 'search', 'clicks', 'affiliate')
+LATENCY_DISTRIBUTIONS = ('fixed', 'normal', 'exponential', 'lognormal')
+
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]')
+
 # Base de dados simulada de casas de apostas
 BETTING_HOUSES = {
     'bet365': {
@@ -79,85 +119,552 @@ BETTING_HOUSES = {
     }
 }
 
-@app.route('/betting-houses/<house_name>', methods=['GET'])
-def check_betting_house(house_name):
+# Campos de controle usados na sincronização incremental (Id/UpdatedAt da API)
+for house_key, house in BETTING_HOUSES.items():
+    house.setdefault('id', house_key)
+    house.setdefault('updatedAt', '2025-07-24T21:30:51Z')
+
+# Partes dos nomes das casas sintéticas
+_NAME_PREFIXES = (
+    'mega', 'super', 'top', 'lucky', 'gol', 'star', 'king', 'vip', 'pix', 'turbo',
+    'ultra', 'prime', 'royal', 'gold', 'fast', 'max', 'bola', 'sorte', 'rei', 'alpha'
+)
+_NAME_SUFFIXES = ('bet', 'win', 'sport', 'casino', 'play', 'odds', 'aposta', 'jogo', 'slots', 'tips')
+_TLDS = ('.com', '.bet.br', '.com.br', '.net', '.io', '.bet')
+_COUNTRIES = ('Brasil', 'Malta', 'Curacao', 'Reino Unido', 'Gibraltar', 'Chipre', 'Isle of Man')
+_LICENSES = (
+    'Malta Gaming Authority', 'Curacao eGaming', 'UK Gambling Commission',
+    'Secretaria de Prêmios e Apostas', 'Gibraltar Gambling Commissioner'
+)
+
+def normalize_key(value: str) -> str:
+    """Chave de busca: minúsculas, apenas letras e números"""
+    return _NON_ALNUM_RE.sub('', str(value).lower())
+
+def generate_synthetic_houses(count: int, seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    """
+    Gera casas de apostas sintéticas com nomes únicos
+    
+    Args:
+        count: Quantidade de casas
+        seed: Semente do gerador
+    
+    Returns:
+        Dicionário chave -> casa, no formato de BETTING_HOUSES
+    """
+    rng = random.Random(seed)
+    now = datetime(2025, 7, 24, tzinfo=timezone.utc)
+    houses = {}
+    
+    for i in range(count):
+        base = rng.choice(_NAME_PREFIXES) + rng.choice(_NAME_SUFFIXES)
+        # Sufixo numérico garante nomes únicos em catálogos grandes
+        key = base if base not in houses and base not in BETTING_HOUSES else f'{base}{i}'
+        domain = key + rng.choice(_TLDS)
+        updated_at = now - timedelta(seconds=rng.randrange(365 * 24 * 3600))
+        
+        houses[key] = {
+            'id': f'syn-{i}',
+            'name': key.capitalize(),
+            'domain': domain,
+            'license': rng.choice(_LICENSES),
+            'country': rng.choice(_COUNTRIES),
+            'status': 'Ativo' if rng.random() < 0.9 else 'Suspenso',
+            'website': f'https://www.{domain}',
+            'founded': str(rng.randint(1995, 2024)),
+            'updatedAt': updated_at.strftime('%Y-%m-%dT%H:%M:%SZ')
+        }
+    
+    return houses
+
+class BettingHouseStore:
+    """Casas de apostas em memória com índices por chave, data de atualização e busca"""
+    
+    def __init__(self, houses: Dict[str, Dict[str, Any]]):
+        self._houses = list(houses.values())
+        
+        # Nome, chave original e domínio sem TLD levam ao mesmo registro
+        self._by_key: Dict[str, Dict[str, Any]] = {}
+        for key, house in houses.items():
+            for alias in (key, house['name'], house['domain'].split('.')[0]):
+                self._by_key.setdefault(normalize_key(alias), house)
+        
+        # Ordenado por updatedAt para a sincronização incremental
+        self._by_updated = sorted(self._houses, key=lambda house: house['updatedAt'])
+        self._updated_keys = [house['updatedAt'] for house in self._by_updated]
+        
+        # Trigramas e prefixos de nome, domínio e país para /search
+        self._search = SearchIndex()
+        self._search.build(houses.items())
+        
+        # Ordem estável por nome para a listagem paginada; o cursor é a chave
+        # da última casa da página, então inclusões não deslocam as páginas
+        self._by_name = sorted(self._houses, key=self._cursor_key)
+        self._name_keys = [self._cursor_key(house) for house in self._by_name]
+        
+        # A lista completa é a resposta mais pesada: serializada uma única vez
+        self.full_list_body = json.dumps(self._houses, ensure_ascii=False).encode('utf-8')
+    
+    def __len__(self) -> int:
+        return len(self._houses)
+    
+    @staticmethod
+    def _cursor_key(house: Dict[str, Any]) -> str:
+        """Posição da casa na listagem paginada ('!' ordena antes de letras e números)"""
+        return f"{normalize_key(house['name'])}!{house.get('id', '')}"
+    
+    def page(self, cursor: Optional[str], limit: int, updated_since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Página da listagem em ordem de nome
+        
+        Args:
+            cursor: `next_cursor` da página anterior (None para a primeira)
+            limit: Casas por página
+            updated_since: Se informado, apenas casas alteradas após esta data
+        
+        Returns:
+            Dicionário com `items`, `next_cursor` (None na última página) e `total`
+        """
+        if updated_since:
+            # Alterações recentes são poucas: ordenadas a cada requisição
+            houses = sorted(self.changed_since(updated_since), key=self._cursor_key)
+            keys = [self._cursor_key(house) for house in houses]
+        else:
+            houses, keys = self._by_name, self._name_keys
+        
+        start = bisect.bisect_right(keys, cursor) if cursor else 0
+        end = start + limit
+        return {
+            'items': houses[start:end],
+            'next_cursor': keys[end - 1] if end < len(houses) else None,
+            'total': len(houses)
+        }
+    
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Casa pelo nome, chave ou domínio"""
+        return self._by_key.get(normalize_key(name))
+    
+    def changed_since(self, updated_since: str) -> List[Dict[str, Any]]:
+        """Casas alteradas depois da data informada"""
+        return self._by_updated[bisect.bisect_right(self._updated_keys, updated_since):]
+    
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """Casas cujo nome, domínio ou país contém o termo, das mais relevantes"""
+        return self._search.search(query, limit)
+    
+    def keys(self) -> List[str]:
+        """Chaves das casas, na ordem de cadastro"""
+        return [normalize_key(house['name']) for house in self._houses]
+
+class RouteFaults:
+    """
+    Falhas simuladas de uma rota
+    
+    - `latency_ms`/`jitter_ms`/`distribution`: atraso de cada resposta
+      (fixed, normal, exponential ou lognormal)
+    - `error_rate`: fração das respostas com 503
+    - `timeout_rate`: fração das requisições que ficam `timeout_seconds`
+      sem resposta e depois recebem 504
+    """
+    
+    FIELDS = ('latency_ms', 'jitter_ms', 'distribution', 'error_rate', 'timeout_rate', 'timeout_seconds')
+    
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        distribution: str = 'normal',
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_seconds: float = 30.0
+    ):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Distribuição deve ser uma de {LATENCY_DISTRIBUTIONS}")
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.distribution = distribution
+        self.error_rate = float(error_rate)
+        self.timeout_rate = float(timeout_rate)
+        self.timeout_seconds = float(timeout_seconds)
+    
+    def updated(self, changes: Dict[str, Any]) -> 'RouteFaults':
+        """
+        Cópia com os campos informados alterados
+        
+        Raises:
+            ValueError: Se houver campo desconhecido ou valor inválido
+        """
+        unknown = set(changes) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Campos desconhecidos: {sorted(unknown)}")
+        return RouteFaults(**{**self.to_dict(), **changes})
+    
+    def delay(self, rng: random.Random) -> float:
+        """Atraso sorteado para uma resposta, em segundos"""
+        mean, jitter = self.latency_ms, self.jitter_ms
+        if mean <= 0 and jitter <= 0:
+            return 0.0
+        
+        if self.distribution == 'fixed':
+            delay = mean
+        elif self.distribution == 'exponential':
+            delay = rng.expovariate(1 / mean) if mean > 0 else 0.0
+        elif self.distribution == 'lognormal' and mean > 0:
+            # Parâmetros escolhidos para que média e desvio sejam os configurados
+            sigma = math.sqrt(math.log(1 + (jitter / mean) ** 2))
+            mu = math.log(mean) - sigma ** 2 / 2
+            delay = rng.lognormvariate(mu, sigma)
+        else:
+            delay = rng.gauss(mean, jitter)
+        
+        return max(0.0, delay) / 1000
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Campos da configuração"""
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+class ClickTotals:
+    """Cliques recebidos por código curto e escritas em lote que os trouxeram"""
+    
+    def __init__(self):
+        self.clicks: Dict[str, int] = {}
+        self.writes = 0
+    
+    def add(self, counts: Dict[str, int]) -> None:
+        """Soma um lote de contagens"""
+        for code, count in counts.items():
+            self.clicks[code] = self.clicks.get(code, 0) + count
+        self.writes += 1
+
+# Estado da aplicação; objetos mutáveis criados em create_app e alterados no
+# lugar, pois o aiohttp não permite trocar o estado de uma aplicação iniciada
+STORE_KEY = web.AppKey('store', BettingHouseStore)
+FAULTS_KEY = web.AppKey('faults', Dict[str, RouteFaults])
+RNG_KEY = web.AppKey('rng', random.Random)
+CLICKS_KEY = web.AppKey('clicks', ClickTotals)
+AFFILIATE_PROFILES_KEY = web.AppKey('affiliate_profiles', Dict[str, Dict[str, Any]])
+
+def load_faults_from_env() -> Dict[str, RouteFaults]:
+    """
+    Lê a configuração de falhas das variáveis de ambiente
+    
+    MOCK_LATENCY_MS, MOCK_LATENCY_JITTER_MS, MOCK_LATENCY_DISTRIBUTION,
+    MOCK_ERROR_RATE, MOCK_TIMEOUT_RATE e MOCK_TIMEOUT_SECONDS valem para todas
+    as rotas; MOCK_ROUTE_FAULTS (JSON rota -> campos) sobrescreve por rota.
+    """
+    base = RouteFaults(
+        latency_ms=float(os.getenv('MOCK_LATENCY_MS', '0')),
+        jitter_ms=float(os.getenv('MOCK_LATENCY_JITTER_MS', '0')),
+        distribution=os.getenv('MOCK_LATENCY_DISTRIBUTION', 'normal'),
+        error_rate=float(os.getenv('MOCK_ERROR_RATE', '0')),
+        timeout_rate=float(os.getenv('MOCK_TIMEOUT_RATE', '0')),
+        timeout_seconds=float(os.getenv('MOCK_TIMEOUT_SECONDS', '30'))
+    )
+    faults = {route: base for route in ROUTES}
+    
+    overrides = json.loads(os.getenv('MOCK_ROUTE_FAULTS') or '{}')
+    for route, changes in overrides.items():
+        if route not in faults:
+            raise ValueError(f"Rota desconhecida em MOCK_ROUTE_FAULTS: {route}")
+        faults[route] = faults[route].updated(changes)
+    
+    return faults
+
+@web.middleware
+async def fault_injection(request: web.Request, handler):
+    """Aplica latência, erros e timeouts configurados às rotas de casas de apostas"""
+    route = request.match_info.route.name
+    faults = request.app[FAULTS_KEY].get(route)
+    if faults is None:
+        return await handler(request)
+    
+    rng = request.app[RNG_KEY]
+    if faults.timeout_rate and rng.random() < faults.timeout_rate:
+        await asyncio.sleep(faults.timeout_seconds)
+        return web.json_response({'error': 'Timeout simulado'}, status=504)
+    
+    delay = faults.delay(rng)
+    if delay:
+        await asyncio.sleep(delay)
+    
+    if faults.error_rate and rng.random() < faults.error_rate:
+        return web.json_response({'error': 'Falha simulada'}, status=503)
+    
+    return await handler(request)
+
+async def check_betting_house(request: web.Request) -> web.Response:
     """Endpoint para verificar uma casa de apostas específica"""
-    logger.info(f"Verificando casa de apostas: {house_name}")
+    house_name = request.match_info['house_name']
+    logger.debug(f"Verificando casa de apostas: {house_name}")
+    
+    house = request.app[STORE_KEY].get(house_name)
+    if house is not None:
+        return web.json_response(house)
+    return web.json_response({'error': f'Casa de apostas "{house_name}" não encontrada'}, status=404)
+
+async def batch_check_betting_houses(request: web.Request) -> web.Response:
+    """Endpoint para verificar várias casas de apostas em uma requisição"""
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = {}
+    names = payload.get('names') if isinstance(payload, dict) else None
+    
+    if not isinstance(names, list):
+        return web.json_response({'error': 'Corpo deve conter a lista "names"'}, status=400)
     
-    # Converter para lowercase para busca
-    house_name_lower = house_name.lower()
+    if len(names) > MAX_BATCH_SIZE:
+        return web.json_response({'error': f'Máximo de {MAX_BATCH_SIZE} nomes por requisição'}, status=400)
     
-    if house_name_lower in BETTING_HOUSES:
-        return jsonify(BETTING_HOUSES[house_name_lower]), 200
-    else:
-        return jsonify({'error': f'Casa de apostas "{house_name}" não encontrada'}), 404
+    logger.debug(f"Verificando lote com {len(names)} casas de apostas")
+    
+    # Nomes não encontrados retornam null
+    store = request.app[STORE_KEY]
+    return web.json_response({'results': {name: store.get(str(name)) for name in names}})
 
-@app.route('/betting-houses', methods=['GET'])
-def list_betting_houses():
+async def list_betting_houses(request: web.Request) -> web.Response:
     """Endpoint para listar todas as casas de apostas"""
-    logger.info("Listando todas as casas de apostas")
+    updated_since = request.query.get('updated_since')
+    logger.debug(f"Listando casas de apostas (alteradas desde: {updated_since or 'sempre'})")
+    
+    store = request.app[STORE_KEY]
+    
+    # Com `limit`: uma página em ordem de nome, continuada por `cursor`
+    if 'limit' in request.query:
+        try:
+            limit = int(request.query['limit'])
+        except ValueError:
+            return web.json_response({'error': 'Parâmetro "limit" deve ser um inteiro'}, status=400)
+        limit = max(1, min(limit, MAX_LIST_PAGE_SIZE))
+        return web.json_response(store.page(request.query.get('cursor'), limit, updated_since))
     
-    houses_list = list(BETTING_HOUSES.values())
-    return jsonify(houses_list), 200
+    # Sincronização incremental: apenas casas alteradas após a data informada
+    if updated_since:
+        return web.json_response(store.changed_since(updated_since))
+    
+    return web.Response(body=store.full_list_body, content_type='application/json')
 
-@app.route('/betting-houses/search', methods=['GET'])
-def search_betting_houses():
+async def search_betting_houses(request: web.Request) -> web.Response:
     """Endpoint para buscar casas de apostas por termo"""
-    query = request.args.get('q', '').lower()
-    logger.info(f"Buscando casas de apostas com termo: {query}")
+    query = request.query.get('q', '').strip().lower()
+    logger.debug(f"Buscando casas de apostas com termo: {query}")
     
     if not query:
-        return jsonify({'error': 'Parâmetro "q" é obrigatório'}), 400
+        return web.json_response({'error': 'Parâmetro "q" é obrigatório'}, status=400)
+    
+    try:
+        limit = int(request.query.get('limit', DEFAULT_SEARCH_LIMIT))
+    except ValueError:
+        return web.json_response({'error': 'Parâmetro "limit" deve ser um inteiro'}, status=400)
+    limit = max(1, min(limit, MAX_SEARCH_LIMIT))
     
-    # Buscar casas que contenham o termo no nome ou domínio
-    results = []
-    for house in BETTING_HOUSES.values():
-        if (query in house['name'].lower() or 
-            query in house['domain'].lower() or
-            query in house.get('country', '').lower()):
-            results.append(house)
+    return web.json_response(request.app[STORE_KEY].search(query, limit))
+
+async def record_clicks(request: web.Request) -> web.Response:
+    """Soma cliques por código curto (GeneratedLink.Clicks)"""
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = {}
+    counts = payload.get('clicks') if isinstance(payload, dict) else None
+    
+    if not isinstance(counts, dict) or not all(isinstance(count, int) and count > 0 for count in counts.values()):
+        return web.json_response({'error': 'Corpo deve conter "clicks": {código: quantidade}'}, status=400)
     
-    return jsonify(results), 200
+    request.app[CLICKS_KEY].add(counts)
+    return web.json_response({'updated': len(counts)})
+
+async def get_clicks(request: web.Request) -> web.Response:
+    """Totais de cliques recebidos"""
+    totals = request.app[CLICKS_KEY]
+    return web.json_response({
+        'writes': totals.writes,
+        'clicks': totals.clicks
+    })
 
-@app.route('/health', methods=['GET'])
-def health_check():
+async def get_affiliate_profile(request: web.Request) -> web.Response:
+    """Códigos de afiliado e UTMs do usuário vinculado ao Telegram"""
+    telegram_id = request.match_info['telegram_id']
+    profile = request.app[AFFILIATE_PROFILES_KEY].get(telegram_id)
+    if profile is None:
+        return web.json_response({'error': f'Usuário do Telegram {telegram_id} sem perfil de afiliado'}, status=404)
+    return web.json_response(profile)
+
+async def put_affiliate_profile(request: web.Request) -> web.Response:
+    """
+    Cria ou substitui o perfil de afiliado de um usuário
+    
+    Corpo: {"affiliateCodes": [{"bookmakerId", "bookmakerName", "code"}], "utms": [{"name", "value", "source", "medium", "campaign"}]}
+    """
+    telegram_id = request.match_info['telegram_id']
+    try:
+        payload = await request.json()
+    except ValueError:
+        payload = None
+    if not isinstance(payload, dict):
+        return web.json_response({'error': 'Corpo deve ser um objeto JSON'}, status=400)
+    
+    profile = {
+        'telegramId': telegram_id,
+        'userId': payload.get('userId') or f'user-{telegram_id}',
+        'affiliateCodes': payload.get('affiliateCodes') or [],
+        'utms': payload.get('utms') or [],
+        # Microssegundos: alterações no mesmo segundo não se confundem na sincronização
+        'updatedAt': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    }
+    request.app[AFFILIATE_PROFILES_KEY][telegram_id] = profile
+    return web.json_response(profile)
+
+async def list_affiliate_profile_changes(request: web.Request) -> web.Response:
+    """Perfis de afiliado alterados depois de `updated_since`"""
+    updated_since = request.query.get('updated_since') or ''
+    return web.json_response([
+        {'telegramId': profile['telegramId'], 'userId': profile['userId'], 'updatedAt': profile['updatedAt']}
+        for profile in request.app[AFFILIATE_PROFILES_KEY].values()
+        if profile['updatedAt'] > updated_since
+    ])
+
+async def health_check(request: web.Request) -> web.Response:
     """Endpoint de health check"""
-    return jsonify({
+    return web.json_response({
         'status': 'OK',
         'message': 'API Mock funcionando',
-        'total_houses': len(BETTING_HOUSES)
-    }), 200
+        'total_houses': len(request.app[STORE_KEY])
+    })
+
+async def get_faults(request: web.Request) -> web.Response:
+    """Configuração atual de falhas por rota"""
+    return web.json_response({route: faults.to_dict() for route, faults in request.app[FAULTS_KEY].items()})
 
-@app.route('/', methods=['GET'])
-def home():
+async def update_faults(request: web.Request) -> web.Response:
+    """
+    Altera as falhas com o servidor rodando
+    
+    Corpo: {"rota": {campos}}; a rota "*" altera todas.
+    """
+    try:
+        changes = await request.json()
+        faults = dict(request.app[FAULTS_KEY])
+        for route, route_changes in changes.items():
+            targets = ROUTES if route == '*' else (route,)
+            for target in targets:
+                if target not in faults:
+                    raise ValueError(f"Rota desconhecida: {target}")
+                faults[target] = faults[target].updated(route_changes)
+    except (ValueError, TypeError, AttributeError) as e:
+        return web.json_response({'error': str(e)}, status=400)
+    
+    # Todas as rotas validadas: aplica de uma vez no dicionário da aplicação
+    request.app[FAULTS_KEY].update(faults)
+    logger.info(f"Falhas simuladas alteradas: {changes}")
+    return await get_faults(request)
+
+async def home(request: web.Request) -> web.Response:
     """Endpoint raiz com informações da API"""
-    return jsonify({
+    store = request.app[STORE_KEY]
+    return web.json_response({
         'message': 'API Mock - Casas de Apostas',
-        'version': '1.0',
+        'version': '2.0',
         'endpoints': {
             'check_house': '/betting-houses/{house_name}',
-            'list_houses': '/betting-houses',
-            'search_houses': '/betting-houses/search?q={query}',
+            'list_houses': '/betting-houses?updated_since={iso_date}',
+            'list_houses_page': '/betting-houses?limit={limit}&cursor={next_cursor}',
+            'search_houses': '/betting-houses/search?q={query}&limit={limit}',
+            'batch_check_houses': 'POST /betting-houses/batch',
+            'record_clicks': 'GET|POST /generated-links/clicks',
+            'affiliate_profile': 'GET|PUT /affiliate-profiles/{telegram_id}',
+            'affiliate_profile_changes': '/affiliate-profiles?updated_since={iso_date}',
+            'faults': 'GET|PUT /admin/faults',
             'health': '/health'
         },
-        'total_houses': len(BETTING_HOUSES),
-        'available_houses': list(BETTING_HOUSES.keys())
-    }), 200
+        'total_houses': len(store),
+        'available_houses': store.keys()[:50]
+    })
 
-if __name__ == '__main__':
+def create_app(
+    houses: Optional[Dict[str, Dict[str, Any]]] = None,
+    faults: Optional[Dict[str, RouteFaults]] = None,
+    seed: Optional[int] = None
+) -> web.Application:
+    """
+    Cria a aplicação da API mock
+    
+    Args:
+        houses: Casas servidas (padrão: BETTING_HOUSES)
+        faults: Falhas por rota (padrão: lidas do ambiente)
+        seed: Semente do sorteio de falhas
+    
+    Returns:
+        Aplicação aiohttp
+    """
+    app = web.Application(middlewares=[fault_injection])
+    app[STORE_KEY] = BettingHouseStore(houses if houses is not None else BETTING_HOUSES)
+    app[FAULTS_KEY] = dict(faults) if faults is not None else load_faults_from_env()
+    app[RNG_KEY] = random.Random(seed)
+    app[CLICKS_KEY] = ClickTotals()
+    app[AFFILIATE_PROFILES_KEY] = {}
+    
+    # Rotas fixas antes da rota com parâmetro
+    app.router.add_get('/betting-houses/search', search_betting_houses, name='search')
+    app.router.add_post('/betting-houses/batch', batch_check_betting_houses, name='batch')
+    app.router.add_get('/betting-houses/{house_name}', check_betting_house, name='check')
+    app.router.add_get('/betting-houses', list_betting_houses, name='list')
+    app.router.add_post('/generated-links/clicks', record_clicks, name='clicks')
+    app.router.add_get('/generated-links/clicks', get_clicks)
+    app.router.add_get('/affiliate-profiles/{telegram_id}', get_affiliate_profile, name='affiliate')
+    app.router.add_put('/affiliate-profiles/{telegram_id}', put_affiliate_profile)
+    app.router.add_get('/affiliate-profiles', list_affiliate_profile_changes)
+    app.router.add_get('/admin/faults', get_faults)
+    app.router.add_put('/admin/faults', update_faults)
+    app.router.add_get('/health', health_check)
+    app.router.add_get('/', home)
+    return app
+
+def main():
+    """Inicia a API mock"""
+    parser = argparse.ArgumentParser(description='API mock de casas de apostas')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=int(os.getenv('MOCK_PORT', '5000')))
+    parser.add_argument('--synthetic', type=int, default=int(os.getenv('MOCK_SYNTHETIC_HOUSES', '0')),
+                        help='quantidade de casas sintéticas além das de exemplo')
+    parser.add_argument('--seed', type=int, default=42, help='semente das casas sintéticas')
+    args = parser.parse_args()
+    
+    houses = dict(BETTING_HOUSES)
+    if args.synthetic:
+        houses.update(generate_synthetic_houses(args.synthetic, args.seed))
+    app = create_app(houses)
+    
     print("🚀 Iniciando API Mock para casas de apostas...")
-    print("📍 Acesse: http://localhost:5000")
+    print(f"📍 Acesse: http://localhost:{args.port}")
     print("📋 Endpoints disponíveis:")
     print("   GET /betting-houses/{house_name}")
     print("   GET /betting-houses")
-    print("   GET /betting-houses/search?q={query}")
+    print("   GET /betting-houses?limit={limit}&cursor={next_cursor}")
+    print("   GET /betting-houses/search?q={query}&limit={limit}")
+    print("   POST /betting-houses/batch")
+    print("   GET|POST /generated-links/clicks")
+    print("   GET|PUT /affiliate-profiles/{telegram_id}")
+    print("   GET /affiliate-profiles?updated_since={iso_date}")
+    print("   GET|PUT /admin/faults")
     print("   GET /health")
     print("   GET /")
-    print("\n📊 Casas de apostas disponíveis:")
-    for house in BETTING_HOUSES.keys():
+    print(f"\n📊 {len(houses)} casas de apostas disponíveis, por exemplo:")
+    for house in list(BETTING_HOUSES.keys()):
         print(f"   - {house}")
+    
+    for route, faults in app[FAULTS_KEY].items():
+        if faults.latency_ms or faults.jitter_ms or faults.error_rate or faults.timeout_rate:
+            print(
+                f"🐢 {route}: latência {faults.latency_ms:.0f}±{faults.jitter_ms:.0f}ms ({faults.distribution}), "
+                f"erros {faults.error_rate:.0%}, timeouts {faults.timeout_rate:.0%}"
+            )
+    
     print("\n🔧 Configure seu .env com:")
-    print("   API_BASE_URL=http://localhost:5000")
+    print(f"   API_BASE_URL=http://localhost:{args.port}")
     print("\n⏹️  Pressione Ctrl+C para parar")
     
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    web.run_app(app, host=args.host, port=args.port, access_log=None, print=None)
+
+if __name__ == '__main__':
+    main()
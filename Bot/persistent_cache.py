@@ -0,0 +1,180 @@
+"""
+Cache persistente em SQLite para resultados de consultas, mantido entre reinícios
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class PersistentCache:
+    """
+    Armazenamento em disco dos resultados do cache em memória
+    
+    As gravações são acumuladas e enviadas ao SQLite em lote, fora do event
+    loop, para que o caminho de consulta nunca espere pelo disco.
+    """
+    
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 50000,
+        flush_interval: float = 2.0,
+        compact_interval: float = 600.0
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS lookup_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_lookup_cache_expires ON lookup_cache (expires_at)')
+        self._conn.commit()
+        
+        # Gravações pendentes: chave -> (valor, expira_em)
+        self._staged: Dict[str, Tuple[Any, float]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._last_compaction = time.time()
+        
+        self.writes = 0
+        self.loaded = 0
+        self.compacted = 0
+    
+    def stage(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Agenda a gravação de um item (sem tocar no disco)
+        
+        Args:
+            key: Chave do item
+            value: Valor serializável em JSON
+            ttl: Tempo de vida em segundos
+        """
+        self._staged[key] = (value, time.time() + ttl)
+    
+    def load(self) -> List[Tuple[str, Any, float]]:
+        """
+        Lê os itens ainda válidos para aquecer o cache em memória
+        
+        Returns:
+            Lista de (chave, valor, TTL restante em segundos)
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT key, value, expires_at FROM lookup_cache WHERE expires_at > ? '
+                'ORDER BY expires_at DESC LIMIT ?',
+                (now, self.max_entries)
+            ).fetchall()
+        
+        entries = []
+        for key, value, expires_at in rows:
+            try:
+                entries.append((key, json.loads(value), expires_at - now))
+            except ValueError:
+                logger.warning(f"Item inválido no cache persistente ignorado: {key}")
+        
+        self.loaded = len(entries)
+        return entries
+    
+    def _write(self, items: List[Tuple[str, str, float]]) -> None:
+        """Grava um lote de itens (executado em thread)"""
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO lookup_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                items
+            )
+            self._conn.commit()
+    
+    def _compact(self) -> int:
+        """Remove itens expirados e excedentes (executado em thread)"""
+        with self._lock:
+            removed = self._conn.execute(
+                'DELETE FROM lookup_cache WHERE expires_at <= ?', (time.time(),)
+            ).rowcount
+            # Manter apenas os itens com validade mais longa
+            removed += self._conn.execute(
+                'DELETE FROM lookup_cache WHERE key NOT IN '
+                '(SELECT key FROM lookup_cache ORDER BY expires_at DESC LIMIT ?)',
+                (self.max_entries,)
+            ).rowcount
+            self._conn.commit()
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return removed
+    
+    async def flush(self) -> None:
+        """Envia ao disco as gravações pendentes"""
+        if not self._staged:
+            return
+        
+        staged, self._staged = self._staged, {}
+        items = [
+            (key, json.dumps(value, ensure_ascii=False), expires_at)
+            for key, (value, expires_at) in staged.items()
+        ]
+        
+        await asyncio.to_thread(self._write, items)
+        self.writes += len(items)
+    
+    async def compact(self) -> None:
+        """Compacta o arquivo do cache"""
+        removed = await asyncio.to_thread(self._compact)
+        self.compacted += removed
+        self._last_compaction = time.time()
+        if removed:
+            logger.info(f"Cache persistente compactado: {removed} itens removidos")
+    
+    def start(self) -> None:
+        """Inicia a gravação periódica em segundo plano"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+    
+    async def _flush_loop(self) -> None:
+        """Grava pendências a cada `flush_interval` e compacta a cada `compact_interval`"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.time() - self._last_compaction >= self.compact_interval:
+                    await self.compact()
+            except Exception as e:
+                logger.error(f"Erro ao gravar cache persistente: {e}")
+    
+    async def close(self) -> None:
+        """Grava as pendências e fecha o banco"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        try:
+            await self.flush()
+        finally:
+            with self._lock:
+                self._conn.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do cache persistente"""
+        return {
+            'path': self.path,
+            'staged': len(self._staged),
+            'writes': self.writes,
+            'loaded': self.loaded,
+            'compacted': self.compacted
+        }
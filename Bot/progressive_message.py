@@ -0,0 +1,112 @@
+"""
+Mensagem do Telegram atualizada no lugar, com edições agrupadas
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ProgressiveMessage:
+    """
+    Edita uma mensagem já enviada conforme o conteúdo fica pronto
+    
+    Atualizações intermediárias são agrupadas: no máximo uma edição a cada
+    `min_interval` segundos (contados a partir do envio), sempre com o
+    texto mais recente; versões intermediárias que ficaram para trás não
+    são enviadas. `finish` descarta a edição pendente e grava o texto final.
+    Se tudo fica pronto antes do primeiro intervalo, a única edição é a final.
+    """
+    
+    def __init__(
+        self,
+        message,
+        min_interval: float = 1.0,
+        parse_mode: Optional[str] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.message = message
+        self.min_interval = min_interval
+        self.parse_mode = parse_mode
+        self._clock = clock
+        
+        self._shown: Optional[str] = getattr(message, 'text', None)
+        self._pending: Optional[str] = None
+        self._last_edit = clock()
+        self._task: Optional[asyncio.Task] = None
+        
+        self.edits = 0
+        self.coalesced = 0
+        self.failures = 0
+    
+    def update(self, text: str) -> None:
+        """
+        Agenda a exibição de um texto intermediário
+        
+        Args:
+            text: Novo conteúdo da mensagem
+        """
+        if self._pending is not None:
+            self.coalesced += 1
+        self._pending = text
+        
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self) -> None:
+        """Envia o texto pendente quando o intervalo mínimo permitir"""
+        # Textos que chegam durante uma edição saem na próxima janela
+        while self._pending is not None:
+            delay = self._last_edit + self.min_interval - self._clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            text, self._pending = self._pending, None
+            try:
+                await self._edit(text)
+            except Exception as e:
+                # Uma edição intermediária perdida não impede a final
+                self.failures += 1
+                self._last_edit = self._clock()
+                logger.warning(f"Falha ao atualizar mensagem em andamento: {e}")
+        
+        self._task = None
+    
+    async def finish(self, text: str) -> None:
+        """
+        Grava o texto final, descartando edições intermediárias pendentes
+        
+        Args:
+            text: Conteúdo final da mensagem
+        """
+        self._pending = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        
+        await self._edit(text)
+    
+    async def _edit(self, text: str) -> None:
+        """Edita a mensagem, se o texto mudou"""
+        # O Telegram recusa edições que não alteram o texto
+        if text == self._shown:
+            return
+        
+        await self.message.edit_text(text, parse_mode=self.parse_mode)
+        self._shown = text
+        self._last_edit = self._clock()
+        self.edits += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Edições feitas, agrupadas e perdidas"""
+        return {
+            'edits': self.edits,
+            'coalesced': self.coalesced,
+            'failures': self.failures
+        }
@@ -0,0 +1,274 @@
+"""
+Limitadores de taxa por token bucket: consultas por chat/usuário, chamadas à API e envios ao Telegram
+"""
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Token bucket com reserva antecipada
+    
+    Uma reserva sempre consome os tokens, deixando o saldo negativo quando
+    necessário, e devolve quanto tempo o chamador deve esperar. Assim quem
+    excede o limite entra numa fila implícita, atendida na ordem de chegada.
+    """
+    
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+    
+    def _refill(self) -> None:
+        """Acrescenta os tokens gerados desde a última atualização"""
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def reserve(self, tokens: float = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserva tokens
+        
+        Args:
+            tokens: Quantidade de tokens
+            max_wait: Espera máxima aceita; acima dela nada é reservado
+        
+        Returns:
+            Segundos a esperar antes de prosseguir, ou None se excederia `max_wait`
+        """
+        wait = self.time_until(tokens)
+        if max_wait is not None and wait > max_wait:
+            return None
+        self._tokens -= tokens
+        
+        self.acquired += 1
+        if wait:
+            self.delayed += 1
+            self.total_wait += wait
+        return wait
+    
+    def time_until(self, tokens: float = 1) -> float:
+        """Segundos até haver `tokens` disponíveis"""
+        self._refill()
+        return max(0.0, (tokens - self._tokens) / self.rate)
+    
+    def refund(self, tokens: float = 1) -> None:
+        """Devolve tokens de uma reserva que não foi usada"""
+        self._tokens = min(self.capacity, self._tokens + tokens)
+    
+    async def acquire(self, tokens: float = 1) -> float:
+        """
+        Aguarda até que os tokens estejam disponíveis
+        
+        Returns:
+            Tempo esperado em segundos
+        """
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+    
+    @property
+    def is_full(self) -> bool:
+        """Se o bucket está cheio (nenhum uso recente)"""
+        self._refill()
+        return self._tokens >= self.capacity
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do bucket"""
+        self._refill()
+        return {
+            'rate': self.rate,
+            'tokens': round(self._tokens, 3),
+            'acquired': self.acquired,
+            'delayed': self.delayed,
+            'total_wait': round(self.total_wait, 3)
+        }
+
+class KeyedRateLimiter:
+    """
+    Um token bucket por chave (chat, usuário...), com no máximo `max_keys` buckets
+    
+    Acima do limite sai o bucket usado há mais tempo. Buckets ociosos já
+    estão cheios e se comportam igual a um novo, então removê-los não muda
+    o limite aplicado.
+    
+    Uma operação pode consumir de várias chaves ao mesmo tempo (por exemplo
+    o chat e o usuário): espera pelo bucket mais atrasado e, se alguma chave
+    excederia a espera máxima, nada é consumido.
+    """
+    
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._clock = clock
+        # chave -> bucket, em ordem de uso (mais recente no fim)
+        self._buckets: 'OrderedDict[Hashable, TokenBucket]' = OrderedDict()
+        
+        self.allowed = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+    
+    def _bucket(self, key: Hashable) -> TokenBucket:
+        """Bucket da chave, criado sob demanda"""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+            return bucket
+        
+        while len(self._buckets) >= max(1, self.max_keys):
+            self._buckets.popitem(last=False)
+        bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity, self._clock)
+        return bucket
+    
+    def reserve(self, keys: Iterable[Hashable], tokens: float = 1, max_wait: Optional[float] = None) -> Optional[float]:
+        """
+        Reserva tokens em todas as chaves
+        
+        Args:
+            keys: Chaves a consumir
+            tokens: Tokens por chave
+            max_wait: Espera máxima aceita
+        
+        Returns:
+            Segundos a esperar, ou None se o limite foi excedido
+        """
+        reserved = []
+        wait = 0.0
+        for key in keys:
+            bucket = self._bucket(key)
+            key_wait = bucket.reserve(tokens, max_wait)
+            if key_wait is None:
+                for previous in reserved:
+                    previous.refund(tokens)
+                self.rejected += 1
+                return None
+            reserved.append(bucket)
+            wait = max(wait, key_wait)
+        
+        self.allowed += 1
+        if wait:
+            self.delayed += 1
+            self.total_wait += wait
+        return wait
+    
+    def retry_in(self, key: Hashable, tokens: float = 1) -> float:
+        """Segundos até a chave ter `tokens` disponíveis"""
+        return self._bucket(key).time_until(tokens)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do limitador"""
+        return {
+            'keys': len(self._buckets),
+            'allowed': self.allowed,
+            'delayed': self.delayed,
+            'rejected': self.rejected,
+            'total_wait': round(self.total_wait, 3)
+        }
+
+class TelegramRateLimiter(BaseRateLimiter):
+    """
+    Limita os envios ao Telegram respeitando os limites global, por chat e por grupo
+    
+    Os envios acima do limite esperam na fila do bucket em vez de falhar. Se
+    o Telegram ainda assim responder com RetryAfter, todos os envios pausam
+    pelo tempo pedido e o envio é repetido até `max_retries` vezes.
+    """
+    
+    def __init__(
+        self,
+        global_rate: float = 30.0,
+        chat_rate: float = 1.0,
+        group_rate: float = 20 / 60,
+        chat_burst: float = 3.0,
+        max_retries: int = 2
+    ):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chats = KeyedRateLimiter(chat_rate, chat_burst)
+        self.groups = KeyedRateLimiter(group_rate, chat_burst)
+        self.max_retries = max_retries
+        self._resume = asyncio.Event()
+        self._resume.set()
+        
+        self.requests = 0
+        self.retries = 0
+    
+    async def initialize(self) -> None:
+        """Nada a alocar"""
+    
+    async def shutdown(self) -> None:
+        """Nada a liberar"""
+    
+    async def process_request(
+        self,
+        callback,
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int]
+    ):
+        """Aguarda a vez do envio nos buckets e executa a chamada"""
+        chat_id = data.get('chat_id')
+        with contextlib.suppress(ValueError, TypeError):
+            chat_id = int(chat_id)
+        
+        # Só chamadas direcionadas a um chat contam para os limites de envio
+        wait = 0.0
+        if chat_id is not None:
+            # IDs negativos (ou @username) são grupos e canais
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            limiter = self.groups if is_group else self.chats
+            wait = max(limiter.reserve((chat_id,)), self.global_bucket.reserve())
+        if wait:
+            await asyncio.sleep(wait)
+        
+        max_retries = rate_limit_args if rate_limit_args is not None else self.max_retries
+        self.requests += 1
+        for attempt in range(max_retries + 1):
+            await self._resume.wait()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == max_retries:
+                    raise
+                self.retries += 1
+                logger.warning(f"Limite do Telegram atingido em {endpoint}; pausando envios por {e.retry_after}s")
+                self._resume.clear()
+                try:
+                    await asyncio.sleep(e.retry_after + 0.1)
+                finally:
+                    self._resume.set()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores dos envios"""
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'global': self.global_bucket.stats(),
+            'chats': self.chats.stats(),
+            'groups': self.groups.stats()
+        }
@@ -0,0 +1,319 @@
+"""
+Servidor de redirecionamento dos links curtos, com contagem de cliques em lote
+
+Uso:
+    python redirect_server.py                          # cliques gravados no SQLite local (LINKS_DB)
+    python redirect_server.py --sink api               # cliques enviados a API_BASE_URL
+    python redirect_server.py --port 8080 --flush-interval-ms 200 --flush-events 5000
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiohttp import web
+from dotenv import load_dotenv
+
+from cache import TTLCache
+from link_store import LinkStore
+
+logger = logging.getLogger(__name__)
+
+# Grava um lote de contagens; False (ou exceção) mantém o lote para a próxima tentativa
+ClickSink = Callable[[Dict[str, int]], Awaitable[bool]]
+
+def local_click_sink(store: LinkStore) -> ClickSink:
+    """Destino dos cliques no SQLite local, gravado fora do event loop"""
+    async def write(counts: Dict[str, int]) -> bool:
+        await asyncio.to_thread(store.add_clicks, counts)
+        return True
+    return write
+
+class ClickBuffer:
+    """
+    Conta cliques em memória e grava os totais por código em lote
+    
+    Um clique custa um incremento num dicionário. A cada `flush_interval`
+    segundos, ou assim que `flush_events` cliques se acumulam, os totais vão
+    ao destino numa única escrita (uma linha por código, não por clique).
+    Se a escrita falhar, as contagens voltam ao buffer e são somadas às
+    próximas; nada se perde enquanto o processo estiver de pé.
+    """
+    
+    def __init__(self, sink: ClickSink, flush_interval: float = 0.5, flush_events: int = 1000):
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self.flush_events = max(1, flush_events)
+        
+        self._counts: Dict[str, int] = {}
+        self._events = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._writing: Optional[asyncio.Future] = None
+        
+        self.clicks = 0
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+    
+    def record(self, code: str) -> None:
+        """Conta um clique"""
+        self._counts[code] = self._counts.get(code, 0) + 1
+        self._events += 1
+        self.clicks += 1
+        if self._events >= self.flush_events:
+            self._wake.set()
+    
+    async def flush(self) -> bool:
+        """
+        Grava os cliques acumulados
+        
+        Returns:
+            True se não havia nada pendente ou a escrita deu certo
+        """
+        if self._writing is not None:
+            # Escrita de um flush cancelado ainda em andamento: termina antes da próxima
+            await asyncio.shield(self._writing)
+        if not self._counts:
+            return True
+        
+        batch, self._counts = self._counts, {}
+        events, self._events = self._events, 0
+        # shield: cancelar quem espera (stop) não interrompe uma escrita já enviada,
+        # que seria contada de novo se as contagens voltassem ao buffer
+        self._writing = asyncio.ensure_future(self._write(batch, events))
+        return await asyncio.shield(self._writing)
+    
+    async def _write(self, batch: Dict[str, int], events: int) -> bool:
+        """Envia um lote ao destino, devolvendo as contagens ao buffer se falhar"""
+        try:
+            try:
+                ok = await self.sink(batch)
+            except Exception as e:
+                logger.warning(f"Falha ao gravar {len(batch)} contagens de cliques: {e}")
+                ok = False
+        except BaseException:
+            # Cancelada (ex.: encerramento do loop): o lote continua pendente
+            self._restore(batch, events)
+            raise
+        finally:
+            self._writing = None
+        
+        if not ok:
+            self.failures += 1
+            self._restore(batch, events)
+            return False
+        
+        self.flushes += 1
+        self.rows_written += len(batch)
+        return True
+    
+    def _restore(self, batch: Dict[str, int], events: int) -> None:
+        """Devolve ao buffer as contagens de um lote não gravado"""
+        for code, count in batch.items():
+            self._counts[code] = self._counts.get(code, 0) + count
+        self._events += events
+    
+    async def _run(self) -> None:
+        """Grava periodicamente ou quando o limite de cliques é atingido"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not await self.flush():
+                # Destino fora do ar: espera o intervalo antes de tentar de novo
+                await asyncio.sleep(self.flush_interval)
+    
+    def start(self) -> None:
+        """Inicia as gravações periódicas"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Encerra as gravações periódicas e grava o que restou, inclusive a escrita em andamento"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if not await self.flush():
+            logger.error(f"{self._events} cliques não gravados ao encerrar")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cliques contados, pendentes e escritas feitas"""
+        return {
+            'clicks': self.clicks,
+            'pending_clicks': self._events,
+            'pending_codes': len(self._counts),
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'failures': self.failures
+        }
+
+class RedirectServer:
+    """
+    Responde `GET /{código}` com 302 para o destino do link
+    
+    Os destinos ficam num dicionário em memória, carregado do LinkStore na
+    partida; links criados depois (pelo bot, no mesmo arquivo) são lidos do
+    SQLite no primeiro acesso e passam a vir da memória. Códigos
+    inexistentes ficam num cache negativo por `miss_ttl` segundos, para que
+    varreduras de códigos não virem uma consulta ao disco por requisição.
+    """
+    
+    def __init__(
+        self,
+        store: LinkStore,
+        clicks: ClickBuffer,
+        listen: str = '0.0.0.0',
+        port: int = 8080,
+        miss_ttl: float = 5.0
+    ):
+        self.store = store
+        self.clicks = clicks
+        self.listen = listen
+        self.port = port
+        self.miss_ttl = miss_ttl
+        
+        self._targets: Dict[str, str] = dict(store.items())
+        self._misses = TTLCache(max_size=10000)
+        
+        self.app = web.Application()
+        self.app.router.add_get('/healthz', self.handle_health)
+        self.app.router.add_get('/{code:[0-9A-Za-z]{1,32}}', self.handle_redirect)
+        self._runner: Optional[web.AppRunner] = None
+        
+        self.redirects = 0
+        self.not_found = 0
+        self.store_lookups = 0
+    
+    async def _resolve_miss(self, code: str) -> Optional[str]:
+        """Procura no SQLite, fora do event loop, um código que não está na memória"""
+        if self._misses.get(code) is not None:
+            return None
+        
+        self.store_lookups += 1
+        target = await asyncio.to_thread(self.store.get, code)
+        if target is None:
+            self._misses.set(code, True, ttl=self.miss_ttl)
+            return None
+        self._targets[code] = target
+        return target
+    
+    async def handle_redirect(self, request: web.Request) -> web.Response:
+        """Redireciona para o destino e conta o clique"""
+        code = request.match_info['code']
+        target = self._targets.get(code)
+        if target is None:
+            target = await self._resolve_miss(code)
+            if target is None:
+                self.not_found += 1
+                return web.Response(status=404, text='Link não encontrado')
+        
+        self.clicks.record(code)
+        self.redirects += 1
+        # Sem cache no navegador: todo clique passa por aqui e é contado
+        return web.Response(status=302, headers={'Location': target, 'Cache-Control': 'no-store'})
+    
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """Health check com os contadores"""
+        return web.json_response(self.stats())
+    
+    async def start(self) -> None:
+        """Inicia o servidor HTTP e as gravações de cliques"""
+        self.clicks.start()
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.listen, self.port)
+        await site.start()
+        logger.info(f"Redirecionamento ouvindo em http://{self.listen}:{self.port} ({len(self._targets)} links)")
+    
+    async def stop(self) -> None:
+        """Encerra o servidor HTTP e grava os cliques pendentes"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        await self.clicks.stop()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do redirecionamento e dos cliques"""
+        return {
+            'links': len(self._targets),
+            'redirects': self.redirects,
+            'not_found': self.not_found,
+            'store_lookups': self.store_lookups,
+            'clicks': self.clicks.stats()
+        }
+
+async def serve(args: argparse.Namespace) -> None:
+    """Executa o servidor até receber SIGINT/SIGTERM"""
+    store = LinkStore(args.db)
+    api = None
+    if args.sink == 'api':
+        # Importado só aqui: o modo local não precisa da configuração da API
+        from api_client import BettingHouseAPI
+        api = BettingHouseAPI(base_url=os.environ['API_BASE_URL'], api_key=os.getenv('API_KEY'))
+        sink = api.record_clicks
+    else:
+        sink = local_click_sink(store)
+    
+    server = RedirectServer(
+        store,
+        ClickBuffer(sink, flush_interval=args.flush_interval_ms / 1000, flush_events=args.flush_events),
+        listen=args.listen,
+        port=args.port
+    )
+    
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: Ctrl+C cai no KeyboardInterrupt
+            pass
+    
+    await server.start()
+    try:
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        if api is not None:
+            await api.close()
+        store.close()
+        logger.info(f"Redirecionamento encerrado: {server.stats()}")
+
+def main():
+    """Inicia o servidor de redirecionamento"""
+    load_dotenv()
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    
+    parser = argparse.ArgumentParser(description='Servidor de redirecionamento dos links curtos')
+    parser.add_argument('--listen', default=os.getenv('REDIRECT_LISTEN', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('REDIRECT_PORT', '8080')))
+    parser.add_argument('--db', default=os.getenv('LINKS_DB', 'links.db'), help='arquivo SQLite dos links')
+    parser.add_argument('--sink', choices=('local', 'api'), default=os.getenv('CLICK_SINK', 'local'),
+                        help='destino das contagens de cliques')
+    parser.add_argument('--flush-interval-ms', type=float, default=float(os.getenv('CLICK_FLUSH_INTERVAL_MS', '500')),
+                        help='intervalo máximo entre gravações de cliques')
+    parser.add_argument('--flush-events', type=int, default=int(os.getenv('CLICK_FLUSH_EVENTS', '1000')),
+                        help='cliques acumulados que antecipam a gravação')
+    args = parser.parse_args()
+    
+    if args.sink == 'api' and not os.getenv('API_BASE_URL'):
+        parser.error('--sink api exige API_BASE_URL')
+    
+    asyncio.run(serve(args))
+
+if __name__ == '__main__':
+    main()
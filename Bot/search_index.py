@@ -0,0 +1,273 @@
+"""
+Índice de busca por trigramas e prefixos para casas de apostas, com ranqueamento
+"""
+
+import bisect
+import heapq
+import re
+from array import array
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+# Campos indexados e peso de cada tipo de acerto
+DEFAULT_FIELDS = ('name', 'domain', 'country')
+
+SCORE_EXACT_NAME = 100
+SCORE_NAME_PREFIX = 80
+SCORE_NAME_WORD_PREFIX = 60
+SCORE_DOMAIN_PREFIX = 50
+SCORE_NAME_CONTAINS = 40
+SCORE_DOMAIN_CONTAINS = 30
+SCORE_OTHER = 10
+
+_WORD_SEPARATORS_RE = re.compile(r'[\s.\-]+')
+
+class SearchIndex:
+    """
+    Busca por prefixo e substring em nome, domínio e país sem varrer o catálogo
+    
+    Cada campo tem três tabelas de postagens: prefixos de 1 a 3 caracteres
+    do texto, os mesmos prefixos das palavras seguintes e trigramas. Cada
+    faixa de relevância (prefixo do nome, prefixo de palavra do nome,
+    prefixo do domínio, substring do nome...) lê só a lista de postagens que
+    pode conter acertos daquela faixa e confirma cada candidato com uma
+    comparação de strings.
+    
+    Na construção os documentos recebem ids na ordem de desempate do
+    ranqueamento (nome mais curto, depois alfabética), então as listas de
+    postagens já estão nessa ordem e cada faixa para assim que já existem
+    `limit` resultados melhores que qualquer candidato restante. Termos
+    comuns ("bet") custam o mesmo em 1 mil ou 100 mil casas.
+    
+    Registros alterados são marcados como removidos e reinseridos no fim,
+    fora da ordem, e sempre são examinados; o índice é reconstruído quando
+    removidos ou inseridos fora da ordem passam de `compact_ratio` do total.
+    """
+    
+    def __init__(self, fields: Sequence[str] = DEFAULT_FIELDS, compact_ratio: float = 0.25):
+        self.fields = tuple(fields)
+        self.compact_ratio = compact_ratio
+        self._clear()
+    
+    def _clear(self) -> None:
+        """Esvazia as estruturas do índice"""
+        # id do documento -> registro (None quando removido)
+        self._records: List[Optional[Dict[str, Any]]] = []
+        # id do documento -> textos dos campos em minúsculas
+        self._texts: List[Tuple[str, ...]] = []
+        # chave do registro -> id do documento
+        self._doc_ids: Dict[Hashable, int] = {}
+        # por campo: chave -> ids de documentos em ordem crescente
+        self._starts: List[Dict[str, array]] = [{} for _ in self.fields]
+        self._words: List[Dict[str, array]] = [{} for _ in self.fields]
+        self._grams: List[Dict[str, array]] = [{} for _ in self.fields]
+        # ids abaixo deste valor estão na ordem do ranqueamento
+        self._ordered = 0
+        self._removed = 0
+    
+    def _texts_of(self, record: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(record.get(field) or '').lower() for field in self.fields)
+    
+    def build(self, records: Iterable[Tuple[Hashable, Dict[str, Any]]]) -> None:
+        """
+        Reconstrói o índice
+        
+        Args:
+            records: Pares (chave, registro)
+        """
+        self._clear()
+        entries = [(key, record, self._texts_of(record)) for key, record in records]
+        entries.sort(key=lambda entry: (len(entry[2][0]), entry[2][0]))
+        for key, record, texts in entries:
+            self._insert(key, record, texts)
+        self._ordered = len(self._records)
+    
+    def upsert(self, key: Hashable, record: Dict[str, Any]) -> None:
+        """Insere ou substitui um registro"""
+        self.remove(key)
+        self._insert(key, record, self._texts_of(record))
+        
+        if len(self._records) - self._ordered > self.compact_ratio * max(1, self._ordered):
+            self._compact()
+    
+    def remove(self, key: Hashable) -> None:
+        """Remove um registro, se existir"""
+        doc_id = self._doc_ids.pop(key, None)
+        if doc_id is None:
+            return
+        self._records[doc_id] = None
+        self._removed += 1
+        
+        if self._removed > self.compact_ratio * max(1, len(self._doc_ids)):
+            self._compact()
+    
+    def _compact(self) -> None:
+        """Reconstrói o índice sem os documentos removidos"""
+        live = [(key, self._records[doc_id]) for key, doc_id in self._doc_ids.items()]
+        self.build(live)
+    
+    def _insert(self, key: Hashable, record: Dict[str, Any], texts: Tuple[str, ...]) -> None:
+        """Indexa um registro como novo documento"""
+        doc_id = len(self._records)
+        self._records.append(record)
+        self._texts.append(texts)
+        self._doc_ids[key] = doc_id
+        
+        for position, text in enumerate(texts):
+            words = _WORD_SEPARATORS_RE.split(text)[1:]
+            tables = (
+                (self._starts[position], {text[:n] for n in (1, 2, 3) if len(text) >= n}),
+                (self._words[position], {word[:n] for word in words for n in (1, 2, 3) if len(word) >= n}),
+                (self._grams[position], {text[i:i + 3] for i in range(len(text) - 2)})
+            )
+            for table, keys in tables:
+                for gram in keys:
+                    postings = table.get(gram)
+                    if postings is None:
+                        postings = table[gram] = array('I')
+                    postings.append(doc_id)
+    
+    def _smallest(self, table: Dict[str, array], query: str) -> Sequence[int]:
+        """Menor lista de postagens entre os trigramas do termo"""
+        smallest = None
+        for i in range(len(query) - 2):
+            postings = table.get(query[i:i + 3])
+            if postings is None:
+                return ()
+            if smallest is None or len(postings) < len(smallest):
+                smallest = postings
+        return smallest
+    
+    def _tiers(self, query: str) -> List[Tuple[int, List[Sequence[int]]]]:
+        """Faixas de relevância e as postagens onde seus acertos podem estar"""
+        short = len(query) < 3
+        key = query[:3]
+        
+        def narrowest(table: Dict[str, array], position: int, key: str = key) -> Sequence[int]:
+            # Quem começa com o termo também contém todos os seus trigramas
+            postings = table.get(key, ())
+            if short or not postings:
+                return postings
+            contains = self._smallest(self._grams[position], query)
+            return contains if len(contains) < len(postings) else postings
+        
+        # As palavras indexadas não têm separadores: um termo com separador
+        # ("x 10" em "Star X 10") é procurado pelo trecho antes dele
+        word_key = _WORD_SEPARATORS_RE.split(query, 1)[0][:3]
+        if word_key:
+            word_postings = narrowest(self._words[0], 0, word_key)
+        elif len(query) >= 2:
+            word_postings = self._smallest(self._grams[0], ' ' + query)
+        else:
+            word_postings = range(len(self._records))
+        
+        tiers = [
+            (SCORE_NAME_PREFIX, [narrowest(self._starts[0], 0)]),
+            (SCORE_NAME_WORD_PREFIX, [word_postings])
+        ]
+        if len(self.fields) > 1:
+            tiers.append((SCORE_DOMAIN_PREFIX, [narrowest(self._starts[1], 1)]))
+        
+        if short:
+            # Termos curtos só encontram começos de palavra
+            others = [self._words[position].get(key, ()) for position in range(len(self.fields))]
+            others += [self._starts[position].get(key, ()) for position in range(2, len(self.fields))]
+            tiers.append((SCORE_OTHER, others))
+            return tiers
+        
+        tiers.append((SCORE_NAME_CONTAINS, [self._smallest(self._grams[0], query)]))
+        if len(self.fields) > 1:
+            tiers.append((SCORE_DOMAIN_CONTAINS, [self._smallest(self._grams[1], query)]))
+        others = [self._smallest(self._grams[position], query) for position in range(2, len(self.fields))]
+        tiers.append((SCORE_OTHER, others))
+        return tiers
+    
+    def _score(self, query: str, texts: Tuple[str, ...]) -> int:
+        """Relevância do documento para o termo (0 se não corresponde)"""
+        name = texts[0]
+        domain = texts[1] if len(texts) > 1 else ''
+        
+        if name == query:
+            return SCORE_EXACT_NAME
+        if name.startswith(query):
+            return SCORE_NAME_PREFIX
+        if f' {query}' in name:
+            return SCORE_NAME_WORD_PREFIX
+        if domain.startswith(query):
+            return SCORE_DOMAIN_PREFIX
+        if len(query) < 3:
+            # Termos curtos exigem começo de palavra em algum campo
+            for text in texts:
+                if any(word.startswith(query) for word in _WORD_SEPARATORS_RE.split(text)):
+                    return SCORE_OTHER
+            return 0
+        if query in name:
+            return SCORE_NAME_CONTAINS
+        if query in domain:
+            return SCORE_DOMAIN_CONTAINS
+        if any(query in text for text in texts[2:]):
+            return SCORE_OTHER
+        return 0
+    
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Busca registros pelo termo, do mais ao menos relevante
+        
+        Args:
+            query: Termo de busca
+            limit: Máximo de resultados
+        
+        Returns:
+            Registros ordenados por relevância, nome mais curto e nome
+        """
+        query = query.strip().lower()
+        if not query or limit <= 0:
+            return []
+        
+        scored: Dict[int, Tuple[int, int, str, int]] = {}
+        
+        for tier_score, postings_lists in self._tiers(query):
+            # Resultados que vencem qualquer candidato restante da faixa:
+            # pontuação maior, ou igual e encontrados antes nesta faixa
+            beating = sum(1 for entry in scored.values() if -entry[0] > tier_score)
+            
+            candidates = heapq.merge(*postings_lists) if len(postings_lists) > 1 else iter(postings_lists[0])
+            for doc_id in candidates:
+                if doc_id < self._ordered and beating >= limit:
+                    break
+                if doc_id in scored or self._records[doc_id] is None:
+                    continue
+                texts = self._texts[doc_id]
+                score = self._score(query, texts)
+                if score >= tier_score:
+                    scored[doc_id] = (-score, len(texts[0]), texts[0], doc_id)
+                    beating += 1
+            else:
+                continue
+            
+            # Os candidatos restantes em ordem perdem o desempate; só os
+            # inseridos depois da construção ainda podem entrar
+            for postings in postings_lists:
+                for index in range(bisect.bisect_left(postings, self._ordered), len(postings)):
+                    doc_id = postings[index]
+                    if doc_id in scored or self._records[doc_id] is None:
+                        continue
+                    texts = self._texts[doc_id]
+                    score = self._score(query, texts)
+                    if score >= tier_score:
+                        scored[doc_id] = (-score, len(texts[0]), texts[0], doc_id)
+        
+        return [self._records[entry[3]] for entry in heapq.nsmallest(limit, scored.values())]
+    
+    def __len__(self) -> int:
+        return len(self._doc_ids)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Tamanho do índice"""
+        tables = self._starts + self._words + self._grams
+        return {
+            'records': len(self._doc_ids),
+            'removed': self._removed,
+            'unordered': len(self._records) - self._ordered,
+            'keys': sum(len(table) for table in tables),
+            'postings': sum(len(postings) for table in tables for postings in table.values())
+        }
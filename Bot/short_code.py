@@ -0,0 +1,290 @@
+"""
+Geração de códigos curtos em base62 para links rastreados (GeneratedLink.ShortLink)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+BASE62_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+_BASE62_INDEX = {char: index for index, char in enumerate(BASE62_ALPHABET)}
+# Pares de dígitos: metade das divisões na codificação
+_BASE62_PAIRS = [a + b for a in BASE62_ALPHABET for b in BASE62_ALPHABET]
+
+# Multiplicador do embaralhamento (≈ 0,618 de 62^n, ímpar e não múltiplo de 31)
+_SCRAMBLE_RATIO = 0.6180339887498949
+
+# Layout dos ids por tempo: 41 bits de milissegundos, 10 de nó, 12 de sequência
+SNOWFLAKE_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+SNOWFLAKE_NODE_BITS = 10
+SNOWFLAKE_SEQUENCE_BITS = 12
+MAX_NODE_ID = (1 << SNOWFLAKE_NODE_BITS) - 1
+
+def base62_encode(number: int, width: int = 0) -> str:
+    """
+    Codifica um inteiro não negativo em base62
+    
+    Args:
+        number: Valor a codificar
+        width: Tamanho mínimo (completado com zeros à esquerda)
+    
+    Returns:
+        Texto em base62
+    """
+    if number < 0:
+        raise ValueError("Só inteiros não negativos têm código base62")
+    
+    parts = []
+    while number >= 62:
+        number, pair = divmod(number, 3844)
+        parts.append(_BASE62_PAIRS[pair])
+    if number or not parts:
+        parts.append(BASE62_ALPHABET[number])
+    return ''.join(reversed(parts)).rjust(width, '0')
+
+def base62_decode(code: str) -> int:
+    """
+    Decodifica um texto em base62
+    
+    Raises:
+        ValueError: Se o texto tiver caracteres fora do alfabeto
+    """
+    number = 0
+    try:
+        for char in code:
+            number = number * 62 + _BASE62_INDEX[char]
+    except KeyError:
+        raise ValueError(f"Código base62 inválido: {code!r}") from None
+    return number
+
+class SQLiteBlockAllocator:
+    """
+    Reserva faixas de ids de uma sequência guardada em SQLite
+    
+    A reserva é uma transação `BEGIN IMMEDIATE`, então processos que
+    compartilham o arquivo nunca recebem faixas sobrepostas. É a única
+    operação que toca o disco: os ids da faixa saem da memória.
+    """
+    
+    def __init__(self, path: str, sequence: str = 'short_links', timeout: float = 30.0):
+        self.path = path
+        self.sequence = sequence
+        
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS id_blocks ('
+            ' sequence TEXT PRIMARY KEY,'
+            ' next_id INTEGER NOT NULL)'
+        )
+        
+        self.reservations = 0
+    
+    def reserve(self, size: int) -> int:
+        """
+        Reserva `size` ids consecutivos
+        
+        Returns:
+            Primeiro id da faixa
+        """
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._conn.execute(
+                'SELECT next_id FROM id_blocks WHERE sequence = ?', (self.sequence,)
+            ).fetchone()
+            start = row[0] if row else 0
+            self._conn.execute(
+                'INSERT INTO id_blocks (sequence, next_id) VALUES (?, ?)'
+                ' ON CONFLICT(sequence) DO UPDATE SET next_id = excluded.next_id',
+                (self.sequence, start + size)
+            )
+            self._conn.execute('COMMIT')
+        except BaseException:
+            self._conn.execute('ROLLBACK')
+            raise
+        
+        self.reservations += 1
+        return start
+    
+    def close(self) -> None:
+        self._conn.close()
+
+class BlockCodeGenerator:
+    """
+    Códigos curtos a partir de faixas de ids reservadas em bloco
+    
+    Cada processo reserva `block_size` ids de uma vez no alocador e os
+    entrega da memória; ids de uma faixa abandonada (reinício) são só
+    pulados. Os ids abaixo de 62^`length` passam por uma permutação afim
+    (x·A + B mod 62^length) e viram códigos de exatamente `length`
+    caracteres, para que links consecutivos não tenham códigos
+    consecutivos; acima disso o código é o próprio id, com mais caracteres,
+    e nunca colide com os anteriores. O embaralhamento só dificulta
+    enumerar links, não é segredo.
+    """
+    
+    def __init__(self, allocator, block_size: int = 1000, length: int = 6):
+        if block_size <= 0:
+            raise ValueError("block_size deve ser positivo")
+        self.allocator = allocator
+        self.block_size = block_size
+        self.length = length
+        
+        self._space = 62 ** length
+        multiplier = int(self._space * _SCRAMBLE_RATIO) | 1
+        while multiplier % 31 == 0:
+            multiplier += 2
+        self._multiplier = multiplier
+        self._offset = self._space // 3
+        
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        
+        self.generated = 0
+        self.blocks = 0
+    
+    def encode(self, number: int) -> str:
+        """Código do id"""
+        if number < self._space:
+            return base62_encode((number * self._multiplier + self._offset) % self._space, self.length)
+        return base62_encode(number)
+    
+    def decode(self, code: str) -> int:
+        """Id do código (inverso de encode)"""
+        number = base62_decode(code)
+        if len(code) != self.length:
+            return number
+        inverse = pow(self._multiplier, -1, self._space)
+        return (number - self._offset) * inverse % self._space
+    
+    def next_id(self) -> int:
+        """Próximo id da faixa, reservando outra quando ela acaba"""
+        with self._lock:
+            if self._next >= self._end:
+                self._next = self.allocator.reserve(self.block_size)
+                self._end = self._next + self.block_size
+                self.blocks += 1
+            number = self._next
+            self._next += 1
+            self.generated += 1
+            return number
+    
+    def next_code(self) -> str:
+        """Próximo código curto"""
+        return self.encode(self.next_id())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Códigos gerados e faixas reservadas"""
+        return {
+            'generated': self.generated,
+            'blocks': self.blocks,
+            'remaining_in_block': self._end - self._next
+        }
+
+class SnowflakeCodeGenerator:
+    """
+    Códigos curtos a partir de ids por tempo, nó e sequência (estilo Snowflake)
+    
+    Não depende de armazenamento compartilhado: cada processo recebe um
+    `node_id` único (0 a 1023) e gera até 4096 ids por milissegundo. Os
+    códigos têm 10 ou 11 caracteres. Se o relógio voltar, espera ele
+    alcançar o último milissegundo usado em vez de repetir ids.
+    """
+    
+    def __init__(
+        self,
+        node_id: int,
+        epoch_ms: int = SNOWFLAKE_EPOCH_MS,
+        clock: Callable[[], float] = time.time
+    ):
+        if not 0 <= node_id <= MAX_NODE_ID:
+            raise ValueError(f"node_id deve estar entre 0 e {MAX_NODE_ID}")
+        self.node_id = node_id
+        self.epoch_ms = epoch_ms
+        self._clock = clock
+        
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._sequence = 0
+        
+        self.generated = 0
+        self.waits = 0
+    
+    def _now_ms(self) -> int:
+        return int(self._clock() * 1000) - self.epoch_ms
+    
+    def next_id(self) -> int:
+        """Próximo id"""
+        with self._lock:
+            now = self._now_ms()
+            if now < self._last_ms:
+                self.waits += 1
+                while now < self._last_ms:
+                    time.sleep((self._last_ms - now) / 1000)
+                    now = self._now_ms()
+            
+            if now == self._last_ms:
+                self._sequence = (self._sequence + 1) & ((1 << SNOWFLAKE_SEQUENCE_BITS) - 1)
+                if self._sequence == 0:
+                    # Sequência esgotada neste milissegundo
+                    self.waits += 1
+                    while now <= self._last_ms:
+                        now = self._now_ms()
+            else:
+                self._sequence = 0
+            self._last_ms = now
+            self.generated += 1
+            
+            return (
+                (now << (SNOWFLAKE_NODE_BITS + SNOWFLAKE_SEQUENCE_BITS))
+                | (self.node_id << SNOWFLAKE_SEQUENCE_BITS)
+                | self._sequence
+            )
+    
+    def next_code(self) -> str:
+        """Próximo código curto"""
+        return base62_encode(self.next_id())
+    
+    def stats(self) -> Dict[str, Any]:
+        """Códigos gerados e esperas pelo relógio"""
+        return {
+            'generated': self.generated,
+            'waits': self.waits
+        }
+
+def create_generator(
+    strategy: str = 'block',
+    path: str = 'short_codes.db',
+    block_size: int = 1000,
+    length: int = 6,
+    node_id: Optional[int] = None
+):
+    """
+    Cria o gerador de códigos da estratégia configurada
+    
+    Args:
+        strategy: 'block' (faixas reservadas em SQLite) ou 'snowflake'
+        path: Arquivo SQLite das faixas (estratégia 'block')
+        block_size: Ids reservados por vez (estratégia 'block')
+        length: Tamanho dos códigos embaralhados (estratégia 'block')
+        node_id: Nó do processo, único entre todos os processos que geram
+            códigos (obrigatório na estratégia 'snowflake')
+    
+    Returns:
+        BlockCodeGenerator ou SnowflakeCodeGenerator
+    
+    Raises:
+        ValueError: Se a estratégia for desconhecida, ou 'snowflake' sem node_id
+    """
+    if strategy == 'block':
+        return BlockCodeGenerator(SQLiteBlockAllocator(path), block_size=block_size, length=length)
+    if strategy == 'snowflake':
+        if node_id is None:
+            # Sem um nó explícito, processos em contêineres diferentes (PID 1)
+            # teriam o mesmo nó e gerariam os mesmos códigos
+            raise ValueError("A estratégia 'snowflake' exige SHORT_CODE_NODE_ID (0 a 1023, único por processo)")
+        return SnowflakeCodeGenerator(node_id)
+    raise ValueError(f"Estratégia de códigos curtos desconhecida: {strategy}")
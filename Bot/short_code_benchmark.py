@@ -0,0 +1,114 @@
+"""
+Benchmark do gerador de códigos curtos com vários processos
+
+Cada processo cria o próprio gerador (faixas do mesmo arquivo SQLite, ou um
+node_id por processo no modo snowflake), espera os demais numa barreira e
+gera seus códigos; ao final, todos os códigos são comparados para provar
+que nenhum se repete entre processos.
+
+Uso:
+    python short_code_benchmark.py                              # 4 processos, as duas estratégias
+    python short_code_benchmark.py --processes 8 --codes 500000
+    python short_code_benchmark.py --strategy block --block-size 100
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Tuple
+
+from short_code import create_generator
+
+STRATEGIES = ('block', 'snowflake')
+
+def _worker(
+    strategy: str,
+    index: int,
+    path: str,
+    block_size: int,
+    length: int,
+    codes: int,
+    barrier
+) -> Tuple[List[str], float, float, Dict[str, Any]]:
+    """Gera `codes` códigos num processo e devolve códigos, início, fim e estatísticas"""
+    generator = create_generator(strategy, path=path, block_size=block_size, length=length, node_id=index)
+    next_code = generator.next_code
+    
+    barrier.wait()
+    started = time.time()
+    generated = [next_code() for _ in range(codes)]
+    finished = time.time()
+    return generated, started, finished, generator.stats()
+
+def bench_strategy(strategy: str, processes: int, codes: int, block_size: int, length: int) -> Dict[str, Any]:
+    """
+    Mede uma estratégia com vários processos gerando ao mesmo tempo
+    
+    Returns:
+        Vazão total e por processo, tamanho dos códigos e colisões
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'short_codes.db')
+        # Cria o arquivo antes para que os processos não disputem o CREATE TABLE
+        create_generator(strategy, path=path, block_size=block_size, length=length, node_id=0)
+        
+        context = multiprocessing.get_context('spawn')
+        with context.Manager() as manager:
+            barrier = manager.Barrier(processes)
+            with context.Pool(processes) as pool:
+                results = pool.starmap(
+                    _worker,
+                    [(strategy, index, path, block_size, length, codes, barrier) for index in range(processes)]
+                )
+    
+    all_codes = [code for generated, _, _, _ in results for code in generated]
+    elapsed = max(result[2] for result in results) - min(result[1] for result in results)
+    lengths = [len(code) for code in all_codes]
+    
+    return {
+        'processes': processes,
+        'codes': len(all_codes),
+        'seconds': round(elapsed, 4),
+        'codes_per_sec': round(len(all_codes) / elapsed, 1) if elapsed else None,
+        'codes_per_sec_per_process': round(codes / max(result[2] - result[1] for result in results), 1),
+        'min_length': min(lengths),
+        'max_length': max(lengths),
+        'collisions': len(all_codes) - len(set(all_codes)),
+        'generator': results[0][3]
+    }
+
+def main() -> int:
+    """Executa o benchmark e devolve o código de saída (1 se houve colisão)"""
+    parser = argparse.ArgumentParser(description='Benchmark do gerador de códigos curtos')
+    parser.add_argument('--strategy', choices=STRATEGIES + ('all',), default='all', help='estratégia medida')
+    parser.add_argument('--processes', type=int, default=4, help='processos gerando ao mesmo tempo')
+    parser.add_argument('--codes', type=int, default=200000, help='códigos por processo')
+    parser.add_argument('--block-size', type=int, default=1000, help='ids reservados por vez (block)')
+    parser.add_argument('--length', type=int, default=6, help='tamanho dos códigos embaralhados (block)')
+    parser.add_argument('--output', help='arquivo JSON para gravar os resultados')
+    args = parser.parse_args()
+    
+    strategies = STRATEGIES if args.strategy == 'all' else (args.strategy,)
+    results: Dict[str, Any] = {}
+    for strategy in strategies:
+        result = bench_strategy(strategy, args.processes, args.codes, args.block_size, args.length)
+        results[strategy] = result
+        print(f"🔗 {strategy:<10} {result}")
+    
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Resultados gravados em {args.output}")
+    
+    if any(result['collisions'] for result in results.values()):
+        print("\n❌ Códigos repetidos entre processos")
+        return 1
+    print("\n✅ Nenhuma colisão")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -60,6 +60,7 @@ async def test_api_connection():
         if result['found']:
             print(f"Dados: {result['data']}")
     
+    await api_client.close()
     return True
 
 async def test_full_workflow():
@@ -89,6 +90,8 @@ async def test_full_workflow():
     for domain in domains:
         result = await api_client.check_betting_house(domain)
         print(f"\n{domain}: {result['message']}")
+    
+    await api_client.close()
 
 def test_telegram_token():
     """Testa se o token do Telegram está configurado"""
@@ -0,0 +1,106 @@
+"""
+Testes do FuzzyMatcher comparando com uma busca exaustiva
+
+Execute com: python -m pytest test_fuzzy_matcher.py
+"""
+
+import random
+import string
+
+import pytest
+
+from fuzzy_matcher import FuzzyMatcher, edit_distance
+
+ALPHABET = string.ascii_lowercase + string.digits
+SYLLABLES = ('bet', 'win', 'sport', 'casa', 'aposta', 'jogo', 'play', 'odds', 'pix', 'gol', 'x', '365', '7', 'br')
+
+def reference_distance(a: str, b: str) -> int:
+    """Damerau–Levenshtein restrita sem faixa nem parada antecipada"""
+    rows = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) + 1):
+        rows[i][0] = i
+    for j in range(len(b) + 1):
+        rows[0][j] = j
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            rows[i][j] = min(rows[i - 1][j] + 1, rows[i][j - 1] + 1, rows[i - 1][j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                rows[i][j] = min(rows[i][j], rows[i - 2][j - 2] + 1)
+    return rows[len(a)][len(b)]
+
+def reference_lookup(names, term: str, max_distance: int):
+    """Nome mais próximo comparando o termo com todos os nomes"""
+    if term in names:
+        return term, 0
+    if len(term) <= 3:
+        allowed = 0
+    elif len(term) <= 5:
+        allowed = min(1, max_distance)
+    else:
+        allowed = max_distance
+    
+    best_key = None
+    for name in names:
+        if abs(len(name) - len(term)) > allowed:
+            continue
+        distance = reference_distance(term, name)
+        if distance > allowed:
+            continue
+        key = (distance, name[0] != term[0], abs(len(name) - len(term)), name)
+        if best_key is None or key < best_key:
+            best_key = key
+    return (best_key[3], best_key[0]) if best_key is not None else None
+
+def mutate(rng: random.Random, word: str, edits: int) -> str:
+    """Aplica apagamentos, inserções, trocas e transposições aleatórias"""
+    for _ in range(edits):
+        position = rng.randrange(len(word) + 1)
+        operation = rng.choice(('delete', 'insert', 'replace', 'transpose'))
+        if operation == 'insert' or len(word) < 2:
+            word = word[:position] + rng.choice(ALPHABET) + word[position:]
+        elif operation == 'delete':
+            position = min(position, len(word) - 1)
+            word = word[:position] + word[position + 1:]
+        elif operation == 'replace':
+            position = min(position, len(word) - 1)
+            word = word[:position] + rng.choice(ALPHABET) + word[position + 1:]
+        else:
+            position = min(position, len(word) - 2)
+            word = word[:position] + word[position + 1] + word[position] + word[position + 2:]
+    return word
+
+@pytest.fixture(scope='module')
+def corpus():
+    rng = random.Random(1234)
+    names = set()
+    while len(names) < 600:
+        names.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))))
+    return sorted(names)
+
+def test_edit_distance_matches_reference():
+    rng = random.Random(99)
+    for _ in range(3000):
+        a = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 9)))
+        b = mutate(rng, a, rng.randint(0, 3)) if rng.random() < 0.7 else ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 9)))
+        expected = reference_distance(a, b)
+        for max_distance in range(4):
+            assert edit_distance(a, b, max_distance) == (expected if expected <= max_distance else None), (a, b, max_distance)
+
+@pytest.mark.parametrize('max_distance', [1, 2])
+def test_lookup_matches_brute_force(corpus, max_distance):
+    matcher = FuzzyMatcher(corpus, max_distance=max_distance)
+    rng = random.Random(max_distance)
+    
+    terms = [mutate(rng, rng.choice(corpus), rng.randint(0, 3)) for _ in range(400)]
+    terms += [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(1, 10))) for _ in range(100)]
+    for term in terms:
+        assert matcher.lookup(term) == reference_lookup(corpus, term, max_distance), term
+
+def test_added_names_are_found(corpus):
+    matcher = FuzzyMatcher(corpus[:400])
+    matcher.add(corpus[400:])
+    rng = random.Random(7)
+    for name in rng.sample(corpus[400:], 50):
+        term = mutate(rng, name, 1)
+        assert matcher.lookup(term) == reference_lookup(corpus, term, 2), term
@@ -0,0 +1,123 @@
+"""
+Testes do SearchIndex comparando com uma busca exaustiva
+
+Execute com: python -m pytest test_search_index.py
+"""
+
+import random
+import re
+
+import pytest
+
+from search_index import SearchIndex
+
+WORDS = ('bet', 'win', 'sport', 'sporting', 'casa', 'aposta', 'jogo', 'play', 'odds', 'pix', 'gol', 'br', '365', 'x', 'star')
+SEPARATORS = ('', '', ' ', '-', '.')
+COUNTRIES = ('Brasil', 'Malta', 'Curacao', 'Reino Unido', 'Gibraltar', 'Isle of Man')
+TLDS = ('.com', '.bet.br', '.com.br', '.net')
+
+def reference_score(query: str, record) -> int:
+    """Relevância calculada direto das regras, sem índice"""
+    name = str(record.get('name') or '').lower()
+    domain = str(record.get('domain') or '').lower()
+    country = str(record.get('country') or '').lower()
+    
+    if name == query:
+        return 100
+    if name.startswith(query):
+        return 80
+    if f' {query}' in name:
+        return 60
+    if domain.startswith(query):
+        return 50
+    if len(query) < 3:
+        words = [word for text in (name, domain, country) for word in re.split(r'[\s.\-]+', text)]
+        return 10 if any(word.startswith(query) for word in words) else 0
+    if query in name:
+        return 40
+    if query in domain:
+        return 30
+    if query in country:
+        return 10
+    return 0
+
+def reference_search(records, query: str, limit: int):
+    """Chaves dos melhores registros avaliando todos eles"""
+    query = query.strip().lower()
+    if not query or limit <= 0:
+        return []
+    scored = []
+    for key, record in records.items():
+        score = reference_score(query, record)
+        if score:
+            name = record['name'].lower()
+            scored.append((-score, len(name), name, key))
+    return [entry[3] for entry in sorted(scored)[:limit]]
+
+def make_record(rng: random.Random, key: int):
+    """Casa sintética com nome de várias palavras, domínio e país"""
+    parts = [rng.choice(WORDS) for _ in range(rng.randint(1, 4))]
+    name = parts[0]
+    for part in parts[1:]:
+        name += rng.choice(SEPARATORS) + part
+    # Sufixo único: empates no ranqueamento só pelo nome
+    name = f'{name.title()} {key}'
+    return {'id': key, 'name': name, 'domain': ''.join(parts) + rng.choice(TLDS), 'country': rng.choice(COUNTRIES)}
+
+def make_queries(rng: random.Random, records, count: int):
+    """Trechos de nomes, domínios e países, termos curtos e termos sem acerto"""
+    values = list(records.values())
+    queries = []
+    for _ in range(count):
+        record = rng.choice(values)
+        text = str(record[rng.choice(('name', 'name', 'domain', 'country'))])
+        start = rng.randrange(len(text))
+        queries.append(text[start:start + rng.randint(1, 7)])
+    queries += [rng.choice(WORDS)[:rng.randint(1, 3)] for _ in range(count // 4)]
+    queries += [record['name'] for record in rng.sample(values, 10)]
+    queries += ['zzq', 'q', ' ', '-', '.b', '-bet', '.com', 'x 1', 'bet-', 'star x']
+    return queries
+
+def assert_matches(index: SearchIndex, records, queries, limits=(1, 5, 20, 10000)):
+    for query in queries:
+        for limit in limits:
+            found = [record['id'] for record in index.search(query, limit)]
+            assert found == reference_search(records, query, limit), (query, limit)
+
+@pytest.fixture
+def records():
+    rng = random.Random(2024)
+    return {key: make_record(rng, key) for key in range(800)}
+
+def test_search_matches_brute_force(records):
+    index = SearchIndex()
+    index.build(records.items())
+    assert_matches(index, records, make_queries(random.Random(1), records, 200))
+
+@pytest.mark.parametrize('compact_ratio', [0.25, 100.0])
+def test_upsert_and_remove_match_brute_force(records, compact_ratio):
+    index = SearchIndex(compact_ratio=compact_ratio)
+    index.build(records.items())
+    rng = random.Random(int(compact_ratio))
+    next_key = len(records)
+    
+    for _ in range(4):
+        for _ in range(150):
+            operation = rng.random()
+            if operation < 0.4:
+                # Registro alterado: sai da ordem do ranqueamento até a compactação
+                key = rng.choice(list(records))
+                records[key] = make_record(rng, key)
+                index.upsert(key, records[key])
+            elif operation < 0.7:
+                records[next_key] = make_record(rng, next_key)
+                index.upsert(next_key, records[next_key])
+                next_key += 1
+            else:
+                key = rng.choice(list(records))
+                del records[key]
+                index.remove(key)
+        index.remove(-1)
+        
+        assert len(index) == len(records)
+        assert_matches(index, records, make_queries(rng, records, 60))
@@ -0,0 +1,136 @@
+"""
+Processamento concorrente de updates com ordem garantida por chat
+"""
+
+import asyncio
+import inspect
+import logging
+import sys
+from typing import Any, Awaitable, Dict, Hashable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processa updates de chats diferentes em paralelo e os do mesmo chat em ordem
+    
+    - `workers`: quantos updates executam ao mesmo tempo
+    - `max_pending`: quantos updates podem estar admitidos (executando ou
+      aguardando a vez do seu chat); acima disso novos updates esperam e
+      `saturated` fica True, para que a entrada (webhook) recuse com 503
+    - `shed`: descarta os updates acima de `max_pending` em vez de deixá-los
+      esperando. No polling o python-telegram-bot cria uma tarefa por update
+      assim que o tira da fila, sem olhar o processador, então esperar não
+      limita a memória; o webhook já recusa na entrada e pode esperar
+    
+    A espera pela vez do chat acontece antes de ocupar um worker, então um
+    chat com muitas mensagens não bloqueia os demais.
+    """
+    
+    def __init__(self, workers: int = 8, max_pending: int = 256, shed: bool = False):
+        self.workers = max(1, workers)
+        self.max_pending = max(self.workers, max_pending)
+        self.shed = shed
+        # Descartando, todo update precisa chegar a do_process_update para ser contado
+        super().__init__(max_concurrent_updates=sys.maxsize if shed else self.max_pending)
+        
+        self._worker_slots = asyncio.Semaphore(self.workers)
+        # chat -> [lock, updates do chat admitidos]
+        self._chat_locks: Dict[Hashable, list] = {}
+        
+        self.admitted = 0
+        self.running = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self._dropping = False
+    
+    @staticmethod
+    def _chat_key(update: object) -> Optional[Hashable]:
+        """Chave de ordenação do update (id do chat, ou do usuário sem chat)"""
+        if isinstance(update, Update):
+            if update.effective_chat is not None:
+                return update.effective_chat.id
+            if update.effective_user is not None:
+                return ('user', update.effective_user.id)
+        return None
+    
+    @property
+    def saturated(self) -> bool:
+        """Se o limite de updates admitidos foi atingido"""
+        return self.admitted >= self.max_pending
+    
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Aguarda a vez do chat, ocupa um worker e processa o update"""
+        if self.shed and self.saturated:
+            self._drop(coroutine)
+            return
+        if self._dropping:
+            self._dropping = False
+            logger.info(f"Processamento de updates normalizado; {self.dropped} descartado(s) até agora")
+        
+        key = self._chat_key(update)
+        self.admitted += 1
+        
+        entry = None
+        if key is not None:
+            entry = self._chat_locks.get(key)
+            if entry is None:
+                entry = self._chat_locks[key] = [asyncio.Lock(), 0]
+            entry[1] += 1
+        
+        try:
+            if entry is not None:
+                await entry[0].acquire()
+            try:
+                async with self._worker_slots:
+                    self.running += 1
+                    try:
+                        await coroutine
+                        self.processed += 1
+                    except Exception:
+                        self.failed += 1
+                        raise
+                    finally:
+                        self.running -= 1
+            finally:
+                if entry is not None:
+                    entry[0].release()
+        finally:
+            self.admitted -= 1
+            if entry is not None:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._chat_locks[key]
+    
+    def _drop(self, coroutine: Awaitable[Any]) -> None:
+        """Descarta um update acima do limite, avisando uma vez por sobrecarga"""
+        self.dropped += 1
+        if inspect.iscoroutine(coroutine):
+            # Nunca será aguardada: fechar evita o aviso de corrotina esquecida
+            coroutine.close()
+        if not self._dropping:
+            self._dropping = True
+            logger.warning(f"{self.admitted} updates em processamento; descartando os novos até normalizar")
+    
+    async def initialize(self) -> None:
+        """Nada a alocar"""
+    
+    async def shutdown(self) -> None:
+        """Nada a liberar"""
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do processamento"""
+        return {
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'admitted': self.admitted,
+            'running': self.running,
+            'active_chats': len(self._chat_locks),
+            'processed': self.processed,
+            'failed': self.failed,
+            'dropped': self.dropped
+        }
@@ -0,0 +1,123 @@
+"""
+Servidor HTTP assíncrono para receber updates do Telegram via webhook
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from update_processor import ChatOrderedUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+# Header enviado pelo Telegram com o secret_token configurado no setWebhook
+SECRET_TOKEN_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+class WebhookServer:
+    """
+    Recebe updates por HTTP POST e os entrega à fila de updates da aplicação
+    
+    A fila da aplicação é limitada: quando está cheia, ou quando o processador
+    de updates já tem `max_pending` updates admitidos, o servidor responde 503
+    e o Telegram reenvia o update mais tarde, em vez de o bot acumular
+    trabalho sem limite.
+    """
+    
+    def __init__(
+        self,
+        application: Application,
+        listen: str = '0.0.0.0',
+        port: int = 8443,
+        path: str = '/telegram/webhook',
+        secret_token: Optional[str] = None,
+        update_processor: Optional[ChatOrderedUpdateProcessor] = None
+    ):
+        self.application = application
+        self.listen = listen
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token
+        self.update_processor = update_processor
+        
+        self.app = web.Application()
+        self.app.router.add_post(self.path, self.handle_update)
+        self.app.router.add_get('/healthz', self.handle_health)
+        self._runner: Optional[web.AppRunner] = None
+        
+        self.received = 0
+        self.rejected = 0
+        self.queue_full = 0
+    
+    async def handle_update(self, request: web.Request) -> web.Response:
+        """Valida o secret token e enfileira o update recebido"""
+        if self.secret_token:
+            received_token = request.headers.get(SECRET_TOKEN_HEADER, '')
+            if not hmac.compare_digest(received_token, self.secret_token):
+                self.rejected += 1
+                logger.warning(f"Update recusado: secret token inválido (origem {request.remote})")
+                return web.Response(status=403)
+        
+        try:
+            data = await request.json()
+            update = Update.de_json(data, self.application.bot)
+        except (json.JSONDecodeError, ValueError, TypeError, KeyError) as e:
+            self.rejected += 1
+            logger.warning(f"Update inválido recebido no webhook: {e}")
+            return web.Response(status=400)
+        
+        if update is None:
+            self.rejected += 1
+            return web.Response(status=400)
+        
+        if self.update_processor is not None and self.update_processor.saturated:
+            self.queue_full += 1
+            logger.warning(f"Processamento saturado; update {update.update_id} recusado")
+            return web.Response(status=503)
+        
+        try:
+            self.application.update_queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.queue_full += 1
+            logger.warning(f"Fila de updates cheia; update {update.update_id} recusado")
+            return web.Response(status=503)
+        
+        self.received += 1
+        return web.Response(status=200)
+    
+    async def handle_health(self, request: web.Request) -> web.Response:
+        """Health check com o estado da fila"""
+        return web.json_response(self.stats())
+    
+    async def start(self) -> None:
+        """Inicia o servidor HTTP"""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.listen, self.port)
+        await site.start()
+        logger.info(f"Webhook ouvindo em http://{self.listen}:{self.port}{self.path}")
+    
+    async def stop(self) -> None:
+        """Encerra o servidor HTTP"""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Contadores do webhook"""
+        queue = self.application.update_queue
+        stats = {
+            'received': self.received,
+            'rejected': self.rejected,
+            'queue_full': self.queue_full,
+            'queue_size': queue.qsize(),
+            'queue_max_size': queue.maxsize
+        }
+        if self.update_processor is not None:
+            stats['processor'] = self.update_processor.stats()
+        return stats